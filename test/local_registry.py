@@ -0,0 +1,86 @@
+"""
+Stand-in for the MM Registry, for tests and local development. Keeps the registrations in memory, so restart() has
+the same effect as restarting the real registry.
+
+    python test/local_registry.py [port]
+"""
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from typing import Dict
+
+
+class LocalRegistry:
+    def __init__(self, port: int = 0, reply_id: bool = True):
+        self.registrations: Dict[str, dict] = {}
+        self.reply_id = reply_id  # whether a registration is answered with its id
+        self.requests = []  # (method, path) of every request
+        self._ids = count(1)
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/registry"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name="local-registry", daemon=True).start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def update_url(self) -> str:
+        """REGISTRY_UPDATE_URL of the registrations of this stand-in"""
+        return "{endpoint}/{id}"
+
+    def restart(self):
+        """Forgets all registrations, like the real registry does when it restarts"""
+        self.registrations.clear()
+
+    def _handler(self):
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                registry.requests.append(("GET", self.path))
+                self._reply(200, list(registry.registrations.values()))
+
+            def do_POST(self):
+                registry.requests.append(("POST", self.path))
+                registration = dict(self._body(), id=str(next(registry._ids)))
+                registry.registrations[registration["id"]] = registration
+                self._reply(201, registration if registry.reply_id else {})
+
+            def do_PUT(self):
+                registry.requests.append(("PUT", self.path))
+                registration_id = self.path.rstrip("/").rpartition("/")[2]
+                if registration_id not in registry.registrations:
+                    self._reply(404, {"detail": "Not found"})
+                    return
+                registry.registrations[registration_id] = dict(self._body(), id=registration_id)
+                self._reply(200, registry.registrations[registration_id])
+
+            def _body(self) -> dict:
+                return json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+
+            def _reply(self, status: int, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == '__main__':
+    local_registry = LocalRegistry(int(sys.argv[1]) if len(sys.argv) > 1 else 9200)
+    print(f"MM Registry stand-in listening at {local_registry.endpoint}")
+    local_registry._server.serve_forever()
@@ -1,5 +1,3 @@
-from time import sleep
-
 import requests
 
 api_endpoint = "http://localhost:9301"
@@ -50,7 +48,8 @@ else:
 
 succeeded = False
 while not succeeded:
-    res = requests.get(api_endpoint + '/model/status/' + model_run_id)
+    # long-poll: returns as soon as the state changes, or after 30 seconds
+    res = requests.get(api_endpoint + '/model/status/' + model_run_id, params={'wait': '30s'})
     if res.ok:
         print("Endpoint /model/status ok!")
         result = res.json()
@@ -60,8 +59,6 @@ while not succeeded:
         elif result['state'] == 'ERROR':
             print(result['reason'])
             break
-        else:
-            sleep(2)
     else:
         print("Endpoint /model/status not ok!")
         print(res.json())
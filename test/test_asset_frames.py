@@ -0,0 +1,104 @@
+import contextlib
+import io
+import os
+import sys
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+from tno.aimms_adapter.model.opera_esdl_parser.esdl_parser import ASSET_COLUMNS, CARRIER_COLUMNS, OperaESDLParser, \
+    parse_assets
+
+ESDL_FILE = os.path.join(os.path.dirname(__file__), "MACRO 5.esdl")
+KPI_ESDL_FILE = os.path.join(os.path.dirname(__file__), "HHP_KPIs.esdl")
+
+HEADER = '''<?xml version='1.0' encoding='UTF-8'?>
+<esdl:EnergySystem xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:esdl="http://www.tno.nl/esdl" name="Synthetic" id="synthetic" esdlVersion="v2102">
+  <energySystemInformation xsi:type="esdl:EnergySystemInformation" id="esi">
+    <carriers xsi:type="esdl:Carriers" id="carriers">
+      <carrier xsi:type="esdl:ElectricityCommodity" id="elec" name="Electricity">
+        <cost xsi:type="esdl:SingleValue" id="elec-cost" value="50.0">
+          <profileQuantityAndUnit xsi:type="esdl:QuantityAndUnitType" id="elec-cost-unit" perUnit="WATTHOUR" perMultiplier="MEGA" unit="EURO" physicalQuantity="COST"/>
+        </cost>
+      </carrier>
+    </carriers>
+  </energySystemInformation>
+  <instance xsi:type="esdl:Instance" id="instance">
+    <area xsi:type="esdl:Area" id="area" name="Area">
+'''
+ASSET = '''      <asset xsi:type="esdl:WindTurbine" type="WIND_ON_LAND" power="{power}" name="WindTurbine_{i}" id="wt-{i}">
+        <port xsi:type="esdl:OutPort" id="wt-{i}-out" name="Out" carrier="elec"/>
+        <costInformation xsi:type="esdl:CostInformation" id="wt-{i}-costs">
+          <investmentCosts xsi:type="esdl:SingleValue" id="wt-{i}-investment" value="1000.0">
+            <profileQuantityAndUnit xsi:type="esdl:QuantityAndUnitType" id="wt-{i}-investment-unit" unit="EURO" perUnit="WATT" physicalQuantity="COST"/>
+          </investmentCosts>
+        </costInformation>
+      </asset>
+'''
+FOOTER = '''    </area>
+  </instance>
+</esdl:EnergySystem>
+'''
+
+
+def synthetic_esdl(assets: int) -> bytes:
+    """An ESDL with the given number of wind turbines, each with a power, a port and an investment cost"""
+    return (HEADER + "".join(ASSET.format(i=i, power=1e6 * (i + 1)) for i in range(assets)) + FOOTER).encode()
+
+
+def parse(data: bytes):
+    with contextlib.redirect_stdout(io.StringIO()):  # the parser prints every asset
+        return OperaESDLParser().parse(data)
+
+
+class AssetFramesTestCase(unittest.TestCase):
+    def test_explicit_dtypes(self):
+        with open(ESDL_FILE, 'rb') as file:
+            assets, carriers = parse(file.read())
+        self.assertEqual(list(assets.columns), list(ASSET_COLUMNS))
+        self.assertEqual(list(carriers.columns), list(CARRIER_COLUMNS))
+        for name, dtype in ASSET_COLUMNS.items():
+            if dtype == 'float':
+                self.assertEqual(assets[name].dtype, 'float64', name)
+        self.assertEqual(carriers['cost'].dtype, 'float64')
+
+    def test_synthetic_assets(self):
+        assets, carriers = parse(synthetic_esdl(100))
+        self.assertEqual(len(assets), 100)
+        self.assertEqual(list(assets['name'][:2]), ["WindTurbine_0", "WindTurbine_1"])
+        self.assertAlmostEqual(assets['power'][99], 0.1)  # GW
+        self.assertEqual(set(assets['carrier_out']), {"Electricity"})
+        self.assertEqual(set(assets['opera_equivalent']), {"Wind op Land band 1"})
+        self.assertEqual(list(carriers['name']), ["Electricity"])
+
+    def test_separate_handler_per_input(self):
+        parser = OperaESDLParser()
+        with open(ESDL_FILE, 'rb') as file, contextlib.redirect_stdout(io.StringIO()):
+            parser.parse(file.read())
+        energy_system_id = parser.get_energy_system_Handler().energy_system.id
+        with open(KPI_ESDL_FILE, 'rb') as file, contextlib.redirect_stdout(io.StringIO()):
+            parser.parse_2(file.read())
+        self.assertEqual(parser.get_energy_system_Handler().energy_system.id, energy_system_id)
+        self.assertNotEqual(parser.esh_kpi.energy_system.id, energy_system_id)
+
+    def test_parse_in_worker_process(self):
+        with open(ESDL_FILE, 'rb') as file:
+            data = file.read()
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            assets, carriers = pool.submit(parse_assets, data).result()
+        expected_assets, expected_carriers = parse(data)
+        self.assertTrue(assets.equals(expected_assets))
+        self.assertTrue(carriers.equals(expected_carriers))
+
+
+if __name__ == '__main__':
+    # parse time per asset should stay about the same: python test/test_asset_frames.py benchmark
+    if sys.argv[1:] == ["benchmark"]:
+        for count in [1000, 10000, 100000]:
+            data = synthetic_esdl(count)
+            start = perf_counter()
+            parse(data)
+            duration = perf_counter() - start
+            print(f"{count:>6} assets: {duration:6.2f} s, {duration / count * 1e6:.0f} us per asset")
+    else:
+        unittest.main()
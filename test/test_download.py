@@ -0,0 +1,109 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+
+from tno.aimms_adapter.apis.download import send_result, stream_response
+from tno.aimms_adapter.model.storage import MinioStorage, Storage
+
+ESDL = b"<esdl:EnergySystem/>" * 1000
+
+
+class FakeMinio:
+    def presigned_get_object(self, bucket, name, expires):
+        return f"https://minio/{bucket}/{name}?expires={int(expires.total_seconds())}"
+
+
+class DownloadTestCase(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.storage = Storage(minio=MinioStorage(FakeMinio()))
+        self.path = 'file://' + os.path.join(folder.name, 'output.esdl')
+        self.storage.write_bytes(self.path, ESDL)
+        self.storage.write_bytes(self.path + '.gz', ESDL)
+
+        app = Flask(__name__)
+        app.add_url_rule('/download/<path:path>', view_func=lambda path: send_result(self.storage, path))
+        app.add_url_rule('/stream', view_func=self.stream)
+        self.client = app.test_client()
+
+    def get(self, path: str, **headers):
+        return self.client.get('/download/' + path, headers=headers)
+
+    def stream(self):
+        def open_stream():
+            raise AssertionError("opened, though the client has the current version")
+        return stream_response(open_stream, None, False, etag="current")
+
+    def test_plain(self):
+        response = self.get(self.path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, ESDL)
+        self.assertIsNone(response.headers.get('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response.vary)
+
+    def test_gzip_encoded_while_sent(self):
+        response = self.get(self.path, **{'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response.headers)  # streamed, not read into memory first
+        self.assertEqual(gzip.decompress(response.data), ESDL)
+
+    def test_gzip_stored(self):
+        response = self.get(self.path + '.gz', **{'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        with open(self.path[7:] + '.gz', 'rb') as file:
+            self.assertEqual(response.data, file.read())  # sent as stored
+        # decompressed for clients that don't accept gzip
+        response = self.get(self.path + '.gz', **{'Accept-Encoding': 'identity'})
+        self.assertIsNone(response.headers.get('Content-Encoding'))
+        self.assertEqual(response.data, ESDL)
+
+    def test_etag(self):
+        etag = self.get(self.path).headers['ETag']
+        response = self.get(self.path, **{'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+        gzip_etag = self.get(self.path, **{'Accept-Encoding': 'gzip'}).headers['ETag']
+        self.assertNotEqual(gzip_etag, etag)
+        self.assertEqual(self.get(self.path, **{'If-None-Match': gzip_etag, 'Accept-Encoding': 'gzip'}).status_code,
+                         304)
+        self.assertEqual(self.get(self.path, **{'If-None-Match': '"other"'}).status_code, 200)
+
+    def test_range(self):
+        response = self.get(self.path, Range='bytes=0-9')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.data, ESDL[:10])
+        self.assertEqual(response.headers['Content-Range'], f"bytes 0-9/{len(ESDL)}")
+
+    def test_not_modified_before_range(self):
+        etag = self.get(self.path).headers['ETag']
+        for accept_encoding in ['identity', 'gzip']:
+            response = self.get(self.path, Range='bytes=0-9', **{'If-None-Match': etag,
+                                                                'Accept-Encoding': accept_encoding})
+            self.assertEqual(response.status_code, 304, accept_encoding)
+
+    def test_missing_file(self):
+        self.assertEqual(self.get(self.path + '.missing').status_code, 404)
+
+    def test_minio_redirect(self):
+        response = self.get('results/output.esdl')
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.location.startswith("https://minio/results/output.esdl?expires="))
+
+    def test_streamed_without_presigned_url(self):
+        self.storage.write_bytes('memory://output.esdl.gz', ESDL)
+        response = self.get('memory://output.esdl.gz', **{'Accept-Encoding': 'identity'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, ESDL)
+
+    def test_stream_response_not_modified(self):
+        response = self.client.get('/stream', headers={'If-None-Match': '"current"'})
+        self.assertEqual(response.status_code, 304)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import glob
+import os
+import unittest
+
+import esdl
+from esdl.esdl_handler import EnergySystemHandler
+
+from tno.aimms_adapter.model.opera_esdl_parser.esdl_index import EnergySystemIndex
+from tno.aimms_adapter.model.opera_esdl_parser.esdl_io import load_esdl
+
+ESDL_FILES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "*.esdl")))
+
+
+class EnergySystemIndexTestCase(unittest.TestCase):
+    def test_same_instances_as_handler(self):
+        for path in ESDL_FILES:
+            esh = EnergySystemHandler()
+            with open(path, 'rb') as file:
+                load_esdl(esh, file.read())
+            index = EnergySystemIndex(esh.energy_system)
+            for esdl_type in [esdl.EnergyAsset, esdl.Carrier, esdl.DoubleKPI, esdl.TimeSeriesProfile, esdl.Port]:
+                self.assertEqual(index.instances_of(esdl_type), esh.get_all_instances_of_type(esdl_type),
+                                 f"{esdl_type.__name__} in {path}")
+
+    def test_asset_lookup(self):
+        esh = EnergySystemHandler()
+        with open(ESDL_FILES[0], 'rb') as file:
+            load_esdl(esh, file.read())
+        index = EnergySystemIndex(esh.energy_system)
+        for asset in index.instances_of(esdl.EnergyAsset):
+            lookup = index.asset(asset)
+            self.assertEqual(lookup.in_ports, [p for p in asset.port if isinstance(p, esdl.InPort)])
+            self.assertEqual(lookup.out_ports, [p for p in asset.port if isinstance(p, esdl.OutPort)])
+            for constraint in asset.constraint:
+                if isinstance(constraint, esdl.RangedConstraint):
+                    self.assertIn(constraint.attributeReference.lower(), lookup.ranged_constraints)
+
+    def test_empty_lookup_is_not_shared(self):
+        index = EnergySystemIndex(esdl.EnergySystem(id="empty"))
+        lookup = index.asset(esdl.WindTurbine(id="wt"))
+        lookup.in_ports.append(esdl.InPort(id="in"))
+        self.assertEqual(index.asset(esdl.WindTurbine(id="other")).in_ports, [])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import os
+import unittest
+
+import esdl
+from esdl.esdl_handler import EnergySystemHandler
+
+from tno.aimms_adapter.model.opera_esdl_parser.esdl_io import esdl_bytes, load_esdl
+
+ESDL_FILE = os.path.join(os.path.dirname(__file__), "MACRO 5.esdl")
+
+
+class EsdlIoTestCase(unittest.TestCase):
+    def test_bytes_round_trip(self):
+        with open(ESDL_FILE, 'rb') as file:
+            data = file.read()
+        from_bytes = EnergySystemHandler()
+        load_esdl(from_bytes, data)
+        from_string = EnergySystemHandler()
+        load_esdl(from_string, data.decode('utf-8'))
+        self.assertEqual(from_bytes.energy_system.id, from_string.energy_system.id)
+        self.assertEqual(esdl_bytes(from_bytes), from_string.to_string().encode('utf-8'))
+
+    def test_load_from_stream(self):
+        esh = EnergySystemHandler()
+        with open(ESDL_FILE, 'rb') as file:
+            load_esdl(esh, file)
+            self.assertFalse(file.closed)
+        self.assertTrue(esh.get_all_instances_of_type(esdl.EnergyAsset))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+from tno.aimms_adapter.data_types import ModelState
+from tno.aimms_adapter.model.events import RunEvents
+from tno.aimms_adapter.model.model import Model
+
+ENVIRON = {"MINIO_ENDPOINT": "", "RUN_REGISTRY_DATABASE": ":memory:", "RESULT_CACHE_MAX_BYTES": "0",
+           "OBJECT_CACHE_MAX_BYTES": "0"}
+
+
+class EventsModel(Model):
+    def process_results(self, result):
+        return result
+
+
+class RunEventsTestCase(unittest.TestCase):
+    def test_wait_returns_on_change(self):
+        events = RunEvents()
+        version = events.version("a")
+        threading.Timer(0.05, events.notify, args=["a"]).start()
+        self.assertEqual(events.wait("a", version, timeout=5), version + 1)
+
+    def test_wait_times_out_without_change(self):
+        events = RunEvents()
+        events.notify("b")
+        version = events.version("a")
+        self.assertEqual(events.wait("a", version, timeout=0.05), version)
+
+    def test_forget_wakes_up_waiters(self):
+        events = RunEvents()
+        events.notify("a")
+        threading.Timer(0.05, events.forget, args=["a"]).start()
+        self.assertEqual(events.wait("a", 1, timeout=5), 0)
+
+
+
+class ModelEventsTestCase(unittest.TestCase):
+    """Long-poll status and event streams of a model, driven by the RunEvents of its run registry"""
+
+    def setUp(self):
+        with mock.patch.dict(os.environ, ENVIRON):
+            self.model = EventsModel()
+        self.model_run_id = self.model.request().model_run_id
+
+    def later(self, delay: float, **update):
+        threading.Timer(delay, self.model.runs.update, args=[self.model_run_id], kwargs=update).start()
+
+    def test_wait_wakes_up_on_state_change(self):
+        self.later(0.05, state=ModelState.READY)
+        start = time.monotonic()
+        info = self.model.wait_for_state_change(self.model_run_id, timeout=5)
+        self.assertEqual(info.state, ModelState.READY)
+        self.assertLess(time.monotonic() - start, 4)
+
+    def test_wait_times_out(self):
+        self.later(0.02, progress=0.5, stage="Parsing")  # not a state change
+        start = time.monotonic()
+        info = self.model.wait_for_state_change(self.model_run_id, timeout=0.2)
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+        self.assertEqual((info.state, info.progress), (ModelState.ACCEPTED, 0.5))
+
+    def test_wait_returns_right_away_when_finished(self):
+        self.model.runs.update(self.model_run_id, state=ModelState.SUCCEEDED)
+        start = time.monotonic()
+        self.assertEqual(self.model.wait_for_state_change(self.model_run_id, timeout=5).state, ModelState.SUCCEEDED)
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_wait_wakes_up_on_remove(self):
+        threading.Timer(0.05, self.model.remove, args=[self.model_run_id]).start()
+        info = self.model.wait_for_state_change(self.model_run_id, timeout=5)
+        self.assertEqual(info.state, ModelState.ERROR)
+        self.assertIn("unknown", info.reason)
+
+    def test_events_until_finished(self):
+        events = self.model.run_events(self.model_run_id, keep_alive=0.05)
+        self.assertEqual(next(events).state, ModelState.ACCEPTED)
+        self.assertIsNone(next(events))  # keep-alive while nothing changes
+        self.model.runs.update(self.model_run_id, state=ModelState.RUNNING)
+        self.assertEqual(next(events).state, ModelState.RUNNING)
+        self.model.runs.update(self.model_run_id, progress=0.5, stage="Solving")
+        self.assertEqual(next(events).stage, "Solving")
+        self.model.runs.update(self.model_run_id, state=ModelState.SUCCEEDED)
+        self.assertEqual(next(events).state, ModelState.SUCCEEDED)
+        self.assertEqual(list(events), [])  # the stream ends with the run
+
+    def test_events_end_on_remove(self):
+        events = self.model.run_events(self.model_run_id, keep_alive=5)
+        next(events)
+        threading.Timer(0.05, self.model.remove, args=[self.model_run_id]).start()
+        self.assertEqual(next(events).state, ModelState.ERROR)
+        self.assertEqual(list(events), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
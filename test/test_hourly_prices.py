@@ -0,0 +1,39 @@
+import contextlib
+import io
+import os
+import unittest
+from datetime import datetime, time, timezone
+
+import numpy as np
+
+from tno.aimms_adapter.model.opera_esdl_parser.esdl_parser import ELECTRICITY_PRICE_COLUMNS, OperaESDLParser, \
+    hourly_price_frame
+
+KPI_ESDL_FILE = os.path.join(os.path.dirname(__file__), "HHP_KPIs.esdl")
+
+
+class HourlyPricesTestCase(unittest.TestCase):
+    def test_parse_2_prices(self):
+        with open(KPI_ESDL_FILE, 'rb') as file, contextlib.redirect_stdout(io.StringIO()):
+            _, prices = OperaESDLParser().parse_2(file.read())
+        self.assertEqual(list(prices.columns), list(ELECTRICITY_PRICE_COLUMNS))
+        self.assertEqual(len(prices), 8760)
+        self.assertEqual(list(prices['hour'][[0, 8759]]), [1, 8760])
+        self.assertEqual((str(prices['date'][0]), prices['time'][0]), ("2050-01-01", time(0)))
+        self.assertAlmostEqual(prices['price'][0], 45.0 / 3.6)
+        self.assertTrue(prices['electricity_cost'].all())  # the cost of the electricity carrier
+
+    def test_profiles_by_id(self):
+        start = datetime(2050, 1, 1, tzinfo=timezone.utc)
+        first = hourly_price_frame("a", start, None, np.array([36.0, 72.0]), has_unit=True)
+        second = hourly_price_frame("b", start, 7200, np.array([1.0, 2.0, 3.0]), has_unit=False)
+        self.assertEqual(list(first['price']), [10.0, 20.0])
+        self.assertEqual(list(second['price']), [1.0, 2.0, 3.0])
+        self.assertEqual(list(second['hour']), [1, 2, 3])
+        self.assertEqual(list(second['time']), [time(2), time(4), time(6)])
+        self.assertEqual(set(first['profile_id']), {"a"})
+        self.assertFalse(first['electricity_cost'].any())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,211 @@
+import json
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+from flask import Flask
+from flask_smorest import Api
+
+from tno.aimms_adapter.data_types import ModelState, OperaAdapterConfig
+
+ENVIRON = {"MINIO_ENDPOINT": "", "RUN_REGISTRY_DATABASE": ":memory:", "RESULT_CACHE_MAX_BYTES": "0",
+           "OBJECT_CACHE_MAX_BYTES": "0", "STATUS_MAX_WAIT": "2", "EVENT_KEEP_ALIVE": "0.05"}
+
+with mock.patch.dict(os.environ, ENVIRON):
+    from tno.aimms_adapter.apis import model_api
+    from tno.aimms_adapter.model.opera import Opera
+
+
+class ModelApiTestCase(unittest.TestCase):
+    def setUp(self):
+        environ = mock.patch.dict(os.environ, ENVIRON)
+        environ.start()
+        self.addCleanup(environ.stop)
+        self.opera = Opera()
+        patch = mock.patch.object(model_api, "opera", self.opera)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+        app = Flask(__name__)
+        app.config.update(API_TITLE="test", API_VERSION="v1", OPENAPI_VERSION="3.0.2")
+        Api(app).register_blueprint(model_api.api)
+        self.app = app
+        self.client = app.test_client()
+
+    def request(self) -> str:
+        return self.client.get("/model/request").get_json()["model_run_id"]
+
+    def later(self, delay: float, model_run_id: str, **update):
+        threading.Timer(delay, self.opera.runs.update, args=[model_run_id], kwargs=update).start()
+
+
+class ParseWaitTestCase(ModelApiTestCase):
+    def test_durations(self):
+        with self.app.test_request_context():
+            self.assertEqual(model_api.parse_wait("500ms"), 0.5)
+            self.assertEqual(model_api.parse_wait("1.5s"), 1.5)
+            self.assertEqual(model_api.parse_wait("1"), 1)
+            self.assertEqual(model_api.parse_wait(" 1 s "), 1)
+            # capped at STATUS_MAX_WAIT
+            self.assertEqual(model_api.parse_wait("2m"), 2)
+            self.assertEqual(model_api.parse_wait("30"), 2)
+
+    def test_invalid_duration(self):
+        model_run_id = self.request()
+        for wait in ["soon", "-1s", "1h", "1e3"]:
+            response = self.client.get(f"/model/status/{model_run_id}", query_string={"wait": wait})
+            self.assertEqual(response.status_code, 400, wait)
+
+
+class StatusWaitTestCase(ModelApiTestCase):
+    def test_without_wait(self):
+        model_run_id = self.request()
+        response = self.client.get(f"/model/status/{model_run_id}")
+        self.assertEqual(response.get_json()["state"], ModelState.ACCEPTED.value)
+
+    def test_wakes_up_on_state_change(self):
+        model_run_id = self.request()
+        self.later(0.1, model_run_id, state=ModelState.RUNNING)
+        start = time.monotonic()
+        response = self.client.get(f"/model/status/{model_run_id}", query_string={"wait": "30s"})
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertEqual(response.get_json()["state"], ModelState.RUNNING.value)
+
+    def test_times_out_at_max_wait(self):
+        model_run_id = self.request()
+        start = time.monotonic()
+        response = self.client.get(f"/model/status/{model_run_id}", query_string={"wait": "10m"})
+        self.assertGreaterEqual(time.monotonic() - start, 2)
+        self.assertEqual(response.get_json()["state"], ModelState.ACCEPTED.value)
+
+    def test_unknown_run(self):
+        response = self.client.get("/model/status/unknown", query_string={"wait": "30s"})
+        self.assertEqual(response.get_json()["state"], ModelState.ERROR.value)
+
+
+class EventsTestCase(ModelApiTestCase):
+    def events(self, model_run_id: str):
+        """The events of the SSE stream of a run, as (event, data) with None for a keep-alive comment"""
+        response = self.client.get(f"/model/events/{model_run_id}", buffered=False)
+        self.assertEqual(response.mimetype, "text/event-stream")
+        self.addCleanup(response.close)
+        for message in response.response:
+            message = message.decode() if isinstance(message, bytes) else message
+            self.assertTrue(message.endswith("\n\n"), message)
+            if message.startswith(":"):
+                yield None
+            else:
+                event, data = message.strip().split("\n")
+                yield event[len("event: "):], json.loads(data[len("data: "):])
+
+    def test_status_and_keep_alive(self):
+        model_run_id = self.request()
+        events = self.events(model_run_id)
+        event, info = next(events)
+        self.assertEqual((event, info["state"]), ("status", ModelState.ACCEPTED.value))
+        self.assertIsNone(next(events))
+        self.opera.runs.update(model_run_id, progress=0.5, stage="Solving")
+        self.assertEqual(next(events)[1]["stage"], "Solving")
+        self.opera.runs.update(model_run_id, state=ModelState.SUCCEEDED)
+        self.assertEqual(next(events)[1]["state"], ModelState.SUCCEEDED.value)
+        self.assertEqual(list(events), [])
+
+    def test_ends_on_remove(self):
+        model_run_id = self.request()
+        events = self.events(model_run_id)
+        next(events)
+        threading.Timer(0.1, self.opera.remove, args=[model_run_id]).start()
+        states = [event[1]["state"] for event in events if event is not None]  # skips keep-alives until removed
+        self.assertEqual(states, [ModelState.ERROR.value])
+
+    def test_unknown_run(self):
+        events = list(self.events("unknown"))
+        self.assertEqual([info["state"] for _, info in events], [ModelState.ERROR.value])
+
+
+class BatchTestCase(ModelApiTestCase):
+    def setUp(self):
+        super().setUp()
+        for name in ["a.esdl", "b.esdl", "c.esdl"]:
+            self.opera.storage.write_bytes(f"memory://{name}", name.encode())
+        # the runs wait in threaded_run until the test ends, so their states are known
+        self.solving = threading.Event()
+        self.addCleanup(self.solving.set)
+        self.started = []
+
+        def threaded_run(model_run_id, config):
+            self.started.append(model_run_id)
+            self.opera.runs.update(model_run_id, state=ModelState.RUNNING)
+            self.solving.wait(10)
+            self.opera.runs.update(model_run_id, state=ModelState.SUCCEEDED)
+            return self.opera.run_info(model_run_id)
+
+        for name, replacement in [("threaded_run", threaded_run), ("stage_ahead", lambda: None)]:
+            patch = mock.patch.object(self.opera, name, replacement)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    @staticmethod
+    def config(input_1: str, input_2: str = "memory://c.esdl") -> dict:
+        return {"input_esdl_file_path_1": input_1, "input_esdl_file_path_2": input_2,
+                "output_esdl_file_path": "memory://output.esdl"}
+
+    def batch(self, *configs: dict):
+        return self.client.post("/model/batch", json={"configs": list(configs)})
+
+    def batch_status(self, *model_run_ids: str):
+        return self.client.post("/model/batch/status", json={"model_run_ids": list(model_run_ids)})
+
+    def test_batch(self):
+        response = self.batch(self.config("memory://a.esdl"), self.config("memory://b.esdl"))
+        self.assertEqual(response.status_code, 201)
+        infos = response.get_json()
+        model_run_ids = [info["model_run_id"] for info in infos]
+        self.assertEqual(len(set(model_run_ids)), 2)
+        for info in infos:
+            self.assertIn(info["state"], [ModelState.QUEUED.value, ModelState.RUNNING.value])
+
+        statuses = self.batch_status(*reversed(model_run_ids)).get_json()
+        self.assertEqual([status["model_run_id"] for status in statuses], list(reversed(model_run_ids)))
+        self.solving.set()
+        for model_run_id in model_run_ids:
+            self.assertEqual(self.opera.scheduler.future(model_run_id).result(timeout=10).state,
+                             ModelState.SUCCEEDED)
+        self.assertEqual(sorted(self.started), sorted(model_run_ids))
+        self.assertEqual([status["state"] for status in self.batch_status(*model_run_ids).get_json()],
+                         [ModelState.SUCCEEDED.value] * 2)
+
+    def test_invalid_config_queues_nothing(self):
+        response = self.batch(self.config("memory://a.esdl"), {"input_esdl_file_path_1": "memory://b.esdl"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("config 1", response.get_json()["message"])
+        self.assertEqual(len(self.opera.runs), 0)
+        self.assertEqual(self.opera.scheduler.queued(), [])
+        self.assertEqual(self.started, [])
+
+    def test_invalid_request(self):
+        self.assertEqual(self.client.post("/model/batch", json={}).status_code, 422)
+        self.assertEqual(self.batch({"input_esdl_file_path_1": 1}).status_code, 422)
+        self.assertEqual(len(self.opera.runs), 0)
+
+    def test_identical_inputs_share_a_run(self):
+        infos = self.opera.run_batch([OperaAdapterConfig(**self.config("memory://a.esdl")) for _ in range(2)])
+        self.solving.set()
+        for info in infos:
+            self.assertEqual(self.opera.scheduler.future(info.model_run_id).result(timeout=10).state,
+                             ModelState.SUCCEEDED)
+        self.assertEqual(self.started, [infos[0].model_run_id])
+
+    def test_status_of_unknown_ids(self):
+        model_run_id = self.request()
+        statuses = self.batch_status("unknown", model_run_id).get_json()
+        self.assertEqual([status["model_run_id"] for status in statuses], ["unknown", model_run_id])
+        self.assertEqual(statuses[0]["state"], ModelState.ERROR.value)
+        self.assertIn("model_run_id unknown", statuses[0]["reason"])
+        self.assertEqual(statuses[1]["state"], ModelState.ACCEPTED.value)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,18 @@
+import tempfile
+import unittest
+
+from tno.aimms_adapter.model.object_cache import ObjectCache
+
+
+class ObjectCacheTestCase(unittest.TestCase):
+    def test_changed_etag_is_a_miss(self):
+        cache = ObjectCache(folder=tempfile.mkdtemp(), max_bytes=1000)
+        cache.put_bytes(cache.object_key("esdl", "kpis.esdl", "etag-1"), b"<esdl/>")
+        self.assertEqual(cache.get_bytes(cache.object_key("esdl", "kpis.esdl", "etag-1")), b"<esdl/>")
+        self.assertIsNone(cache.get_bytes(cache.object_key("esdl", "kpis.esdl", "etag-2")))
+        self.assertEqual(cache.stats()["bytes_saved"], len(b"<esdl/>"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
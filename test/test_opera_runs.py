@@ -0,0 +1,302 @@
+import os
+import re
+import shutil
+import stat
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from tno.aimms_adapter.data_types import ModelState, OperaAdapterConfig
+from tno.aimms_adapter.model.opera import Opera
+from tno.aimms_adapter.model.opera_accessdb.opera_access_importer import OperaAccessImporter, \
+    electricity_import_prices
+from tno.aimms_adapter.model.opera_esdl_parser.esdl_parser import hourly_price_frame
+
+TEST_FOLDER = os.path.dirname(os.path.abspath(__file__))
+ESDL_FILE = os.path.join(TEST_FOLDER, "MACRO 5.esdl")
+KPI_ESDL_FILE = os.path.join(TEST_FOLDER, "HHP_KPIs.esdl")
+
+# stands in for AIMMS: started as <exe> -R <procedure> <project> <database> <output folder>
+FAKE_AIMMS = '''#!{python}
+import os, sys, time
+_, _, procedure, project, database, output_folder = sys.argv
+with open(os.path.join(os.path.dirname(project), "aimms_calls.log"), "a+") as log:
+    log.write(database + "\\n")
+    log.seek(0)
+    calls = len(log.read().splitlines())
+with open(database) as file:
+    if "imported" not in file.read():
+        sys.exit(3)  # solving a database without the input of the run
+if procedure == "slow_solve" or (procedure == "slow_first_solve" and calls == 1):
+    time.sleep(60)
+open(os.path.join(output_folder, "solution.csv"), "w").close()
+'''
+
+
+IMPORTED_PRICE_PROFILES = []  # the profile ids of the electricity import prices of every import
+
+
+def fake_import(self, access_database, hourly_electricity_price, **frames):
+    # picks the electricity import price like the importer does
+    IMPORTED_PRICE_PROFILES.append(set(electricity_import_prices(hourly_electricity_price)['profile_id']))
+    with open(access_database, "a") as file:
+        file.write("imported")
+
+
+class OperaRunsTestCase(unittest.TestCase):
+    """
+    Model runs through the real Opera path: scheduler, prepare pool, parsing, workspace, AIMMS process and results.
+    AIMMS is replaced by a script and the Access importer by a stub that marks the database of the run.
+    """
+
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+
+        aimms = os.path.join(self.folder, "aimms")
+        with open(aimms, "w") as file:
+            file.write(FAKE_AIMMS.format(python=sys.executable))
+        os.chmod(aimms, os.stat(aimms).st_mode | stat.S_IEXEC)
+        with open(os.path.join(self.folder, "clean.mdb"), "w") as file:
+            file.write("clean ")
+        self.workspace_root = os.path.join(self.folder, "workspaces")
+        self.environ = {
+            "MINIO_ENDPOINT": "",
+            "AIMMS_EXE_PATH": aimms,
+            "AIMMS_MODEL_PATH": os.path.join(self.folder, "Optiedocument.aimms"),
+            "AIMMS_PROCEDURE": "solve",
+            "ACCESS_DATABASE": os.path.join(self.folder, "opera.mdb"),
+            "CLEAN_ACCESS_DATABASE": os.path.join(self.folder, "clean.mdb"),
+            "WORKSPACE_ROOT": self.workspace_root,
+            "RUN_REGISTRY_DATABASE": os.path.join(self.folder, "run_registry.sqlite"),
+            "RESULT_CACHE_MAX_BYTES": "0",
+            "OBJECT_CACHE_MAX_BYTES": "0",
+            "MAX_CONCURRENT_RUNS": "1",
+            "PREPARE_WORKERS": "1",
+            "PARSE_PROCESSES": "0",
+            "CANCEL_WAIT": "10",
+        }
+        patcher = mock.patch.dict(os.environ, self.environ)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        IMPORTED_PRICE_PROFILES.clear()
+        patcher = mock.patch.object(OperaAccessImporter, "start_import", fake_import)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def config(self, output: str, input_esdl: str = ESDL_FILE) -> OperaAdapterConfig:
+        return OperaAdapterConfig(input_esdl_file_path_1="file://" + input_esdl,
+                                  input_esdl_file_path_2="file://" + KPI_ESDL_FILE,
+                                  output_esdl_file_path="file://" + os.path.join(self.folder, output))
+
+    def start(self, opera: Opera, output: str, input_esdl: str = ESDL_FILE) -> str:
+        model_run_id = opera.request().model_run_id
+        opera.initialize(model_run_id, self.config(output, input_esdl))
+        opera.run(model_run_id)
+        return model_run_id
+
+    @staticmethod
+    def wait(opera: Opera, model_run_ids, timeout: float = 60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if all(opera.runs.state(model_run_id) in (ModelState.SUCCEEDED, ModelState.ERROR)
+                   for model_run_id in model_run_ids):
+                return
+            time.sleep(0.1)
+        raise AssertionError(f"Model runs did not finish within {timeout} s")
+
+    def wait_for_aimms(self):
+        deadline = time.monotonic() + 60
+        while not os.path.exists(os.path.join(self.folder, "aimms_calls.log")):
+            self.assertLess(time.monotonic(), deadline, "AIMMS was not started")
+            time.sleep(0.1)
+
+    def aimms_calls(self):
+        with open(os.path.join(self.folder, "aimms_calls.log")) as log:
+            return log.read().splitlines()
+
+    def test_run(self):
+        opera = Opera()
+        model_run_id = self.start(opera, "output.esdl")
+        self.wait(opera, [model_run_id])
+
+        info = opera.results(model_run_id)
+        self.assertEqual(info.state, ModelState.SUCCEEDED, info.reason)
+        self.assertEqual(info.result, {"path": "file://" + os.path.join(self.folder, "output.esdl")})
+        with open(os.path.join(self.folder, "output.esdl"), "rb") as file:
+            self.assertTrue(file.read().startswith(b"<?xml"))
+        # AIMMS solved the database of the workspace, which is removed afterwards
+        self.assertEqual(self.aimms_calls(), [os.path.join(self.workspace_root, model_run_id, "opera.mdb")])
+        self.assertEqual(os.listdir(self.workspace_root), [])
+
+    def test_restart_after_succeeded(self):
+        opera = Opera()
+        model_run_id = self.start(opera, "output.esdl")
+        self.wait(opera, [model_run_id])
+        self.assertEqual(opera.runs.state(model_run_id), ModelState.SUCCEEDED)
+
+        # a new adapter on the same run registry, /model/results was never called on the first one
+        restarted = Opera()
+        info = restarted.results(model_run_id)
+        self.assertEqual(info.state, ModelState.SUCCEEDED)
+        self.assertEqual(info.result, {"path": "file://" + os.path.join(self.folder, "output.esdl")})
+        self.assertTrue(os.path.isfile(os.path.join(self.folder, "output.esdl")))
+        self.assertEqual(restarted.result_path(model_run_id), info.result["path"])
+
+    def test_started_when_it_gets_a_slot(self):
+        os.environ["AIMMS_PROCEDURE"] = "slow_first_solve"
+        opera = Opera()
+        first_id = self.start(opera, "output_1.esdl")
+        input_esdl = shutil.copy(ESDL_FILE, os.path.join(self.folder, "input.esdl"))
+        with open(input_esdl, "a") as file:
+            file.write("\n")  # another input, so the second run doesn't follow the first
+        second_id = self.start(opera, "output_2.esdl", input_esdl)
+        self.wait_for_aimms()
+        self.assertIsNotNone(opera.runs.get(first_id).started)
+        self.assertEqual(opera.runs.state(second_id), ModelState.QUEUED)
+        self.assertIsNone(opera.runs.get(second_id).started)  # waiting in the queue is not part of the run
+
+        opera.cancel(first_id)
+        self.wait(opera, [second_id])
+        self.assertEqual(opera.runs.state(second_id), ModelState.SUCCEEDED)
+        self.assertGreaterEqual(opera.runs.get(second_id).started, opera.runs.get(first_id).finished)
+
+    def test_leader_with_followers(self):
+        opera = Opera()
+        runs = opera.run_batch([self.config(f"output_{i}.esdl") for i in range(3)])
+        model_run_ids = [info.model_run_id for info in runs]
+        self.wait(opera, model_run_ids)
+
+        for i, model_run_id in enumerate(model_run_ids):
+            info = opera.results(model_run_id)
+            self.assertEqual(info.state, ModelState.SUCCEEDED, info.reason)
+            self.assertEqual(info.result["path"], "file://" + os.path.join(self.folder, f"output_{i}.esdl"))
+            self.assertTrue(os.path.isfile(os.path.join(self.folder, f"output_{i}.esdl")))
+        self.assertEqual(len(self.aimms_calls()), 1)  # the followers got the result of the leader
+
+    def test_followers_go_on_when_leader_is_cancelled(self):
+        os.environ["AIMMS_PROCEDURE"] = "slow_first_solve"
+        opera = Opera()
+        leader_id, *follower_ids = [info.model_run_id for info in
+                                    opera.run_batch([self.config(f"output_{i}.esdl") for i in range(3)])]
+        self.wait_for_aimms()
+
+        self.assertEqual(opera.cancel(leader_id).state, ModelState.ERROR)
+        self.wait(opera, follower_ids)
+        for model_run_id in follower_ids:
+            info = opera.results(model_run_id)
+            self.assertEqual(info.state, ModelState.SUCCEEDED, info.reason)
+        # the first follower took the place of the leader, the other one followed it
+        self.assertEqual(len(self.aimms_calls()), 2)
+
+    def test_changed_input_is_not_followed(self):
+        os.environ["AIMMS_PROCEDURE"] = "slow_first_solve"
+        input_esdl = shutil.copy(ESDL_FILE, os.path.join(self.folder, "input.esdl"))
+        opera = Opera()
+        first_id = self.start(opera, "output_1.esdl", input_esdl)
+        self.wait_for_aimms()
+        with open(input_esdl, "a") as file:
+            file.write("\n")  # changed at the same path while the first run solves
+        second_id = self.start(opera, "output_2.esdl", input_esdl)
+        self.assertNotIn(second_id, opera._followers)
+        self.assertEqual(opera.runs.state(second_id), ModelState.QUEUED)
+
+        opera.cancel(first_id)
+        self.wait(opera, [second_id])
+        self.assertEqual(opera.runs.state(second_id), ModelState.SUCCEEDED)
+        self.assertEqual(len(self.aimms_calls()), 2)
+
+    def test_prepares_only_head_of_queue(self):
+        opera = Opera()
+        configs = []
+        for i in range(4):
+            input_esdl = shutil.copy(ESDL_FILE, os.path.join(self.folder, f"input_{i}.esdl"))
+            with open(input_esdl, "a") as file:
+                file.write("\n" * (i + 1))  # different inputs, so the runs don't follow each other
+            configs.append(self.config(f"output_{i}.esdl", input_esdl))
+        model_run_ids = [info.model_run_id for info in opera.run_batch(configs)]
+
+        most_workspaces = 0
+        deadline = time.monotonic() + 120
+        while not all(opera.runs.state(model_run_id) in (ModelState.SUCCEEDED, ModelState.ERROR)
+                      for model_run_id in model_run_ids):
+            self.assertLess(time.monotonic(), deadline, "Model runs did not finish")
+            self.assertLessEqual(len(opera._prepared), 1)  # PREPARE_WORKERS runs ahead of the solve slot
+            if os.path.isdir(self.workspace_root):
+                most_workspaces = max(most_workspaces, len(os.listdir(self.workspace_root)))
+            time.sleep(0.05)
+        self.assertLessEqual(most_workspaces, 2)  # the solving run and the one prepared ahead
+        for model_run_id in model_run_ids:
+            self.assertEqual(opera.runs.state(model_run_id), ModelState.SUCCEEDED, opera.runs.get(model_run_id).reason)
+        self.assertEqual(len(self.aimms_calls()), 4)
+
+    def test_cancel_while_solving(self):
+        os.environ["AIMMS_PROCEDURE"] = "slow_solve"
+        opera = Opera()
+        model_run_id = self.start(opera, "output.esdl")
+        self.wait_for_aimms()
+
+        start = time.monotonic()
+        info = opera.cancel(model_run_id)
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(info.state, ModelState.ERROR)
+        self.assertTrue(info.reason.startswith("CANCELLED:"), info.reason)
+        self.assertEqual(os.listdir(self.workspace_root), [])
+        self.assertFalse(os.path.exists(os.path.join(self.folder, "output.esdl")))
+
+    def test_cancel_leaves_parses_of_other_runs_alone(self):
+        os.environ["PARSE_PROCESSES"] = "2"
+        os.environ["PREPARE_WORKERS"] = "2"
+        opera = Opera()
+        first_id = self.start(opera, "output_1.esdl")
+        input_esdl = shutil.copy(ESDL_FILE, os.path.join(self.folder, "input.esdl"))
+        with open(input_esdl, "a") as file:
+            file.write("\n")  # another input, so the second run is parsed next to the first instead of following it
+        second_id = self.start(opera, "output_2.esdl", input_esdl)
+        self.assertNotIn(second_id, opera._followers)
+        opera.cancel(first_id)  # while it is being prepared or solved
+        self.wait(opera, [first_id, second_id], timeout=120)
+        self.assertTrue(opera.runs.get(first_id).reason.startswith("CANCELLED:"))
+        self.assertEqual(opera.runs.state(second_id), ModelState.SUCCEEDED, opera.runs.get(second_id).reason)
+
+    def test_electricity_cost_among_price_profiles(self):
+        with open(KPI_ESDL_FILE) as file:
+            kpi_esdl = file.read()
+        # a gas carrier with a price profile of its own, next to the price profile of the electricity carrier
+        carrier = re.search(r'<carrier xsi:type="esdl:ElectricityCommodity".*?</carrier>\n', kpi_esdl, re.DOTALL).group(0)
+        gas = re.sub(r'id="([0-9a-f]{8})', r'id="00000000', carrier)
+        gas = gas.replace("esdl:ElectricityCommodity", "esdl:GasCommodity").replace('name="Electricity"', 'name="Gas"')
+        with open(os.path.join(self.folder, "kpis.esdl"), "w") as file:
+            file.write(kpi_esdl.replace(carrier, gas + carrier))
+        electricity_cost = re.search(r'<cost xsi:type="esdl:TimeSeriesProfile"[^>]*? id="([^"]+)"', carrier).group(1)
+
+        opera = Opera()
+        config = self.config("output.esdl")
+        config.input_esdl_file_path_2 = "file://" + os.path.join(self.folder, "kpis.esdl")
+        model_run_id = opera.request().model_run_id
+        opera.initialize(model_run_id, config)
+        opera.run(model_run_id)
+        self.wait(opera, [model_run_id])
+
+        info = opera.results(model_run_id)
+        self.assertEqual(info.state, ModelState.SUCCEEDED, info.reason)
+        self.assertEqual(IMPORTED_PRICE_PROFILES, [{electricity_cost}])
+
+    def test_price_profile_without_carrier(self):
+        values = np.arange(3, dtype=float)
+        only = hourly_price_frame("only", None, None, values, has_unit=False)
+        self.assertEqual(set(electricity_import_prices(only)['profile_id']), {"only"})
+        several = pd.concat([only, hourly_price_frame("other", None, None, values, has_unit=False)],
+                            ignore_index=True)
+        with self.assertRaisesRegex(ValueError, "None of the 2 hourly price profiles"):
+            electricity_import_prices(several)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import operator
+import threading
+import time
+import unittest
+
+from tno.aimms_adapter.model.parse_workers import ParseWorkers
+from tno.aimms_adapter.model.run_control import RunCancelled, RunControl
+
+
+class ParseWorkersTestCase(unittest.TestCase):
+    def setUp(self):
+        self.workers = ParseWorkers(processes=2, threads=2)
+
+    def test_workers_are_reused(self):
+        with self.workers.checkout(2, RunControl("first")) as lease:
+            self.assertEqual(lease.submit(operator.add, 1, 2).result(timeout=60), 3)
+            executors = set(lease.executors)
+        with self.workers.checkout(2, RunControl("second")) as lease:
+            self.assertEqual(set(lease.executors), executors)
+
+    def test_stopping_a_run_leaves_other_runs_alone(self):
+        with self.workers.checkout(1, RunControl("other")) as other:
+            other_future = other.submit(time.sleep, 1)
+            with self.workers.checkout(1, RunControl("stopped")) as stopped:
+                hanging = stopped.submit(time.sleep, 60)
+                time.sleep(1)  # until the worker process runs it
+                stopped.stop([hanging])
+            self.assertIsNone(other_future.result(timeout=60))
+        # the killed worker is replaced by a new one
+        with self.workers.checkout(2, RunControl("next")) as lease:
+            self.assertEqual([lease.submit(operator.add, i, 1).result(timeout=60) for i in range(2)], [1, 2])
+
+    def test_checkout_waits_for_free_workers(self):
+        control = RunControl("waiting")
+        with self.workers.checkout(2, RunControl("busy")):
+            threading.Timer(0.5, control.cancel, ["CANCELLED: by request"]).start()
+            with self.assertRaises(RunCancelled):
+                with self.workers.checkout(1, control):
+                    pass
+
+    def test_threads(self):
+        workers = ParseWorkers(processes=0, threads=2)
+        with workers.checkout(2, RunControl("run")) as lease:
+            self.assertEqual(lease.submit(operator.add, 1, 2).result(timeout=10), 3)
+            self.assertIs(lease.executors[0], workers.thread_pool())
+
+
+if __name__ == '__main__':
+    unittest.main()
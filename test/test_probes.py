@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+
+from tno.aimms_adapter.model.workspace import workspace_disk_usage
+from tno.aimms_adapter.probes import Probe, Probes
+
+
+class ProbesTestCase(unittest.TestCase):
+    def test_probe_caches_outcome(self):
+        outcomes = [None, ConnectionError("unreachable")]
+
+        def check():
+            outcome = outcomes.pop(0)
+            if outcome:
+                raise outcome
+
+        probe = Probe("test", check, interval=60)
+        self.assertIsNone(probe.info()["ok"])
+        probe.check()
+        self.assertTrue(probe.ok)
+        self.assertIsNotNone(probe.info()["latency_ms"])
+        probe.check()
+        self.assertEqual((probe.ok, probe.error), (False, "unreachable"))
+
+    def test_failing_ignores_unchecked_probes(self):
+        probes = Probes()
+        probes.probes["unchecked"] = Probe("unchecked", lambda: None, interval=60)
+        self.assertFalse(probes.failing)
+        probes.probes["unchecked"].ok = False
+        self.assertTrue(probes.failing)
+
+    def test_workspace_disk_usage_of_missing_root(self):
+        with tempfile.TemporaryDirectory() as folder:
+            usage = workspace_disk_usage(os.path.join(folder, "workspaces", "not_created"))
+            self.assertEqual(usage["path"], os.path.abspath(folder))
+            self.assertGreater(usage["total_bytes"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import contextlib
+import glob
+import io
+import os
+import sys
+import tracemalloc
+import unittest
+import unittest.mock
+from time import perf_counter
+
+import esdl
+import numpy as np
+from esdl.esdl_handler import EnergySystemHandler
+
+from tno.aimms_adapter.model.opera_esdl_parser.esdl_io import load_esdl
+from tno.aimms_adapter.model.opera_esdl_parser.esdl_parser import OperaESDLParser
+from tno.aimms_adapter.model.opera_esdl_parser.profile_stream import VALUES_ATTRIBUTE, strip_time_series
+
+# the input ESDLs of the model, the others hold KPIs and prices for parse_2()
+ESDL_FILES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "MACRO *.esdl")))
+KPI_ESDL_FILE = os.path.join(os.path.dirname(__file__), "HHP_KPIs.esdl")
+
+HEADER = '''<?xml version='1.0' encoding='UTF-8'?>
+<esdl:EnergySystem xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:esdl="http://www.tno.nl/esdl" name="Profiles" id="profiles" esdlVersion="v2102">
+  <energySystemInformation xsi:type="esdl:EnergySystemInformation" id="esi">
+    <profiles xsi:type="esdl:Profiles" id="profiles-container">
+'''
+PROFILE = '''      <profile xsi:type="esdl:TimeSeriesProfile" id="profile-{i}" name="Profile {i}" startDateTime="2050-01-01T00:00:00.000000+0000" timestep="3600" values="{values}"/>
+'''
+FOOTER = '''    </profiles>
+  </energySystemInformation>
+</esdl:EnergySystem>
+'''
+
+
+def synthetic_esdl(profiles: int, hours: int = 8760) -> bytes:
+    """An ESDL with the given number of hourly TimeSeriesProfiles"""
+    values = " ".join(str(float(hour % 100)) for hour in range(hours))
+    return (HEADER + "".join(PROFILE.format(i=i, values=values) for i in range(profiles)) + FOOTER).encode()
+
+
+def load(data: bytes) -> EnergySystemHandler:
+    esh = EnergySystemHandler()
+    load_esdl(esh, data)
+    return esh
+
+
+class ProfileStreamTestCase(unittest.TestCase):
+    def test_values_as_arrays(self):
+        with open(KPI_ESDL_FILE, 'rb') as file:
+            data = file.read()
+        stripped, values = strip_time_series(data)
+        profiles = load(data).get_all_instances_of_type(esdl.TimeSeriesProfile)
+        self.assertEqual(set(values), {profile.id for profile in profiles})
+        for profile in profiles:
+            np.testing.assert_array_equal(values[profile.id], list(profile.values))
+        for profile in load(stripped).get_all_instances_of_type(esdl.TimeSeriesProfile):
+            self.assertEqual(len(profile.values), 0)
+        self.assertLess(len(stripped), len(data))
+
+    def test_small_chunks(self):
+        data = synthetic_esdl(3, hours=10)
+        with unittest.mock.patch('tno.aimms_adapter.model.opera_esdl_parser.profile_stream.CHUNK_SIZE', 7):
+            stripped, values = strip_time_series(data)
+        self.assertEqual(stripped, strip_time_series(data)[0])
+        self.assertEqual(sorted(values), ["profile-0", "profile-1", "profile-2"])
+        np.testing.assert_array_equal(values["profile-2"], [float(hour) for hour in range(10)])
+
+    def test_stream_in_small_chunks(self):
+        data = synthetic_esdl(3, hours=10)
+        with unittest.mock.patch('tno.aimms_adapter.model.opera_esdl_parser.profile_stream.CHUNK_SIZE', 5):
+            stripped, values = strip_time_series(io.BytesIO(data))
+        self.assertEqual(stripped, VALUES_ATTRIBUTE.sub(b'', data))
+        np.testing.assert_array_equal(values["profile-1"], [float(hour) for hour in range(10)])
+
+    def test_value_not_a_number(self):
+        data = synthetic_esdl(2, hours=10).replace(b'5.0', b'5.0x', 1)
+        with self.assertRaisesRegex(ValueError, "TimeSeriesProfile profile-0 .* '5.0x'"):
+            strip_time_series(io.BytesIO(data))
+
+    def test_same_frames(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            for path in ESDL_FILES:
+                with open(path, 'rb') as file:
+                    data = file.read()
+                for expected, frame in zip(OperaESDLParser().parse(data),
+                                           OperaESDLParser().parse(data, skip_time_series=True)):
+                    self.assertTrue(frame.equals(expected), path)
+
+    def test_synthetic_prices(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, prices = OperaESDLParser().parse_2(synthetic_esdl(2, hours=48))
+        self.assertEqual(len(prices), 96)
+        self.assertEqual(list(prices['price'][[0, 47, 48]]), [0.0, 47.0, 0.0])
+        self.assertEqual(set(prices['profile_id']), {"profile-0", "profile-1"})
+
+
+if __name__ == '__main__':
+    # loading with and without streaming the time series: python test/test_profile_stream.py benchmark
+    if sys.argv[1:] == ["benchmark"]:
+        data = synthetic_esdl(50)
+        print(f"ESDL of {len(data) / 1e6:.1f} MB with 50 profiles of 8760 values")
+        for name, run in [("pyecore", lambda: load(data)), ("streamed", lambda: load(strip_time_series(data)[0]))]:
+            start = perf_counter()
+            run()
+            duration = perf_counter() - start
+            tracemalloc.start()
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{name:>8}: {duration:6.3f} s, peak {peak / 1e6:6.1f} MB")
+    else:
+        unittest.main()
@@ -0,0 +1,69 @@
+import os
+import unittest
+from unittest import mock
+
+import requests
+
+from local_registry import LocalRegistry
+from tno.aimms_adapter.registry import RegistryClient
+
+
+class RegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.registry = LocalRegistry()
+        self.registry.start()
+        self.addCleanup(self.registry.stop)
+        self.capacity = {"running_runs": 1, "max_concurrent_runs": 2, "queue_length": 3, "average_run_duration": 4.5}
+        self.client = RegistryClient(self.registry.endpoint, capacity=lambda: dict(self.capacity),
+                                     update_url=self.registry.update_url)
+
+    def methods(self):
+        return [method for method, _ in self.registry.requests]
+
+    def test_heartbeat_updates_load(self):
+        with mock.patch.dict(os.environ, {"EXTERNAL_URL": "http://adapter:9300"}):
+            self.client.heartbeat()
+            self.capacity["queue_length"] = 0
+            self.client.heartbeat()
+        self.assertEqual(self.methods(), ["POST", "PUT"])
+        registration = self.registry.registrations[self.client.registration_id]
+        self.assertEqual(registration["uri"], "http://adapter:9300")
+        self.assertEqual((registration["used_workers"], registration["max_workers"]), (1, 2))
+        self.assertEqual((registration["queue_length"], registration["average_run_duration"]), (0, 4.5))
+
+    def test_registers_again_after_registry_restart(self):
+        self.client.heartbeat()
+        self.registry.restart()
+        self.client.heartbeat()
+        self.assertEqual(self.methods(), ["POST", "PUT", "POST"])
+        self.assertEqual(list(self.registry.registrations), [self.client.registration_id])
+
+    def test_registers_once_without_id(self):
+        self.registry.reply_id = False
+        for _ in range(3):
+            self.client.heartbeat()
+        self.assertEqual(self.methods(), ["POST"])
+        self.assertEqual(len(self.registry.registrations), 1)
+
+    def test_registers_once_without_update_url(self):
+        client = RegistryClient(self.registry.endpoint, capacity=lambda: dict(self.capacity), update_url="")
+        for _ in range(3):
+            client.heartbeat()
+        self.assertEqual(self.methods(), ["POST"])
+
+    def test_registration_retried_after_failure(self):
+        self.registry.stop()
+        with mock.patch.dict(os.environ, {"REGISTRY_TIMEOUT": "1"}), self.assertRaises(requests.exceptions.RequestException):
+            self.client.heartbeat()
+        self.assertFalse(self.client.registered)
+        self.registry = LocalRegistry()
+        self.registry.start()
+        self.addCleanup(self.registry.stop)
+        self.client.endpoint = self.registry.endpoint
+        self.client.heartbeat()
+        self.client.heartbeat()
+        self.assertEqual(self.methods(), ["POST", "PUT"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import tempfile
+import unittest
+
+from tno.aimms_adapter.model.result_cache import ResultCache
+
+
+class ResultCacheTestCase(unittest.TestCase):
+    def test_hit_and_miss(self):
+        cache = ResultCache(folder=tempfile.mkdtemp(), max_bytes=1000)
+        key = cache.key("<esdl 1/>", "<esdl 2/>", "db checksum", "Optiedocument.aimms", "default_setup")
+        self.assertIsNone(cache.get_bytes(key))
+        cache.put_bytes(key, b"<output/>")
+        self.assertEqual(cache.get_bytes(key), b"<output/>")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertNotEqual(key, cache.key("<esdl 1/><esdl 2/>", "", "db checksum", "Optiedocument.aimms",
+                                           "default_setup"))
+
+    def test_least_recently_used_is_evicted(self):
+        folder = tempfile.mkdtemp()
+        cache = ResultCache(folder=folder, max_bytes=25)
+        cache.put_bytes("a", b"x" * 10)
+        cache.put_bytes("b", b"x" * 10)
+        cache.get_bytes("a")
+        cache.put_bytes("c", b"x" * 10)
+        self.assertIsNotNone(cache.get_bytes("a"))
+        self.assertIsNone(cache.get_bytes("b"))
+
+        reloaded = ResultCache(folder=folder, max_bytes=25)
+        self.assertEqual(reloaded.stats()["entries"], 2)
+
+    def test_disabled(self):
+        cache = ResultCache(folder=tempfile.mkdtemp(), max_bytes=0)
+        cache.put_bytes("a", b"<output/>")
+        self.assertIsNone(cache.get_bytes("a"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import Future
+
+from tno.aimms_adapter.model.run_control import RunCancelled, RunControl
+
+SLEEP = [sys.executable, "-c", "import time; time.sleep(30)"]
+
+
+class RunControlTestCase(unittest.TestCase):
+    def test_cancel_kills_process(self):
+        control = RunControl("run")
+        threading.Timer(0.5, control.cancel, ["CANCELLED: by request"]).start()
+        start = time.monotonic()
+        with self.assertRaises(RunCancelled) as cm:
+            control.run_process(SLEEP)
+        self.assertEqual(cm.exception.reason, "CANCELLED: by request")
+        self.assertLess(time.monotonic() - start, 10)
+
+    def test_stage_timeout(self):
+        control = RunControl("run")
+        control.begin_stage("solve", timeout=0.5)
+        with self.assertRaises(RunCancelled) as cm:
+            control.run_process(SLEEP)
+        self.assertTrue(cm.exception.reason.startswith("TIMEOUT: stage 'solve'"))
+
+    def test_run_timeout_checked_at_next_stage(self):
+        control = RunControl("run", timeout=0.1)
+        control.begin_stage("parse")
+        time.sleep(0.2)
+        control.end_stage()  # not started yet, waiting doesn't count
+        control.start()
+        time.sleep(0.2)
+        with self.assertRaises(RunCancelled) as cm:
+            control.begin_stage("import")
+        self.assertTrue(cm.exception.reason.startswith("TIMEOUT: model run"))
+
+    def test_completed_process(self):
+        control = RunControl("run", timeout=30)
+        result = control.run_process([sys.executable, "-c", "print('done')"])
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stdout.strip(), "done")
+
+    def test_result_stops_waiting_at_stage_timeout(self):
+        control = RunControl("run")
+        control.begin_stage("parse", timeout=0.5)
+        start = time.monotonic()
+        with self.assertRaises(RunCancelled) as cm:
+            control.result(Future())  # never completes
+        self.assertTrue(cm.exception.reason.startswith("TIMEOUT: stage 'parse'"))
+        self.assertLess(time.monotonic() - start, 5)
+
+    def test_result_stops_waiting_when_cancelled(self):
+        control = RunControl("run")
+        threading.Timer(0.2, control.cancel, ["CANCELLED: by request"]).start()
+        with self.assertRaises(RunCancelled):
+            control.result(Future())
+        future = Future()
+        future.set_result("parsed")
+        self.assertEqual(RunControl("other").result(future), "parsed")
+
+
+
+if __name__ == '__main__':
+    unittest.main()
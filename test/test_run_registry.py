@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+from tno.aimms_adapter.data_types import ModelRun, ModelState, OperaAdapterConfig
+from tno.aimms_adapter.model.run_registry import RunRegistry
+
+
+class RunRegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.database = os.path.join(tempfile.mkdtemp(), "runs.sqlite")
+
+    def test_runs_survive_restart(self):
+        registry = RunRegistry(self.database)
+        config = OperaAdapterConfig(input_esdl_file_path_1="bucket/in1.esdl", input_esdl_file_path_2="bucket/in2.esdl",
+                                    output_esdl_file_path="bucket/out.esdl")
+        registry.add("done", ModelRun(state=ModelState.ACCEPTED, config=None, result=None))
+        registry.update("done", state=ModelState.SUCCEEDED, config=config, result={"path": "bucket/out.esdl"})
+        registry.add("running", ModelRun(state=ModelState.RUNNING, config=config, result=None))
+
+        registry = RunRegistry(self.database)
+        self.assertEqual(registry.state("done"), ModelState.SUCCEEDED)
+        self.assertEqual(registry.get("done").config, config)
+        self.assertIsNone(registry.get("done").result)
+        self.assertEqual(registry.result("done"), {"path": "bucket/out.esdl"})
+        self.assertEqual(registry.state("running"), ModelState.ERROR)
+        self.assertIsNotNone(registry.get("running").reason)
+
+    def test_evict_oldest_finished_runs(self):
+        registry = RunRegistry(self.database, max_finished_runs=2)
+        for model_run_id in ["a", "b", "c"]:
+            registry.add(model_run_id, ModelRun(state=ModelState.ACCEPTED, config=None, result=None))
+            registry.update(model_run_id, state=ModelState.SUCCEEDED)
+        registry.add("d", ModelRun(state=ModelState.READY, config=None, result=None))
+
+        self.assertEqual(registry.evict(), ["a"])
+        self.assertNotIn("a", registry)
+        self.assertEqual(len(registry), 3)
+
+    def test_evict_expired_runs(self):
+        registry = RunRegistry(self.database, ttl=0)
+        registry.add("a", ModelRun(state=ModelState.ERROR, config=None, result=None))
+        registry.update("a", state=ModelState.ERROR)
+        registry.add("b", ModelRun(state=ModelState.QUEUED, config=None, result=None))
+
+        self.assertEqual(registry.evict(), ["a"])
+        self.assertEqual(registry.ids_in_state(ModelState.QUEUED), ["b"])
+
+    def test_evict_runs_that_never_started(self):
+        registry = RunRegistry(self.database, ttl=3600)
+        registry.add("ready", ModelRun(state=ModelState.READY, config=None, result=None))
+        registry.add("accepted", ModelRun(state=ModelState.ACCEPTED, config=None, result=None))
+        self.assertEqual(registry.evict(), [])
+
+        registry.ttl = 0
+        self.assertEqual(sorted(registry.evict()), ["accepted", "ready"])
+        self.assertEqual(len(registry), 0)
+
+    def test_started_when_stamped(self):
+        registry = RunRegistry(self.database)
+        registry.add("a", ModelRun(state=ModelState.ACCEPTED, config=None, result=None))
+        registry.update("a", state=ModelState.RUNNING)
+        registry.update("a", state=ModelState.QUEUED)
+        self.assertIsNone(registry.get("a").started)  # queued, not started yet
+
+        registry.update("a", state=ModelState.RUNNING, started=True)
+        started = registry.get("a").started
+        self.assertIsNotNone(started)
+        registry.update("a", started=True)
+        self.assertEqual(registry.get("a").started, started)  # only the first start counts
+        self.assertEqual(RunRegistry(self.database).get("a").started, started)  # stored
+
+
+if __name__ == '__main__':
+    unittest.main()
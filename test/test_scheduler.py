@@ -0,0 +1,55 @@
+import threading
+import unittest
+
+from tno.aimms_adapter.model.scheduler import RunScheduler
+
+
+class RunSchedulerTestCase(unittest.TestCase):
+    def test_fifo_promotion(self):
+        scheduler = RunScheduler(max_concurrent_runs=2)
+        release = threading.Event()
+        started = []
+
+        def job(run_id):
+            started.append(run_id)
+            release.wait(5)
+            return run_id
+
+        self.assertIsNone(scheduler.submit("a", job, "a"))
+        self.assertIsNone(scheduler.submit("b", job, "b"))
+        self.assertEqual(scheduler.submit("c", job, "c"), 1)
+        self.assertEqual(scheduler.submit("d", job, "d"), 2)
+        self.assertFalse(scheduler.future("c").running())
+        self.assertEqual(scheduler.running_count, 2)
+
+        release.set()
+        self.assertEqual(scheduler.future("a").result(5), "a")
+        for run_id in ["c", "d"]:
+            self.assertEqual(scheduler.future(run_id).result(5), run_id)
+        self.assertEqual(started[2:], ["c", "d"])
+        self.assertEqual(scheduler.queue_length, 0)
+
+    def test_discard_queued_run(self):
+        scheduler = RunScheduler(max_concurrent_runs=1)
+        release = threading.Event()
+        scheduler.submit("a", release.wait, 5)
+        scheduler.submit("b", release.wait, 5)
+        scheduler.submit("c", release.wait, 5)
+        future = scheduler.future("b")
+        scheduler.discard("b")
+        self.assertTrue(future.cancelled())
+        self.assertEqual(scheduler.queue_position("c"), 1)
+        release.set()
+
+    def test_average_run_duration(self):
+        scheduler = RunScheduler(max_concurrent_runs=1, duration_window=2)
+        self.assertIsNone(scheduler.average_run_duration)
+        for _ in range(3):
+            scheduler.submit("run", lambda: None)
+            scheduler.future("run").result(5)
+        self.assertIsNotNone(scheduler.average_run_duration)
+        self.assertEqual(len(scheduler._durations), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
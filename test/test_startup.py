@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from time import monotonic
+
+from tno.aimms_adapter.startup import BackgroundTask
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ['pandas', 'esdl', 'pyodbc', 'sqlalchemy', 'minio']
+
+
+def cold_import(module: str) -> subprocess.CompletedProcess:
+    """Imports a module in a fresh interpreter, prints the import time and which heavy modules were imported"""
+    code = (f"import sys, time; start = time.perf_counter(); import {module}; "
+            f"print(time.perf_counter() - start); print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    with tempfile.TemporaryDirectory() as folder:
+        # the adapter creates its run registry and caches on import, they go in a temporary folder
+        env = dict(os.environ, MINIO_ENDPOINT="", REGISTRY_ENDPOINT="", WARM_UP="false",
+                   PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])),
+                   RUN_REGISTRY_DATABASE=os.path.join(folder, "run_registry.sqlite"),
+                   RESULT_CACHE_FOLDER=os.path.join(folder, "result_cache"),
+                   OBJECT_CACHE_FOLDER=os.path.join(folder, "object_cache"))
+        return subprocess.run([sys.executable, "-c", code], cwd=folder, env=env, stdout=subprocess.PIPE, text=True,
+                              check=True)
+
+
+class StartupTestCase(unittest.TestCase):
+    def test_model_api_imports_no_heavy_modules(self):
+        _, heavy = cold_import("tno.aimms_adapter.apis.model_api").stdout.splitlines()[-2:]
+        self.assertEqual(heavy, "")
+
+    def test_background_task_retries(self):
+        attempts = []
+
+        def connect():
+            attempts.append(monotonic())
+            if len(attempts) < 3:
+                raise ConnectionError("not yet")
+
+        task = BackgroundTask("test", connect, retry_interval=0.01)
+        task.start()
+        self.assertTrue(task.wait(5))
+        self.assertEqual((task.state, task.attempts), ("ready", 3))
+
+
+if __name__ == '__main__':
+    # import-time benchmark: python test/test_startup.py benchmark
+    if sys.argv[1:] == ["benchmark"]:
+        for module in ["tno.aimms_adapter.apis.model_api", "tno.aimms_adapter.main"]:
+            times = sorted(float(cold_import(module).stdout.splitlines()[-2]) for _ in range(5))
+            print(f"{module}: median cold import {times[2] * 1000:.0f} ms")
+    else:
+        unittest.main()
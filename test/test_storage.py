@@ -0,0 +1,131 @@
+import gzip
+import importlib.util
+import os
+import tempfile
+import unittest
+from io import BytesIO
+from types import SimpleNamespace
+
+from tno.aimms_adapter.model.object_cache import ObjectCache
+from tno.aimms_adapter.model.storage import MinioStorage, Storage
+
+
+class FakeResponse(BytesIO):
+    def __init__(self, data: bytes, etag: str):
+        super().__init__(data)
+        self.headers = {'ETag': f'"{etag}"'}
+        self.read_sizes = []
+
+    def read(self, size=-1):
+        self.read_sizes.append(size)
+        return super().read(size)
+
+    def release_conn(self):
+        pass
+
+
+class FakeMinio:
+    """Serves a single object with a fixed ETag"""
+
+    def __init__(self, data: bytes, etag: str = "etag-1"):
+        self.data = data
+        self.etag = etag
+        self.responses = []
+
+    def stat_object(self, bucket, name):
+        return SimpleNamespace(etag=self.etag, size=len(self.data))
+
+    def get_object(self, bucket, name):
+        self.responses.append(FakeResponse(self.data, self.etag))
+        return self.responses[-1]
+
+    def bucket_exists(self, bucket):
+        return True
+
+    def put_object(self, bucket, name, stream, length, part_size=0):
+        # reads an object of unknown length in parts, like the Minio client
+        self.length = length
+        self.data = b''.join(iter(lambda: stream.read(part_size), b''))
+
+
+class StorageTestCase(unittest.TestCase):
+    def test_file_backend(self):
+        storage = Storage()
+        path = 'file://' + os.path.join(tempfile.mkdtemp(), 'output.esdl')
+        storage.write(path, BytesIO(b"<esdl/>"))
+        self.assertEqual(storage.read(path), b"<esdl/>")
+        storage.write_bytes(path, b"")
+        self.assertEqual(storage.read(path), b"")
+
+    def test_memory_backend(self):
+        storage = Storage()
+        storage.write_bytes('memory://input.esdl', b"<esdl/>")
+        with storage.open('memory://input.esdl') as stream:
+            self.assertEqual(stream.read(), b"<esdl/>")
+        with self.assertRaises(FileNotFoundError):
+            storage.read('memory://missing.esdl')
+
+    def test_gzip_is_transparent(self):
+        storage = Storage()
+        storage.write_bytes('memory://output.esdl.gz', b"<esdl/>" * 100)
+        self.assertLess(len(storage.memory.files['memory://output.esdl.gz']), 700)
+        self.assertEqual(storage.read('memory://output.esdl.gz'), b"<esdl/>" * 100)
+
+    def test_compressed_while_written(self):
+        data = os.urandom(1024 * 1024) * 3  # several chunks
+        suffixes = ['.gz', '.zst'] if importlib.util.find_spec('zstandard') else ['.gz']
+        for suffix in suffixes:
+            minio = FakeMinio(b"")
+            storage = Storage(minio=MinioStorage(minio))
+            source = FakeResponse(data, "")
+            storage.write('bucket/output.esdl' + suffix, source)
+            self.assertEqual(minio.length, -1)
+            self.assertNotIn(-1, source.read_sizes)  # the source was never read all at once
+            self.assertEqual(storage.read('bucket/output.esdl' + suffix), data)
+            if suffix == '.gz':
+                self.assertEqual(gzip.decompress(minio.data), data)  # a standard gzip file
+
+    def test_copy_between_encodings(self):
+        storage = Storage()
+        storage.write_bytes('memory://output.esdl', b"<esdl/>")
+        storage.copy('memory://output.esdl', 'memory://copy.esdl.gz')
+        self.assertEqual(storage.read('memory://copy.esdl.gz'), b"<esdl/>")
+        self.assertIsNone(storage.presigned_url('memory://copy.esdl.gz', 60))
+
+    def test_minio_path_without_minio(self):
+        with self.assertRaises(IOError):
+            Storage().read('bucket/input.esdl')
+
+    def test_minio_streamed_through_cache(self):
+        data = b"<esdl/>" * 1000
+        client = FakeMinio(data)
+        minio = MinioStorage(client, ObjectCache(folder=tempfile.mkdtemp(), max_bytes=1024 * 1024))
+        with minio.open('esdl/input.esdl') as stream:
+            self.assertNotIsInstance(stream, BytesIO)  # read from the cache file
+            self.assertEqual(stream.read(), data)
+        self.assertTrue(all(size > 0 for size in client.responses[0].read_sizes))  # read in chunks
+        self.assertEqual(minio.read('esdl/input.esdl'), data)
+        self.assertEqual(len(client.responses), 1)  # the second read is served from the cache
+
+    def test_minio_larger_than_cache(self):
+        client = FakeMinio(b"<esdl/>" * 1000)
+        minio = MinioStorage(client, ObjectCache(folder=tempfile.mkdtemp(), max_bytes=100))
+        with minio.open('esdl/input.esdl') as stream:
+            self.assertIs(stream, client.responses[0])
+            self.assertEqual(stream.read(), client.data)
+
+    def test_version_changes_with_content(self):
+        storage = Storage(minio=MinioStorage(FakeMinio(b"<esdl/>", etag="etag-2")))
+        path = 'file://' + os.path.join(tempfile.mkdtemp(), 'input.esdl')
+        for stored in [path, 'memory://input.esdl']:
+            storage.write_bytes(stored, b"<esdl/>")
+            version = storage.version(stored)
+            storage.write_bytes(stored, b"<esdl/>")
+            self.assertEqual(storage.version(stored), version)
+            storage.write_bytes(stored, b"<esdl name='changed'/>")
+            self.assertNotEqual(storage.version(stored), version)
+        self.assertEqual(storage.version('esdl/input.esdl'), "etag-2")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,10 @@
-import requests
+import multiprocessing
+
 from flask import Flask
 from flask_cors import CORS
 
 from flask_dotenv import DotEnv
 from flask_smorest import Api
-from flask_executor import Executor
 
 from werkzeug.middleware.proxy_fix import ProxyFix
 
@@ -12,7 +12,6 @@ from tno.aimms_adapter.settings import EnvSettings
 
 api = Api()
 env = DotEnv()
-executor = Executor()
 
 
 def create_app(object_name):
@@ -24,6 +23,11 @@ def create_app(object_name):
         object_name: the python path of the config object,
                      e.g. influxdbgraphs.api.settings.ProdConfig
     """
+    if multiprocessing.current_process().name != "MainProcess":
+        # a worker process of the ESDL parser pool that imports the main module again, as spawned processes do on
+        # Windows. It doesn't serve requests, and must not open the run registry or start any background tasks
+        return Flask(__name__)
+
     from tno.shared.log import get_logger
 
     logger = get_logger(__name__)
@@ -35,7 +39,6 @@ def create_app(object_name):
 
     env.init_app(app, env_file=".env")
     api.init_app(app)
-    executor.init_app(app)
 
     # Register blueprints.
     from tno.aimms_adapter.apis.status import api as status_api
@@ -46,19 +49,23 @@ def create_app(object_name):
 
     CORS(app, resources={r"/*": {"origins": "*"}})
 
+    # the app doesn't wait for these, /status/ready reports when they have finished
+    from tno.aimms_adapter.startup import startup
+    if EnvSettings.warm_up():
+        from tno.aimms_adapter.model.opera import Opera
+        startup.add("warm_up", Opera.warm_up, required=False)
+
+    # checked periodically in the background, /status/ready and /status/capacity report the last outcome
+    from tno.aimms_adapter.probes import probes, probe_aimms_binary, probe_clean_database
+    probes.add("clean_database", probe_clean_database)
+    probes.add("aimms_binary", probe_aimms_binary)
+
     if EnvSettings.registry_endpoint():
-        logger.info(f"Registering with MM Registry at {EnvSettings.registry_endpoint()}")
-
-        # Register adapter to MM Registry
-        registry_data = {"uri": EnvSettings.external_url(), "used_workers": 0, "name": "OPERA",
-                         "owner": "TNO", "version": "1.0", "max_workers": 1}
-
-        try:
-            r = requests.post(EnvSettings.registry_endpoint(), json=registry_data)
-            r.raise_for_status()
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to register this adapter: {e}")
-            print(e.response.text)
+        # Register adapter to MM Registry and keep its load figures up to date, retried until the registry is reachable
+        from tno.aimms_adapter.apis.model_api import opera
+        from tno.aimms_adapter.registry import RegistryClient
+        registry = RegistryClient(EnvSettings.registry_endpoint(), capacity=opera.capacity)
+        probes.add("registry", registry.heartbeat, interval=EnvSettings.registry_heartbeat_interval(), required=False)
 
     logger.info("Finished setting up app.")
 
@@ -0,0 +1,95 @@
+import os
+import zlib
+from typing import BinaryIO, Callable, ContextManager, Optional
+
+from flask import Response, redirect, request, send_file, stream_with_context
+from flask_smorest import abort
+
+from tno.aimms_adapter.model.compression import content_encoding, decompressing
+from tno.aimms_adapter.model.storage import FileStorage, Storage
+from tno.aimms_adapter.settings import EnvSettings
+
+CHUNK_SIZE = 64 * 1024
+MIMETYPE = 'application/xml'
+
+
+def send_result(storage: Storage, path: str) -> Response:
+    """
+    Sends a stored output ESDL in chunks, so memory use doesn't depend on its size. Local files support
+    ETag/If-None-Match and range requests, and are sent gzip encoded to clients that accept it. Objects in Minio are
+    downloaded from a presigned URL instead.
+    """
+    encoding = content_encoding(path)
+    accepts_gzip = request.accept_encodings['gzip'] > 0
+    if path[:7] != 'file://':
+        url = storage.presigned_url(path, EnvSettings.presigned_url_expiry())
+        if url:
+            return redirect(url)
+        response = stream_response(lambda: storage.backend(path).open(path), encoding, accepts_gzip)
+        response.vary.add('Accept-Encoding')
+        return response
+
+    filename = os.path.abspath(FileStorage.filename(path))
+    if not os.path.isfile(filename):
+        abort(404, message=f"Output ESDL {path} not found")
+    stat = os.stat(filename)
+    etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+    if encoding == 'gzip' and accepts_gzip:
+        # sent as stored, ranges are ranges of the compressed file
+        etag, send_stored = etag + '-gzip', True
+    elif encoding is None and (not accepts_gzip or request.range is not None):
+        send_stored = True
+    else:
+        # encoded while it is sent, which is not possible for a range of the file
+        etag, send_stored = etag + ('-gzip' if accepts_gzip else ''), False
+    # checked before the range, a client that has the current file doesn't get a part of it
+    response = not_modified(etag)
+    if response is None and send_stored:
+        response = send_file(filename, mimetype=MIMETYPE, conditional=True, etag=etag)
+        if encoding == 'gzip':
+            response.headers['Content-Encoding'] = 'gzip'
+    elif response is None:
+        response = stream_response(lambda: open(filename, 'rb'), encoding, accepts_gzip, etag=etag)
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def not_modified(etag: str) -> Optional[Response]:
+    """A 304 response when the If-None-Match header of the request matches etag, else None"""
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def stream_response(open_stream: Callable[[], ContextManager[BinaryIO]], encoding: Optional[str], gzip_output: bool,
+                    etag: Optional[str] = None) -> Response:
+    """
+    Streams a file that is stored with the given encoding (None, 'gzip' or 'zstd'), gzip encoded when gzip_output is
+    set. With an etag, a request with a matching If-None-Match is answered with 304 without opening the file.
+    """
+    response = not_modified(etag) if etag else None
+    if response is not None:
+        return response
+    passthrough = encoding is None and not gzip_output or encoding == 'gzip' and gzip_output
+
+    def chunks():
+        with open_stream() as stream:
+            if passthrough:
+                yield from iter(lambda: stream.read(CHUNK_SIZE), b'')
+                return
+            with (decompressing(stream, encoding) if encoding else stream) as decoded:
+                compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip_output else None  # 31: gzip header
+                for chunk in iter(lambda: decoded.read(CHUNK_SIZE), b''):
+                    yield compressor.compress(chunk) if compressor else chunk
+                if compressor:
+                    yield compressor.flush()
+
+    response = Response(stream_with_context(chunks()), mimetype=MIMETYPE)
+    if gzip_output:
+        response.headers['Content-Encoding'] = 'gzip'
+    if etag:
+        # not made conditional by werkzeug, that would read the whole stream to get its length
+        response.set_etag(etag)
+    return response
@@ -1,13 +1,20 @@
-from flask import jsonify
-from flask_smorest import Blueprint
+import dataclasses
+import json
+import re
+
+from flask import jsonify, Response, stream_with_context
+from flask_smorest import Blueprint, abort
 from flask.views import MethodView
+from marshmallow import Schema, fields
 
 import sys
 sys.path.append("../opera-model-adapter")
 
+from tno.aimms_adapter.apis.download import send_result
 from tno.aimms_adapter.model.opera import Opera
+from tno.aimms_adapter.settings import EnvSettings
 from tno.shared.log import get_logger
-from tno.aimms_adapter.data_types import ModelRunInfo, OperaAdapterConfig
+from tno.aimms_adapter.data_types import ModelRunInfo, OperaAdapterConfig, BatchRunRequest, BatchStatusRequest
 
 opera = Opera()
 
@@ -16,6 +23,20 @@ logger = get_logger(__name__)
 api = Blueprint("model", "model", url_prefix="/model")
 
 
+class StatusQuerySchema(Schema):
+    wait = fields.String(load_default=None, metadata={
+        "description": "Wait at most this long for a state change before answering, e.g. '30s', '500ms' or '2m'"})
+
+
+def parse_wait(value: str) -> float:
+    """Converts a wait duration like '30s', '500ms', '2m' or '30' (seconds) to seconds"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*(ms|s|m)?\s*", value)
+    if not match:
+        abort(400, message=f"Invalid wait duration: {value}")
+    seconds = float(match.group(1)) * {"ms": 0.001, "s": 1, "m": 60, None: 1}[match.group(2)]
+    return min(seconds, EnvSettings.status_max_wait())
+
+
 @api.route("/request")
 class Request(MethodView):
 
@@ -47,9 +68,61 @@ class Run(MethodView):
 @api.route("/status/<model_run_id>")
 class Status(MethodView):
 
+    @api.arguments(StatusQuerySchema, location="query")
+    @api.response(200, ModelRunInfo.Schema())
+    def get(self, query, model_run_id: str):
+        if query["wait"]:
+            res = opera.wait_for_state_change(model_run_id=model_run_id, timeout=parse_wait(query["wait"]))
+        else:
+            res = opera.status(model_run_id=model_run_id)
+        return jsonify(res)
+
+
+@api.route("/events/<model_run_id>")
+class Events(MethodView):
+
+    @api.response(200, description="Server-Sent Events stream with a ModelRunInfo for every state or progress change")
+    def get(self, model_run_id: str):
+        def stream():
+            for info in opera.run_events(model_run_id, keep_alive=EnvSettings.event_keep_alive()):
+                if info is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"event: status\ndata: {json.dumps(dataclasses.asdict(info))}\n\n"
+
+        return Response(stream_with_context(stream()), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@api.route("/batch")
+class Batch(MethodView):
+
+    @api.arguments(BatchRunRequest.Schema())
+    @api.response(201, ModelRunInfo.Schema(many=True))
+    def post(self, batch: BatchRunRequest):
+        try:
+            res = opera.run_batch(configs=batch.configs)
+        except ValueError as e:
+            abort(400, message=str(e))
+        return jsonify(res), 201
+
+
+@api.route("/batch/status")
+class BatchStatus(MethodView):
+
+    @api.arguments(BatchStatusRequest.Schema())
+    @api.response(200, ModelRunInfo.Schema(many=True))
+    def post(self, query: BatchStatusRequest):
+        res = [opera.status(model_run_id=model_run_id) for model_run_id in query.model_run_ids]
+        return jsonify(res)
+
+
+@api.route("/cancel/<model_run_id>")
+class Cancel(MethodView):
+
     @api.response(200, ModelRunInfo.Schema())
     def get(self, model_run_id: str):
-        res = opera.status(model_run_id=model_run_id)
+        res = opera.cancel(model_run_id=model_run_id)
         return jsonify(res)
 
 
@@ -62,6 +135,27 @@ class Results(MethodView):
         return jsonify(res)
 
 
+@api.route("/download/<model_run_id>")
+class Download(MethodView):
+
+    @api.response(200, description="The output ESDL, streamed in chunks. Supports If-None-Match and Range")
+    def get(self, model_run_id: str):
+        path = opera.result_path(model_run_id=model_run_id)
+        if path is None:
+            abort(404, message="Model run unknown, not finished or without an output ESDL")
+        return send_result(opera.storage, path)
+
+
+@api.route("/cache/stats")
+class CacheStats(MethodView):
+
+    def get(self):
+        return jsonify({
+            "results": opera.result_cache.stats(),
+            "objects": opera.object_cache.stats(),
+        })
+
+
 @api.route("/remove/<model_run_id>")
 class Remove(MethodView):
 
@@ -1,5 +1,9 @@
+from flask import jsonify
 from flask_smorest import Blueprint
 from flask.views import MethodView
+
+from tno.aimms_adapter.probes import probes
+from tno.aimms_adapter.startup import startup
 from tno.shared.log import get_logger
 
 logger = get_logger(__name__)
@@ -11,3 +15,27 @@ api = Blueprint("status", "status", url_prefix="/status")
 class Status(MethodView):
     def get(self):
         return "OK!"
+
+
+@api.route("/ready")
+class Ready(MethodView):
+    def get(self):
+        """
+        Readiness of the adapter: 200 when all required backends are connected and no probe is failing, 503
+        otherwise. Only reports the cached outcome of the probes, it doesn't contact any backend itself.
+        """
+        info = startup.info()
+        info["ready"] = info["ready"] and not probes.failing
+        info["probes"] = probes.info()
+        return jsonify(info), 200 if info["ready"] else 503
+
+
+@api.route("/capacity")
+class Capacity(MethodView):
+    def get(self):
+        """Free solve slots, queue length, free workspace disk space and the cached probe results of the adapter"""
+        from tno.aimms_adapter.apis.model_api import opera
+        info = opera.capacity()
+        info["ready"] = startup.ready and not probes.failing
+        info["probes"] = probes.info()
+        return jsonify(info)
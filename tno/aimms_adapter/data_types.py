@@ -25,11 +25,27 @@ class OperaAdapterConfig:
     base_path: Optional[str] = None
 
 
+@dataclass
+class BatchRunRequest:
+    configs: List[OperaAdapterConfig]
+
+
+@dataclass
+class BatchStatusRequest:
+    model_run_ids: List[str]
+
+
 @dataclass
 class ModelRun:
     state: ModelState
     config: OperaAdapterConfig
     result: dict
+    reason: Optional[str] = None
+    progress: Optional[float] = None
+    stage: Optional[str] = None
+    created: Optional[float] = None
+    started: Optional[float] = None
+    finished: Optional[float] = None
 
 
 @dataclass(order=True)
@@ -38,6 +54,10 @@ class ModelRunInfo:
     state: ModelState = field(default=ModelState.UNKNOWN)
     result: Optional[Dict[str, Any]] = None
     reason: Optional[str] = None
+    queue_position: Optional[int] = None
+    progress: Optional[float] = None
+    stage: Optional[str] = None
+    timings: Optional[Dict[str, float]] = None
 
     # support for Schema generation in Marshmallow
     Schema: ClassVar[Type[Schema]] = Schema # type: ignore
@@ -0,0 +1,81 @@
+import gzip
+import io
+from typing import BinaryIO, Optional
+
+CHUNK_SIZE = 1024 * 1024
+
+SUFFIXES = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+
+
+def content_encoding(path: str) -> Optional[str]:
+    """The compression of a file by its suffix, e.g. 'gzip' for input.esdl.gz, None for an uncompressed file"""
+    for encoding, suffix in SUFFIXES.items():
+        if path.endswith(suffix):
+            return encoding
+    return None
+
+
+def with_encoding(path: str, encoding: Optional[str]) -> str:
+    """Adds the suffix of the compression to a path, unless the path already has a compression suffix"""
+    if not encoding or content_encoding(path) is not None:
+        return path
+    if encoding not in SUFFIXES:
+        raise ValueError(f"Unknown compression {encoding}, use one of {', '.join(SUFFIXES)}")
+    return path + SUFFIXES[encoding]
+
+
+def decompressing(stream: BinaryIO, encoding: str) -> BinaryIO:
+    """Wraps a stream in a stream that decompresses it while it is read"""
+    if encoding == 'gzip':
+        return gzip.GzipFile(fileobj=stream, mode='rb')
+    if encoding == 'zstd':
+        return _zstandard().ZstdDecompressor().stream_reader(stream, closefd=False)
+    raise ValueError(f"Unknown compression {encoding}")
+
+
+def compressing(stream: BinaryIO, encoding: str) -> BinaryIO:
+    """Wraps a stream in a stream that compresses it while it is read, one chunk at a time"""
+    if encoding == 'gzip':
+        return io.BufferedReader(_GzipReader(stream), buffer_size=CHUNK_SIZE)
+    if encoding == 'zstd':
+        return _zstandard().ZstdCompressor(level=3).stream_reader(stream, closefd=False)
+    raise ValueError(f"Unknown compression {encoding}")
+
+
+class _GzipReader(io.RawIOBase):
+    """Reads a stream and gives it gzip compressed, only the compressed bytes that are not read yet are held"""
+
+    def __init__(self, source: BinaryIO):
+        self._source = source
+        self._compressed = io.BytesIO()
+        self._writer = gzip.GzipFile(fileobj=self._compressed, mode='wb', compresslevel=6)
+        self._pending = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending and not self._writer.closed:
+            chunk = self._source.read(CHUNK_SIZE)
+            if chunk:
+                self._writer.write(chunk)
+            else:
+                self._writer.close()  # writes the gzip trailer
+            self._pending = self._compressed.getvalue()
+            self._compressed.seek(0)
+            self._compressed.truncate()
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise IOError("The zstandard package is needed for .zst files, install it with 'pip install zstandard'")
+    return zstandard
@@ -0,0 +1,36 @@
+import threading
+from typing import Dict
+
+
+class RunEvents:
+    """
+    Notifies waiting threads when the state or progress of a model run changes. Every change increases the version
+    of the run, so a waiter can tell whether it missed a change between two waits.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._versions: Dict[str, int] = {}
+
+    def notify(self, model_run_id: str):
+        with self._condition:
+            self._versions[model_run_id] = self._versions.get(model_run_id, 0) + 1
+            self._condition.notify_all()
+
+    def forget(self, model_run_id: str):
+        """Wakes up the waiters of a removed model run and stops tracking it"""
+        with self._condition:
+            self._versions.pop(model_run_id, None)
+            self._condition.notify_all()
+
+    def version(self, model_run_id: str) -> int:
+        return self._versions.get(model_run_id, 0)
+
+    def wait(self, model_run_id: str, version: int, timeout: float) -> int:
+        """
+        Blocks until the version of the model run differs from the given version, or until the timeout expires
+        :return: the current version of the model run
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._versions.get(model_run_id, 0) != version, timeout)
+            return self._versions.get(model_run_id, 0)
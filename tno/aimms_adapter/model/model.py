@@ -1,57 +1,100 @@
+import os
 from abc import ABC, abstractmethod
-from io import BytesIO
-from typing import Dict
+from time import monotonic, time
+from typing import TYPE_CHECKING, Iterator, Optional, Union
 from uuid import uuid4
 
-from minio import Minio
-
+from tno.aimms_adapter.model.compression import content_encoding, with_encoding
+from tno.aimms_adapter.model.events import RunEvents
+from tno.aimms_adapter.model.object_cache import ObjectCache
+from tno.aimms_adapter.model.run_registry import FINISHED_STATES, RunRegistry
+from tno.aimms_adapter.model.scheduler import RunScheduler
+from tno.aimms_adapter.model.storage import MinioStorage, Storage
 from tno.aimms_adapter.settings import EnvSettings
+from tno.aimms_adapter.probes import probes
+from tno.aimms_adapter.startup import startup
 from tno.aimms_adapter.data_types import ModelRun, ModelState, ModelRunInfo
 from tno.shared.log import get_logger
 
+if TYPE_CHECKING:
+    import urllib3
+
 logger = get_logger(__name__)
 
 
+def minio_http_client() -> "urllib3.PoolManager":
+    """Connection pool shared by all Minio requests of the adapter, sized and timed by the MINIO_* settings"""
+    import certifi
+    import urllib3
+    return urllib3.PoolManager(
+        maxsize=EnvSettings.minio_pool_size(),
+        block=True,  # waits for a free connection instead of opening connections outside of the pool
+        timeout=urllib3.Timeout(connect=EnvSettings.minio_connect_timeout(), read=EnvSettings.minio_read_timeout()),
+        cert_reqs='CERT_REQUIRED',
+        ca_certs=os.environ.get('SSL_CERT_FILE') or certifi.where(),
+        retries=urllib3.Retry(
+            total=EnvSettings.minio_retries(),
+            backoff_factor=0.2,
+            status_forcelist=[500, 502, 503, 504]
+        )
+    )
+
+
 class Model(ABC):
     def __init__(self):
-        self.model_run_dict: Dict[str, ModelRun] = {}
+        self.events = RunEvents()
+        self.runs = RunRegistry(database=EnvSettings.run_registry_database(),
+                                ttl=EnvSettings.run_ttl(),
+                                max_finished_runs=EnvSettings.max_finished_runs(),
+                                on_change=self.events.notify)
+        self.scheduler = RunScheduler(max_concurrent_runs=EnvSettings.max_concurrent_runs())
 
+        self.object_cache = ObjectCache(folder=EnvSettings.object_cache_folder(),
+                                        max_bytes=EnvSettings.object_cache_max_bytes())
         self.minio_client = None
         if EnvSettings.minio_endpoint():
             logger.info(f"Connecting to Minio Object Store at {EnvSettings.minio_endpoint()}")
+            from minio import Minio  # only imported when Minio is used
             self.minio_client = Minio(
                 endpoint=EnvSettings.minio_endpoint(),
                 secure=EnvSettings.minio_secure(),
                 access_key=EnvSettings.minio_access_key(),
-                secret_key=EnvSettings.minio_secret_key()
+                secret_key=EnvSettings.minio_secret_key(),
+                http_client=minio_http_client()
             )
-            buckets = self.minio_client.list_buckets()
-
-            for bucket in buckets:
-                logger.info(f" - Bucket: {bucket.name}, created {bucket.creation_date}")
-
+            # checked in the background, so an unreachable Minio doesn't delay or break startup
+            startup.add("minio", self.connect_minio)
+            probes.add("minio", self.minio_client.list_buckets)
         else:
             logger.info("No Minio Object Store configured")
+        # all ESDL files are read and written through the storage layer
+        self.storage = Storage(minio=MinioStorage(self.minio_client, self.object_cache) if self.minio_client else None)
+
+    def connect_minio(self):
+        buckets = self.minio_client.list_buckets()
+
+        for bucket in buckets:
+            logger.info(f" - Bucket: {bucket.name}, created {bucket.creation_date}")
 
     def request(self):
+        self.evict_runs()
         model_run_id = str(uuid4())
-        self.model_run_dict[model_run_id] = ModelRun(
+        self.runs.add(model_run_id, ModelRun(
             state=ModelState.ACCEPTED,
             config=None,
             result=None,
-        )
+        ))
 
         return ModelRunInfo(
-            state=self.model_run_dict[model_run_id].state,
+            state=self.runs.state(model_run_id),
             model_run_id=model_run_id,
         )
 
     def initialize(self, model_run_id: str, config=None):
-        if model_run_id in self.model_run_dict:
-            self.model_run_dict[model_run_id].config = config
-            self.model_run_dict[model_run_id].state = ModelState.READY
+        if model_run_id in self.runs:
+            self.runs.update(model_run_id, state=ModelState.READY, config=config)
             return ModelRunInfo(
-                state=self.model_run_dict[model_run_id].state,
+                state=self.runs.state(model_run_id),
                 model_run_id=model_run_id,
             )
         else:
@@ -61,53 +104,111 @@ class Model(ABC):
                 reason="Error in Model.initialize(): model_run_id unknown"
             )
 
-    def load_from_minio(self, path):
-        bucket = path.split("/")[0]
-        rest_of_path = "/".join(path.split("/")[1:])
-
-        response = self.minio_client.get_object(bucket, rest_of_path)
-        if response:
-            logger.info(f"Minio response: {response}")
-            return response.data
-        else:
-            logger.error(f"Failed to retrieve from Minio: bucket={bucket}, path={rest_of_path}")
-            return None
-
     @abstractmethod
     def process_results(self, result):
         pass
 
+    def release(self, model_run_id: str):
+        """Frees the resources of a model run that is removed or evicted, override in subclasses"""
+        pass
+
+    def progress(self, model_run_id: str, stage: str, progress: float):
+        logger.info(f"Model run {model_run_id}: {stage}")
+        self.runs.update(model_run_id, stage=stage, progress=progress)
+
+    def capacity(self) -> dict:
+        """Load of the adapter, so a load balancer can send model runs to the least-loaded adapter"""
+        running = self.scheduler.running_count
+        return {
+            "max_concurrent_runs": self.scheduler.max_concurrent_runs,
+            "running_runs": running,
+            "free_slots": max(0, self.scheduler.max_concurrent_runs - running),
+            "queue_length": self.scheduler.queue_length,
+            "average_run_duration": self.scheduler.average_run_duration,
+        }
+
+    def run_info(self, model_run_id: str) -> ModelRunInfo:
+        """Returns state, reason, progress and timings of a model run, without its result"""
+        run = self.runs.get(model_run_id)
+        if run is None:
+            return ModelRunInfo(
+                model_run_id=model_run_id,
+                state=ModelState.ERROR,
+                reason="Error in Model.run_info(): model_run_id unknown"
+            )
+        timings = {name: value for name, value in
+                   [("created", run.created), ("started", run.started), ("finished", run.finished)]
+                   if value is not None}
+        if run.started is not None:
+            timings["duration"] = (run.finished or time()) - run.started
+        return ModelRunInfo(
+            model_run_id=model_run_id,
+            state=run.state,
+            reason=run.reason,
+            progress=run.progress,
+            stage=run.stage,
+            timings=timings,
+            queue_position=self.scheduler.queue_position(model_run_id) if run.state == ModelState.QUEUED else None,
+        )
+
+    def wait_for_state_change(self, model_run_id: str, timeout: float) -> ModelRunInfo:
+        """Long-poll variant of run_info(): blocks until the state of the model run changes or the timeout expires"""
+        state = self.runs.state(model_run_id)
+        deadline = monotonic() + timeout
+        version = self.events.version(model_run_id)
+        while state is not None and state not in FINISHED_STATES and self.runs.state(model_run_id) == state:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                break
+            version = self.events.wait(model_run_id, version, remaining)
+        return self.run_info(model_run_id)
+
+    def run_events(self, model_run_id: str, keep_alive: float) -> Iterator[Optional[ModelRunInfo]]:
+        """
+        Yields the run info of a model run each time its state or progress changes, until the run is finished or
+        removed. None is yielded when nothing changed for keep_alive seconds.
+        """
+        version = self.events.version(model_run_id)
+        while True:
+            info = self.run_info(model_run_id)
+            yield info
+            if model_run_id not in self.runs or info.state in FINISHED_STATES:
+                return
+            new_version = self.events.wait(model_run_id, version, keep_alive)
+            while new_version == version:
+                yield None
+                new_version = self.events.wait(model_run_id, version, keep_alive)
+            version = new_version
+
+    def evict_runs(self):
+        for model_run_id in self.runs.evict():
+            self.scheduler.discard(model_run_id)
+            self.release(model_run_id)
+            self.events.forget(model_run_id)
+
+    def write_result(self, model_run_id: str, esdl: Union[str, bytes]) -> dict:
+        """Writes an output ESDL to the output path of the run, returns the result that points to it"""
+        path = self.runs.get(model_run_id).config.output_esdl_file_path
+        path = with_encoding(path, EnvSettings.output_compression())
+        self.storage.write_bytes(path, esdl if isinstance(esdl, bytes) else bytes(esdl, 'utf8'))
+        return self.stored_result(path)
+
+    @staticmethod
+    def stored_result(path: str) -> dict:
+        result = {"path": path}
+        if content_encoding(path):
+            result["content_encoding"] = content_encoding(path)
+        return result
+
     def store_result(self, model_run_id: str, result):
-        if model_run_id in self.model_run_dict:
+        if model_run_id in self.runs:
             res = self.process_results(result)
             if res:
-                path = self.model_run_dict[model_run_id].config.output_esdl_file_path
-                if self.minio_client:
-                    content = BytesIO(bytes(res, 'utf8'))
-
-                    bucket = path.split("/")[0]
-                    rest_of_path = "/".join(path.split("/")[1:])
-
-                    if not self.minio_client.bucket_exists(bucket):
-                        self.minio_client.make_bucket(bucket)
-
-                    self.minio_client.put_object(bucket, rest_of_path, content, content.getbuffer().nbytes)
-                else:
-                    if path[:7] == 'file://': # local file
-                        filename = path[7:]
-                        logger.info("Writing result ESDL to disk: " + filename)
-                        with open(filename, 'w') as file:
-                            file.write(res)
-                    else:
-                        raise IOError("Don't know how to write file " + path)
-
-                self.model_run_dict[model_run_id].result = {
-                    "path": path
-                }
+                self.runs.update(model_run_id, result=self.write_result(model_run_id, res))
             else:
-                self.model_run_dict[model_run_id].result = {
+                self.runs.update(model_run_id, result={
                     "result": res
-                }
+                })
             return ModelRunInfo(
                 model_run_id=model_run_id,
                 state=ModelState.SUCCEEDED,
@@ -120,19 +221,19 @@ class Model(ABC):
             )
 
     def run(self, model_run_id: str):
-        if model_run_id in self.model_run_dict:
-            state = self.model_run_dict[model_run_id].state
+        if model_run_id in self.runs:
+            state = self.runs.state(model_run_id)
             if state != ModelState.READY:
                 res = ModelRunInfo(
-                    state=self.model_run_dict[model_run_id].state,
+                    state=state,
                     model_run_id=model_run_id,
                     reason="Error: Model is not in READY state"
                 )
                 return res
 
-            self.model_run_dict[model_run_id].state = ModelState.RUNNING
+            self.runs.update(model_run_id, state=ModelState.RUNNING)
             return ModelRunInfo(
-                state=self.model_run_dict[model_run_id].state,
+                state=self.runs.state(model_run_id),
                 model_run_id=model_run_id,
             )
         else:
@@ -143,14 +244,9 @@ class Model(ABC):
             )
 
     def status(self, model_run_id: str):
-        if model_run_id in self.model_run_dict:
-            # Dummy behaviour: Query status once, to let finish model
-            self.model_run_dict[model_run_id].state = ModelState.SUCCEEDED
-
-            return ModelRunInfo(
-                state=self.model_run_dict[model_run_id].state,
-                model_run_id=model_run_id,
-            )
+        if model_run_id in self.runs:
+            # only looks up the metadata of the run, the state is set by the run itself
+            return self.run_info(model_run_id)
         else:
             return ModelRunInfo(
                 model_run_id=model_run_id,
@@ -159,11 +255,18 @@ class Model(ABC):
             )
 
     def results(self, model_run_id: str):
-        if model_run_id in self.model_run_dict:
+        if model_run_id in self.runs:
+            result = self.runs.result(model_run_id)
+            if result and "path" in result and EnvSettings.result_handoff() == "presigned":
+                # the client downloads the output ESDL from object storage, the URL is only valid for a while
+                url = self.storage.presigned_url(result["path"], EnvSettings.presigned_url_expiry())
+                if url:
+                    result["url"] = url
             return ModelRunInfo(
-                state=self.model_run_dict[model_run_id].state,
+                state=self.runs.state(model_run_id),
                 model_run_id=model_run_id,
-                result=self.model_run_dict[model_run_id].result,
+                result=result,
+                reason=self.runs.get(model_run_id).reason,
             )
         else:
             return ModelRunInfo(
@@ -173,15 +276,11 @@ class Model(ABC):
             )
 
     def remove(self, model_run_id: str):
-        if model_run_id in self.model_run_dict:
-            del self.model_run_dict[model_run_id]
-            # check if models are in pending state and accept the first one we find.
-            if len(self.model_run_dict.keys()) > 0:
-                for m in self.model_run_dict.values():
-                    if m.state == ModelState.PENDING:
-                        m.state == ModelState.ACCEPTED
-                        break
-
+        if model_run_id in self.runs:
+            self.runs.remove(model_run_id)
+            self.scheduler.discard(model_run_id)
+            self.release(model_run_id)
+            self.events.forget(model_run_id)
 
             return ModelRunInfo(
                 model_run_id=model_run_id,
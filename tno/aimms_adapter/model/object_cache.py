@@ -0,0 +1,12 @@
+from tno.aimms_adapter.model.result_cache import DiskCache
+
+
+class ObjectCache(DiskCache):
+    """
+    Cache of objects downloaded from Minio. An entry is keyed by the ETag of the object, so after checking the
+    current ETag with a stat request an unchanged object is served from disk without downloading its body again.
+    """
+    suffix = '.object'
+
+    def object_key(self, bucket: str, name: str, etag: str) -> str:
+        return self.key(bucket, name, etag)
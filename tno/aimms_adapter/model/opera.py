@@ -1,142 +1,261 @@
 import base64
 import json
+import dataclasses
 import subprocess
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 from time import sleep
+from importlib import import_module
+from typing import Dict, List, Optional, Tuple
 from uuid import uuid4
 
-from minio import S3Error
-
+from tno.aimms_adapter.model.compression import with_encoding
 from tno.aimms_adapter.model.model import Model, ModelState
-from tno.aimms_adapter.model.opera_accessdb.opera_access_importer import OperaAccessImporter, copy_clean_access_database
-from tno.aimms_adapter.model.opera_accessdb.results_processor import OperaResultsProcessor
-from tno.aimms_adapter.model.opera_esdl_parser.esdl_parser import OperaESDLParser
+from tno.aimms_adapter.model.parse_workers import ParseWorkers
+from tno.aimms_adapter.model.result_cache import ResultCache, file_checksum
+from tno.aimms_adapter.model.run_control import RunCancelled, RunControl
+from tno.aimms_adapter.model.run_registry import FINISHED_STATES
+from tno.aimms_adapter.model.workspace import OperaWorkspace, workspace_disk_usage
 from tno.aimms_adapter.settings import EnvSettings
 from tno.aimms_adapter.data_types import ModelRunInfo, OperaAdapterConfig, ModelRun
-from tno.aimms_adapter import executor
 from tno.shared.log import get_logger
 
 logger = get_logger(__name__)
 
+# pull in pandas, pyesdl, sqlalchemy and pyodbc, so they are imported on first use or by Opera.warm_up()
+HEAVY_MODULES = [
+    "tno.aimms_adapter.model.opera_esdl_parser.esdl_parser",
+    "tno.aimms_adapter.model.opera_esdl_parser.esdl_io",
+    "tno.aimms_adapter.model.opera_accessdb.opera_access_importer",
+    "tno.aimms_adapter.model.opera_accessdb.results_processor",
+]
 
-class Opera(Model):
-    def request(self):
-
-        model_run_id = str(uuid4())
-        self.model_run_dict[model_run_id] = ModelRun(
-            state=ModelState.ACCEPTED,
-            config=None,
-            result=None,
-        )
-        if len(self.model_run_dict.keys()) > 1:
-            # there is already a model running
-            self.model_run_dict[model_run_id].state = ModelState.PENDING
-            return ModelRunInfo(
-                state=ModelState.PENDING,
-                reason="A model is already running",
-                model_run_id = model_run_id
-            )
 
-        return ModelRunInfo(
-            state=self.model_run_dict[model_run_id].state,
-            model_run_id=model_run_id,
-        )
+@dataclass
+class PreparedRun:
+    """A model run whose inputs are imported into the Opera database of its workspace, ready to be solved"""
+    workspace: Optional[OperaWorkspace] = None
+    input_esdl: Optional[bytes] = None  # the first input, the output ESDL is based on it
+    cache_key: Optional[str] = None
+    info: Optional[ModelRunInfo] = None  # set when the run already ended while preparing, e.g. a cached result
+
 
-    def start_aimms_model(self, config: OperaAdapterConfig, model_run_id):
+class Opera(Model):
+    def __init__(self):
+        super().__init__()
+        self._in_flight: Dict[str, str] = {}  # input fingerprint -> id of the queued or running model run
+        self._in_flight_lock = threading.RLock()
+        self._controls: Dict[str, RunControl] = {}  # model run id -> control of the prepared or running model run
+        # model run id -> future of its PreparedRun, for runs that are prepared ahead of their solve slot
+        self._prepared: Dict[str, Future] = {}
+        self._stage_lock = threading.RLock()
+        self._prepare_pool = ThreadPoolExecutor(max_workers=EnvSettings.prepare_workers(),
+                                                thread_name_prefix="model-prepare")
+        # every preparation fetches one of its inputs here, so it never waits for a free worker
+        self._fetch_pool = ThreadPoolExecutor(max_workers=EnvSettings.prepare_workers(),
+                                              thread_name_prefix="input-fetch")
+        self.parse_workers = ParseWorkers(processes=EnvSettings.parse_processes(),
+                                          threads=2 * EnvSettings.prepare_workers())
+        self._followers: Dict[str, Future] = {}  # model run id -> future of a run waiting for an identical run
+        self.result_cache = ResultCache(folder=EnvSettings.result_cache_folder(),
+                                        max_bytes=EnvSettings.result_cache_max_bytes())
+
+    @staticmethod
+    def warm_up():
+        for module in HEAVY_MODULES:
+            import_module(module)
+
+    def result_cache_key(self, input_esdl_1: bytes, input_esdl_2: bytes) -> Optional[str]:
+        """Hash of everything that determines the output of a run, or None if the result can't be cached"""
+        if not self.result_cache.enabled:
+            return None
+        try:
+            clean_db_checksum = file_checksum(EnvSettings.clean_access_database())
+        except OSError as e:
+            logger.warning(f"Can't checksum the clean Opera database, not using the result cache: {e}")
+            return None
+        return self.result_cache.key(input_esdl_1, input_esdl_2, clean_db_checksum,
+                                     EnvSettings.aimms_model_path(), EnvSettings.aimms_procedure())
+
+    def begin_stage(self, model_run_id: str, control: RunControl, stage: str, description: str, progress: float):
+        control.begin_stage(stage, EnvSettings.stage_timeout(stage))
+        self.progress(model_run_id, description, progress)
+
+    def initialize(self, model_run_id: str, config=None):
+        res = Model.initialize(self, model_run_id=model_run_id, config=config)
+        if res.state == ModelState.READY:
+            with self._stage_lock:
+                self.release(model_run_id)  # in case the run is initialized again
+                if len(self._prepared) < EnvSettings.prepare_workers():
+                    # the inputs are fetched, parsed and imported before /model/run is called
+                    self.stage(model_run_id, config)
+        return res
+
+    def stage_ahead(self):
+        """
+        Prepares the first PREPARE_WORKERS runs of the queue that are not prepared yet. Runs further back are
+        prepared when they move up, so the workspaces and inputs held in memory don't grow with the queue.
+        """
+        with self._stage_lock:
+            for model_run_id in self.scheduler.queued()[:EnvSettings.prepare_workers()]:
+                run = self.runs.get(model_run_id)
+                if model_run_id not in self._prepared and run is not None:
+                    self.stage(model_run_id, run.config)
+
+    def stage(self, model_run_id: str, config: OperaAdapterConfig) -> Future:
+        """
+        Prepares a model run in the prepare pool, which is separate from the solve slots of the scheduler. This way
+        the database of the next run is ready by the time AIMMS has finished solving the current one.
+        """
+        with self._stage_lock:
+            control = RunControl(model_run_id, timeout=EnvSettings.run_timeout())
+            self._controls[model_run_id] = control
+            future = self._prepare_pool.submit(self.prepare, config, model_run_id, control)
+            self._prepared[model_run_id] = future
+            return future
+
+    def load_input_esdl(self, path: str) -> bytes:
+        # kept as bytes, the parser reads the XML from the buffer
+        return self.storage.read(path)
+
+    def prepare(self, config: OperaAdapterConfig, model_run_id: str, control: RunControl) -> PreparedRun:
+        """Fetches and parses the input ESDLs and imports them into the Opera database in the workspace of the run"""
+        workspace = OperaWorkspace(model_run_id)
+        try:
+            prepared = self._prepare(config, model_run_id, control, workspace)
+            control.end_stage()
+            return prepared
+        except BaseException:
+            workspace.remove()
+            raise
+
+    def _prepare(self, config: OperaAdapterConfig, model_run_id: str, control: RunControl,
+                 workspace: OperaWorkspace) -> PreparedRun:
         if not config.input_esdl_file_path_1 or not config.input_esdl_file_path_2:
-            return ModelRunInfo(
+            return PreparedRun(info=ModelRunInfo(
                 model_run_id=model_run_id,
                 state=ModelState.ERROR,
                 reason="ESDL file paths cannot be None"
-            )        
-            
-        input_esdl_1: str
-        input_esdl_2: str
-
-        # load the first ESDL file
-        if config.input_esdl_file_path_1[:7] == 'file://':
-            logger.info(f"Loading ESDL from local disk at {config.input_esdl_file_path_1[7:]}")
-            # local file
-            with open(config.input_esdl_file_path_1[7:], 'r') as file_1:
-                input_esdl_1 = file_1.read()
-        else: # assume minio
-            try:
-                logger.info(f"Loading ESDL from Inter Model Storage (Minio) at {config.input_esdl_file_path_1}")
-                input_esdl_bytes_1 = self.load_from_minio(config.input_esdl_file_path_1)
-                if input_esdl_bytes_1 is None:
-                    raise ValueError(f"Error retrieving {config.input_esdl_file_path_1} from Minio")
-                input_esdl_1 = input_esdl_bytes_1.decode('utf-8')
-            except (S3Error, ValueError) as e:
-                logger.error(str(e))
-                return ModelRunInfo(
-                    model_run_id=model_run_id,
-                    state=ModelState.ERROR,
-                    reason=str(e)
-                )
+            ))
 
-        # load the second ESDL file
-        if config.input_esdl_file_path_2[:7] == 'file://':
-            logger.info(f"Loading ESDL from local disk at {config.input_esdl_file_path_2[7:]}")
-            # local file
-            with open(config.input_esdl_file_path_2[7:], 'r') as file_2:
-                input_esdl_2 = file_2.read()
-        else: # assume minio
-            try:
-                logger.info(f"Loading ESDL from Inter Model Storage (Minio) at {config.input_esdl_file_path_2}")
-                input_esdl_bytes_2 = self.load_from_minio(config.input_esdl_file_path_2)
-                if input_esdl_bytes_2 is None:
-                    raise ValueError(f"Error retrieving {config.input_esdl_file_path_2} from Minio")
-                input_esdl_2 = input_esdl_bytes_2.decode('utf-8')
-            except (S3Error, ValueError) as e:
-                logger.error(str(e))
-                return ModelRunInfo(
-                    model_run_id=model_run_id,
-                    state=ModelState.ERROR,
-                    reason=str(e)
-                )
+        input_esdl_1: bytes
+        input_esdl_2: bytes
+
+        self.begin_stage(model_run_id, control, "fetch", "Loading input ESDLs", 0.0)
+        # both ESDL files are loaded at the same time, the second one in the fetch pool
+        input_esdl_2_future = self._fetch_pool.submit(self.load_input_esdl, config.input_esdl_file_path_2)
+        try:
+            input_esdl_1 = self.load_input_esdl(config.input_esdl_file_path_1)
+            input_esdl_2 = control.result(input_esdl_2_future)
+        except RunCancelled:
+            input_esdl_2_future.cancel()
+            raise
+        except (ValueError, OSError) as e:  # StorageError is an OSError
+            logger.error(str(e))
+            return PreparedRun(info=ModelRunInfo(
+                model_run_id=model_run_id,
+                state=ModelState.ERROR,
+                reason=str(e)
+            ))
+
+        logger.info(f"Loaded input ESDLs of {len(input_esdl_1)} and {len(input_esdl_2)} bytes")
+
+        cache_key = self.result_cache_key(input_esdl_1, input_esdl_2)
+        cached_esdl = self.result_cache.get_bytes(cache_key) if cache_key else None
+        if cached_esdl is not None:
+            self.progress(model_run_id, "Using cached result of identical inputs", 0.9)
+            return PreparedRun(info=ModelRunInfo(
+                model_run_id=model_run_id,
+                state=ModelState.SUCCEEDED,
+                result={'esdl': cached_esdl}
+            ))
 
-        print(f'Input ESDL 1:{input_esdl_1}')
-        print(f'Input ESDL 2: {input_esdl_2}')
         # convert ESDL to MySQL
         # logger.info("Converting ESDL using Universal Link")
         # ul = UniversalLink(host=EnvSettings.db_host(), database=EnvSettings.db_name(),
         #                    user=EnvSettings.db_user(), password=EnvSettings.db_password())
         # success, error = ul.esdl_to_db(input_esdl)
-        parser = OperaESDLParser()
+        self.begin_stage(model_run_id, control, "parse", "Parsing input ESDLs", 0.1)
+        from tno.aimms_adapter.model.opera_esdl_parser.esdl_parser import parse_assets, parse_kpis
+        # both ESDLs are parsed at the same time, each by its own parser in a worker process of this run
         try:
-            esdl_in_dataframe, carriers = parser.parse(esdl_string=input_esdl_1)
-            esdl_kpi, hourly_electricity_price  = parser.parse_2(esdl_string=input_esdl_2) # Import the code related to KPI-related ESDL into the esdl_parser.py file
+            with self.parse_workers.checkout(2, control) as lease:
+                futures = [lease.submit(parse_assets, input_esdl_1),
+                           lease.submit(parse_kpis, input_esdl_2)] # Import the code related to KPI-related ESDL into the esdl_parser.py file
+                try:
+                    esdl_in_dataframe, carriers = control.result(futures[0])
+                    esdl_kpi, hourly_electricity_price = control.result(futures[1])
+                except BaseException:
+                    lease.stop(futures)  # no parse of this run keeps a worker busy after it is handed back
+                    raise
+            # checked before the workspace is created, the importer picks the profile again
+            from tno.aimms_adapter.model.opera_accessdb.opera_access_importer import electricity_import_prices
+            electricity_import_prices(hourly_electricity_price)
+        except RunCancelled:
+            raise
+        except BrokenProcessPool as e:
+            logger.error(f"ESDL parser process stopped unexpectedly: {e}")
+            return PreparedRun(info=ModelRunInfo(
+                model_run_id=model_run_id,
+                state=ModelState.ERROR,
+                reason=f"ESDL parser process stopped unexpectedly: {e}"
+            ))
+        except CancelledError:
+            logger.error("Parse of ESDL input was cancelled")
+            return PreparedRun(info=ModelRunInfo(
+                model_run_id=model_run_id,
+                state=ModelState.ERROR,
+                reason="Parse of ESDL input was cancelled"
+            ))
         except Exception as e:
             logger.error(f"Parse exception for ESDL input: {e}")
-            return ModelRunInfo(
+            return PreparedRun(info=ModelRunInfo(
                 model_run_id=model_run_id,
                 state=ModelState.ERROR,
                 reason=str(e)
-            )
+            ))
 
-        copy_clean_access_database(EnvSettings.clean_access_database(), EnvSettings.access_database())
-        logger.info("Importing ESDL into Opera database")
+        self.begin_stage(model_run_id, control, "import", "Importing ESDL into Opera database", 0.2)
+        workspace.create()
+        from tno.aimms_adapter.model.opera_accessdb.opera_access_importer import OperaAccessImporter
         oai = OperaAccessImporter()
         oai.start_import(esdl_data_frame=esdl_in_dataframe, 
                          carriers=carriers, 
                          esdl_kpi = esdl_kpi,
                          hourly_electricity_price = hourly_electricity_price,
-                         access_database=EnvSettings.access_database())
-        # start aimms via subprocess
-        print(f"AIMMS binary at {EnvSettings.aimms_exe_path()}")
-        print(f"AIMMS model at {EnvSettings.aimms_model_path()}")
-        print(f"AIMMS start procedure {EnvSettings.aimms_procedure()}")
+                         access_database=workspace.access_database)
+        self.progress(model_run_id, "Waiting for a free AIMMS slot", 0.3)
+        return PreparedRun(workspace=workspace, input_esdl=input_esdl_1, cache_key=cache_key)
 
+    def solve(self, model_run_id: str, prepared: PreparedRun, control: RunControl) -> ModelRunInfo:
+        """Runs AIMMS on the database of a prepared model run and collects its results"""
+        workspace = prepared.workspace
+        # start aimms via subprocess
         aimms_exe_path = EnvSettings.aimms_exe_path()
         start_procedure = EnvSettings.aimms_procedure()
         aimms_model_path = EnvSettings.aimms_model_path()
-        params = [aimms_exe_path, "-R", start_procedure, aimms_model_path] # --minimized
+        # the start procedure gets the database and output folder of the workspace as its arguments
+        params = [aimms_exe_path, "-R", start_procedure, aimms_model_path, *workspace.aimms_arguments()] # --minimized
+        logger.debug(f"AIMMS binary at {aimms_exe_path}, model at {aimms_model_path}, start procedure {start_procedure}")
 
         # fake opera by running Ping command, that takes some time to run
         #params = ["ping", "-n", "10", "127.0.0.1"]
 
-        logger.info("Starting AIMMS...")
+        self.begin_stage(model_run_id, control, "solve", "Solving with AIMMS", 0.4)
         # aimms = subprocess.Popen(params, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-        aimms = subprocess.run(params, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        # killed together with its child processes when the run is cancelled or exceeds a deadline
+        try:
+            aimms = control.run_process(params, cwd=workspace.path)
+            return self.collect(model_run_id, prepared, control, aimms)
+        finally:
+            # the copy of the database is not needed anymore once the results are collected
+            workspace.remove()
+
+    def collect(self, model_run_id: str, prepared: PreparedRun, control: RunControl,
+                aimms: subprocess.CompletedProcess) -> ModelRunInfo:
+        """Builds the output ESDL of a run from its workspace, before the workspace is removed"""
         # running = True
         # output = []
 
@@ -150,18 +269,43 @@ class Opera(Model):
 
         # wait for aimms to finish
         if aimms.returncode == 0:
-            logger.info("AIMMS has finished, collecting results...")
-            esh = parser.get_energy_system_Handler()
+            self.begin_stage(model_run_id, control, "collect", "Collecting AIMMS results", 0.9)
+            from tno.aimms_adapter.model.opera_esdl_parser.esdl_parser import output_esdl
+            # like the inputs, the output is built in a worker process, which parses the first input again
             # orp = OperaResultsProcessor(input_df=esdl_in_dataframe,
             #                             esh=esh,
-            #                             output_path=EnvSettings.opera_output_folder())
+            #                             output_path=prepared.workspace.output_folder)
             # orp.update_production_capacities()
-            updated_esdl_string = esh.to_string()
+            # serialized straight to UTF-8 bytes, which are stored and uploaded as they are
+            try:
+                with self.parse_workers.checkout(1, control) as lease:
+                    output_future = lease.submit(output_esdl, prepared.input_esdl)
+                    try:
+                        updated_esdl = control.result(output_future)
+                    except BaseException:
+                        lease.stop([output_future])
+                        raise
+            except BrokenProcessPool as e:
+                logger.error(f"ESDL parser process stopped unexpectedly: {e}")
+                return ModelRunInfo(
+                    model_run_id=model_run_id,
+                    state=ModelState.ERROR,
+                    reason=f"ESDL parser process stopped unexpectedly: {e}"
+                )
+            except CancelledError:
+                logger.error("Building the output ESDL was cancelled")
+                return ModelRunInfo(
+                    model_run_id=model_run_id,
+                    state=ModelState.ERROR,
+                    reason="Building the output ESDL was cancelled"
+                )
+            if prepared.cache_key:
+                self.result_cache.put_bytes(prepared.cache_key, updated_esdl)
 
             return ModelRunInfo(
                 model_run_id=model_run_id,
                 state=ModelState.SUCCEEDED,
-                result = {'esdl': updated_esdl_string}
+                result = {'esdl': updated_esdl}
             )#, simulation_id
         else:
             # error
@@ -176,15 +320,62 @@ class Opera(Model):
 
 
 
+    def hand_off(self, info: ModelRunInfo):
+        """
+        Stores the output ESDL of a successful run right away and keeps only its path in the result, so the ESDL
+        bytes can be freed, the output survives a restart of the adapter and is never returned in a JSON response.
+        """
+        if info.state == ModelState.SUCCEEDED and info.result and 'esdl' in info.result:
+            info.result = self.write_result(info.model_run_id, info.result.pop('esdl'))
+
     # @staticmethod
     # def monitor_aimms_progress(simulation_id, model_run_id):
     # pass
 
     def threaded_run(self, model_run_id, config):
-        print("Threaded_run:", config)
+        if self.runs.state(model_run_id) in FINISHED_STATES:
+            # cancelled just before the scheduler started it
+            return self.run_info(model_run_id)
+        # promoted from the queue by the scheduler, the run starts now that it has a slot
+        self.runs.update(model_run_id, state=ModelState.RUNNING, started=True)
+
+        with self._stage_lock:
+            # the run leaves the runs that are prepared ahead, which makes room for the next queued run
+            prepared_future = self._prepared.pop(model_run_id, None)
+            control = self._controls.get(model_run_id)
+            if prepared_future is None or control is None:
+                prepared_future = self.stage(model_run_id, config)
+                self._prepared.pop(model_run_id)
+                control = self._controls[model_run_id]
+        self.stage_ahead()
+        control.start()
 
         # start AIMMS run
-        start_aimms_info = self.start_aimms_model(config, model_run_id)
+        try:
+            # the preparation checks the deadlines at every stage, this stops waiting for a preparation that hangs
+            prepared = control.result(prepared_future)
+            start_aimms_info = prepared.info or self.solve(model_run_id, prepared, control)
+            self.hand_off(start_aimms_info)
+        except (RunCancelled, CancelledError) as e:
+            reason = e.reason if isinstance(e, RunCancelled) else control.reason or "CANCELLED: preparation was cancelled"
+            logger.warning(f"Model run {model_run_id} stopped: {reason}")
+            self.release(model_run_id)
+            start_aimms_info = ModelRunInfo(
+                model_run_id=model_run_id,
+                state=ModelState.ERROR,
+                reason=reason
+            )
+        except Exception as e:
+            logger.exception(f"Model run {model_run_id} failed")
+            start_aimms_info = ModelRunInfo(
+                model_run_id=model_run_id,
+                state=ModelState.ERROR,
+                reason=f"Exception: {str(e)}"
+            )
+        finally:
+            self._controls.pop(model_run_id, None)
+        # the outcome and the path of the output are recorded here, so results() only reads the run registry
+        self.record_outcome(start_aimms_info)
         if start_aimms_info.state == ModelState.RUNNING:
             # monitor AIMMS progress
             #monitor_essim_progress_info = Opera.monitor_essim_progress(simulation_id, model_run_id)
@@ -202,10 +393,13 @@ class Opera(Model):
 
         res = Model.run(self, model_run_id=model_run_id)
 
-        if model_run_id in self.model_run_dict and self.model_run_dict[model_run_id].state == ModelState.RUNNING:
-            config: OperaAdapterConfig = self.model_run_dict[model_run_id].config
-            executor.submit_stored(model_run_id, self.threaded_run, model_run_id, config)
-            res.state = self.model_run_dict[model_run_id].state
+        if model_run_id in self.runs and self.runs.state(model_run_id) == ModelState.RUNNING:
+            config: OperaAdapterConfig = self.runs.get(model_run_id).config
+            self.schedule([(model_run_id, config)])
+            res = self.run_info(model_run_id)
+            if res.state == ModelState.QUEUED and res.queue_position is None:
+                # started right away, threaded_run() sets the state to RUNNING
+                res.state = ModelState.RUNNING
             return res
         else:
             return ModelRunInfo(
@@ -214,68 +408,197 @@ class Opera(Model):
                 reason="Error in Opera.run(): model_run_id unknown or model is in wrong state"
             )
 
-    def status(self, model_run_id: str):
+    def run_batch(self, configs: List[OperaAdapterConfig]) -> List[ModelRunInfo]:
+        """
+        Creates, initializes and queues a model run for every config. Either all runs are queued, or none of them.
+        :raises ValueError: when one of the configs is incomplete
+        """
+        for index, config in enumerate(configs):
+            if not config.input_esdl_file_path_1 or not config.input_esdl_file_path_2:
+                raise ValueError(f"ESDL file paths cannot be None (config {index})")
+
+        self.evict_runs()
+        model_run_ids = []
+        try:
+            for config in configs:
+                model_run_id = str(uuid4())
+                self.runs.add(model_run_id, ModelRun(state=ModelState.QUEUED, config=config, result=None))
+                model_run_ids.append(model_run_id)
+        except Exception:
+            for model_run_id in model_run_ids:
+                self.runs.remove(model_run_id)
+            raise
+
+        self.schedule(list(zip(model_run_ids, configs)))
+        return [self.run_info(model_run_id) for model_run_id in model_run_ids]
+
+    def input_fingerprint(self, config: OperaAdapterConfig) -> Optional[str]:
+        """
+        Identifies the inputs of a run by the ETag or content hash of both input ESDLs, so a run whose input changed
+        at the same path doesn't get the result of a run on the old input. None when an input can't be checked
+        """
         try:
-            if model_run_id in self.model_run_dict:
-                if not executor.futures.done(model_run_id):
-                    return ModelRunInfo(
-                        state=self.model_run_dict[model_run_id].state,
-                        model_run_id=model_run_id,
-                        reason=f"executor.futures._state: {executor.futures._state(model_run_id)}"
-                    )
+            versions = [self.storage.version(path)
+                        for path in (config.input_esdl_file_path_1, config.input_esdl_file_path_2)]
+        except (ValueError, OSError) as e:  # StorageError is an OSError
+            logger.warning(f"Can't check the input ESDLs, the model run doesn't share the run of identical inputs: {e}")
+            return None
+        return self.result_cache.key(*versions, EnvSettings.aimms_model_path(), EnvSettings.aimms_procedure())
+
+    def schedule(self, runs: List[Tuple[str, OperaAdapterConfig]]):
+        """
+        Queues model runs on the scheduler. A run with the same input fingerprint as a run that is already queued or
+        running doesn't get a slot of its own, it follows that run and gets the same result (single flight).
+        """
+        # the inputs are checked before the lock is taken, this can take a request to Minio per input
+        fingerprints = [self.input_fingerprint(config) for _, config in runs]
+        with self._in_flight_lock:
+            leaders = []
+            batch_leaders = set()
+            followers = []
+            for (model_run_id, config), fingerprint in zip(runs, fingerprints):
+                leader_id = self._in_flight.get(fingerprint) if fingerprint is not None else None
+                if leader_id not in batch_leaders and self.scheduler.future(leader_id) is None:
+                    leader_id = None  # no leader, or the leader was removed while it was running
+                if leader_id is None:
+                    if fingerprint is not None:
+                        self._in_flight[fingerprint] = model_run_id
+                    self.runs.update(model_run_id, state=ModelState.QUEUED)
+                    leaders.append((model_run_id, config, fingerprint))
+                    batch_leaders.add(model_run_id)
                 else:
-                    #print("executor.futures._state: ", executor.futures._state(model_run_id))   # FINISHED
-                    future = executor.futures.pop(model_run_id)
-                    executor.futures.add(model_run_id, future)   # Put it back on again, so it can be retreived in results
-                    model_run_info = future.result()
-                    if model_run_info.result is not None:
-                        print('Model execution result:', model_run_info.result)
-                    else:
-                        logger.warning("No result in model_run_info variable")
-                    return model_run_info
+                    self.release(model_run_id)  # uses the workspace of the leader instead
+                    followers.append((model_run_id, leader_id))
+
+            # threaded_run() sets the state to RUNNING as soon as the scheduler has a free slot for a run
+            self.scheduler.submit_many([(model_run_id, self.threaded_run, (model_run_id, config))
+                                        for model_run_id, config, _ in leaders])
+            for model_run_id, _, fingerprint in leaders:
+                self.scheduler.future(model_run_id).add_done_callback(
+                    lambda f, run_id=model_run_id, fp=fingerprint: self._landed(run_id, fp))
+            for model_run_id, leader_id in followers:
+                self.follow(model_run_id, leader_id)
+        # batch runs and runs that were not staged at initialize are prepared once they are near the head of the queue
+        self.stage_ahead()
+
+    def _landed(self, model_run_id: str, fingerprint: Optional[str]):
+        with self._in_flight_lock:
+            if self._in_flight.get(fingerprint) == model_run_id:
+                del self._in_flight[fingerprint]
+
+    def follow(self, model_run_id: str, leader_id: str):
+        """Lets a model run wait for the result of an identical run, without taking a scheduler slot"""
+        logger.info(f"Model run {model_run_id} has the same inputs as {leader_id}, waiting for its result")
+        follower_future = Future()
+        follower_future.set_running_or_notify_cancel()
+        self.scheduler.attach(model_run_id, follower_future)
+        self._followers[model_run_id] = follower_future
+        self.runs.update(model_run_id, state=ModelState.RUNNING, stage=f"Waiting for identical model run {leader_id}",
+                         progress=0.0)
+
+        def leader_done(leader_future: Future):
+            if self._followers.pop(model_run_id, None) is None:
+                return  # the follower was cancelled
+            if model_run_id not in self.runs:
+                return  # the follower was removed
+            if leader_future.cancelled() or (leader_future.exception() is None and
+                                             (leader_future.result().reason or "").startswith("CANCELLED:")):
+                # cancelled or removed by its own client, which doesn't end the runs that follow it. The first
+                # follower to get here is queued in its place and the others follow that one
+                logger.info(f"Identical model run {leader_id} was cancelled, queueing model run {model_run_id} again")
+                self.schedule([(model_run_id, self.runs.get(model_run_id).config)])
+                return
+            if leader_future.exception() is not None:
+                info = ModelRunInfo(model_run_id=model_run_id, state=ModelState.ERROR,
+                                    reason=f"Exception: {str(leader_future.exception())}")
             else:
-                return ModelRunInfo(
-                    model_run_id=model_run_id,
-                    state=ModelState.ERROR,
-                    reason="Error in OPERA.status(): model_run_id unknown"
-                )
+                # shares the result of the leader, the ESDL string is not copied
+                info = dataclasses.replace(leader_future.result(), model_run_id=model_run_id)
+                if info.state != ModelState.SUCCEEDED:
+                    info.reason = f"Identical model run {leader_id} failed: {info.reason}"
+                elif info.result and 'path' in info.result:
+                    info = self.copy_result(info)
+            self.record_outcome(info)
+            follower_future.set_result(info)
+
+        self.scheduler.future(leader_id).add_done_callback(leader_done)
+
+    def copy_result(self, info: ModelRunInfo) -> ModelRunInfo:
+        """Copies the stored output ESDL of an identical run to the output path of this run"""
+        try:
+            path = self.runs.get(info.model_run_id).config.output_esdl_file_path
+            path = with_encoding(path, EnvSettings.output_compression())
+            if path != info.result['path']:
+                self.storage.copy(info.result['path'], path)
+            return dataclasses.replace(info, result=self.stored_result(path))
         except Exception as e:
-            logger.error(f'Exception in status method: {str(e)}')
+            logger.exception(f"Copying the result to model run {info.model_run_id} failed")
+            return ModelRunInfo(model_run_id=info.model_run_id, state=ModelState.ERROR,
+                                reason=f"Exception: {str(e)}")
+
+    def cancel(self, model_run_id: str):
+        """
+        Cancels a model run. A queued run is taken out of the queue, a running run is stopped at its next stage and
+        its AIMMS process is killed right away, which frees its scheduler slot and workspace.
+        """
+        if model_run_id not in self.runs:
             return ModelRunInfo(
                 model_run_id=model_run_id,
                 state=ModelState.ERROR,
-                reason=f"Exception: {str(e)}"
-        )
+                reason="Error in Opera.cancel(): model_run_id unknown"
+            )
+        if self.runs.state(model_run_id) in FINISHED_STATES:
+            return self.run_info(model_run_id)
+
+        reason = "CANCELLED: by request"
+        logger.info(f"Cancelling model run {model_run_id}")
+        control = self._controls.get(model_run_id)
+        if control is not None:
+            control.cancel(reason)
+        follower_future = self._followers.pop(model_run_id, None)
+        future = self.scheduler.future(model_run_id)
+        if follower_future is None and future is not None and future.running():
+            # threaded_run() records the outcome once the run has stopped
+            wait([future], timeout=EnvSettings.cancel_wait())
+        else:
+            # queued, or only initialized: stops its preparation and frees its workspace
+            self.scheduler.cancel(model_run_id)
+            self.release(model_run_id)
+            self.stage_ahead()
+            self.runs.update(model_run_id, state=ModelState.ERROR, reason=reason)
+            if follower_future is not None:
+                follower_future.set_result(self.run_info(model_run_id))
+        return self.run_info(model_run_id)
+
+    def capacity(self) -> dict:
+        capacity = super().capacity()
+        capacity["preparing_runs"] = sum(not future.done() for future in list(self._prepared.values()))
+        capacity["workspace_disk"] = workspace_disk_usage()
+        return capacity
 
     def process_results(self, result):
-        return result['esdl']  # returns the ESDL string of the updated ESDL
-
-    def results(self, model_run_id: str):
-        # Issue: if status already runs executor.future.pop, future does not exist anymore
-        if executor.futures.done(model_run_id):
-            if model_run_id in self.model_run_dict:
-                future = executor.futures.pop(model_run_id)
-                model_run_info = future.result()
-                if model_run_info.result is not None:
-                    print("Opera Run has ESDL result:")
-                    print(model_run_info.result)
-                else:
-                    logger.warning("No result in model_run_info variable")
-
-                self.model_run_dict[model_run_id].state = model_run_info.state
-                if model_run_info.state == ModelState.SUCCEEDED:
-                    self.model_run_dict[model_run_id].result = model_run_info.result
-
-                    Model.store_result(self, model_run_id=model_run_id, result=model_run_info.result)
-                else:
-                    self.model_run_dict[model_run_id].result = {}
-
-                return Model.results(self, model_run_id=model_run_id)
-            else:
-                return ModelRunInfo(
-                    model_run_id=model_run_id,
-                    state=ModelState.ERROR,
-                    reason="Error in ESSIM.results(): model_run_id unknown"
-                )
-        else:
-            return Model.results(self, model_run_id=model_run_id)
+        return result['esdl']  # returns the updated ESDL as UTF-8 encoded bytes
+
+    def record_outcome(self, info: ModelRunInfo):
+        """Stores the state, reason and result of a finished run in the run registry in one update"""
+        succeeded = info.state == ModelState.SUCCEEDED
+        self.runs.update(info.model_run_id, state=info.state, reason=info.reason,
+                         result=(info.result or {}) if succeeded else {}, progress=1.0 if succeeded else None)
+
+    def result_path(self, model_run_id: str) -> Optional[str]:
+        """Returns where the output ESDL of a finished run is stored"""
+        if model_run_id not in self.runs:
+            return None
+        info = self.results(model_run_id)
+        if info.state != ModelState.SUCCEEDED or not info.result:
+            return None
+        return info.result.get("path")
+
+    def release(self, model_run_id: str):
+        control = self._controls.pop(model_run_id, None)
+        if control is not None:
+            control.cancel("CANCELLED: model run was released")  # stops a preparation that is still going on
+        prepared_future = self._prepared.pop(model_run_id, None)
+        if prepared_future is not None:
+            prepared_future.cancel()
+        OperaWorkspace(model_run_id).remove()
@@ -53,6 +53,29 @@ def copy_clean_access_database(empty_source, target_db):
         print(e)
 
 
+def electricity_import_prices(hourly_electricity_price: pd.DataFrame) -> pd.DataFrame:
+    """
+    The hourly prices of the profile that is the cost of the ElectricityCommodity, Opera has one electricity import
+    price per hour. The other profiles of the ESDL are ignored. When no profile is the cost of an
+    ElectricityCommodity, the only profile of the ESDL is used.
+    :raises ValueError: when no profile is the cost of an ElectricityCommodity and the ESDL has several profiles
+    """
+    prices = hourly_electricity_price[hourly_electricity_price['electricity_cost']]
+    if prices.empty:
+        prices = hourly_electricity_price
+        profile_ids = prices['profile_id'].unique()
+        if len(profile_ids) > 1:
+            raise ValueError(f"None of the {len(profile_ids)} hourly price profiles is the cost of an "
+                             f"ElectricityCommodity, can't tell which one is the electricity import price")
+        return prices
+    profile_ids = prices['profile_id'].unique()
+    if len(profile_ids) > 1:
+        # several ElectricityCommodities with a cost profile, the first one in the ESDL is used
+        log.warning(f"Found {len(profile_ids)} ElectricityCommodities with a cost profile, using {profile_ids[0]}")
+        prices = prices[prices['profile_id'] == profile_ids[0]]
+    return prices
+
+
 class OperaAccessImporter:
     year: int = 2030
     scenario = 'MMvIB'
@@ -188,7 +211,7 @@ class OperaAccessImporter:
         self.df = esdl_data_frame
         self.carriers = carriers
         self.df_kpi = esdl_kpi
-        self.df_electricity = hourly_electricity_price
+        self.df_electricity = electricity_import_prices(hourly_electricity_price)
         is_consumer = self.df['category'] == 'Consumer'
         self.not_consumer_options = self.df[~is_consumer]
         self.consumer_options = self.df[is_consumer]
@@ -0,0 +1,53 @@
+from dataclasses import dataclass, field
+from heapq import merge
+from typing import Dict, List, Tuple, Type, TypeVar
+
+import esdl
+from pyecore.ecore import EObject
+
+T = TypeVar('T')
+
+
+@dataclass
+class AssetLookup:
+    """The ports and ranged constraints of an asset"""
+    in_ports: List[esdl.InPort] = field(default_factory=list)
+    out_ports: List[esdl.OutPort] = field(default_factory=list)
+    # by lower case attributeReference, the first constraint of an attribute is used
+    ranged_constraints: Dict[str, esdl.RangedConstraint] = field(default_factory=dict)
+
+
+class EnergySystemIndex:
+    """
+    Index of a loaded EnergySystem, built in a single walk over the model. Keeps all objects by their type, and the
+    ports and ranged constraints of every asset, so the extractors don't need to walk the model or an asset again.
+    """
+
+    def __init__(self, energy_system: esdl.EnergySystem):
+        # (position in the walk, object) by type, the position keeps instances_of() in model order
+        self._by_type: Dict[type, List[Tuple[int, EObject]]] = {}
+        self._assets: Dict[EObject, AssetLookup] = {}
+        self._instances: Dict[type, list] = {}
+        for position, element in enumerate(energy_system.eAllContents()):
+            self._by_type.setdefault(type(element), []).append((position, element))
+            if isinstance(element, esdl.Port):
+                lookup = self._assets.setdefault(element.eContainer(), AssetLookup())
+                (lookup.in_ports if isinstance(element, esdl.InPort) else lookup.out_ports).append(element)
+            elif isinstance(element, esdl.RangedConstraint) and element.attributeReference:
+                lookup = self._assets.setdefault(element.eContainer(), AssetLookup())
+                lookup.ranged_constraints.setdefault(element.attributeReference.lower(), element)
+
+    def instances_of(self, esdl_type: Type[T]) -> List[T]:
+        """
+        All objects of esdl_type, including subtypes, in model order. Same result as
+        EnergySystemHandler.get_all_instances_of_type, without walking the model
+        """
+        if esdl_type not in self._instances:
+            groups = [elements for element_type, elements in self._by_type.items() if issubclass(element_type, esdl_type)]
+            self._instances[esdl_type] = [element for _, element in merge(*groups)]
+        return self._instances[esdl_type]
+
+    def asset(self, asset: esdl.EnergyAsset) -> AssetLookup:
+        """The lookup of an asset, an asset without ports and constraints gets a new empty one"""
+        lookup = self._assets.get(asset)
+        return lookup if lookup is not None else AssetLookup()
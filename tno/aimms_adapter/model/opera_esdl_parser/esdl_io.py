@@ -0,0 +1,68 @@
+from io import BytesIO
+from typing import BinaryIO, Optional, Union
+
+import esdl
+from esdl.esdl_handler import EnergySystemHandler
+from pyecore.resources import URI
+
+EsdlSource = Union[str, bytes, BinaryIO]
+
+
+class BufferURI(URI):
+    """
+    URI to load an ESDL from bytes or from a binary stream (e.g. a memory-mapped file), without decoding it to a str
+    and encoding it again like StringURI does.
+    """
+
+    def __init__(self, uri: str, source: Union[bytes, BinaryIO]):
+        super().__init__(uri)
+        self._source = source
+        self._created: Optional[BytesIO] = None
+
+    def create_instream(self):
+        if hasattr(self._source, 'read'):
+            return self._source
+        self._created = BytesIO(self._source)  # shares the bytes, doesn't copy them
+        return self._created
+
+    def close_stream(self):
+        # a stream that was passed in is closed by its owner
+        if self._created is not None:
+            self._created.close()
+            self._created = None
+
+
+class StreamURI(URI):
+    """URI to save an ESDL directly into a binary stream, e.g. the stream that is uploaded"""
+
+    def __init__(self, uri: str, stream: BinaryIO):
+        super().__init__(uri)
+        self._stream = stream
+
+    def create_outstream(self):
+        return self._stream
+
+    def close_stream(self):
+        pass
+
+
+def load_esdl(esh: EnergySystemHandler, source: EsdlSource) -> esdl.EnergySystem:
+    """Loads an ESDL into the EnergySystemHandler from a str, from bytes or from a binary stream"""
+    if isinstance(source, str):
+        return esh.load_from_string(source)
+    esh.resource = esh.rset.create_resource(BufferURI('from_buffer.esdl', source))
+    esh.resource.load()
+    esh.energy_system = esh.resource.contents[0]
+    return esh.energy_system
+
+
+def write_esdl(esh: EnergySystemHandler, stream: BinaryIO):
+    """Serializes the ESDL of the EnergySystemHandler into a binary stream as UTF-8 encoded XML"""
+    esh.resource.save(StreamURI('to_stream.esdl', stream))
+
+
+def esdl_bytes(esh: EnergySystemHandler) -> bytes:
+    """Serializes the ESDL of the EnergySystemHandler to bytes, without the str that to_string() creates"""
+    stream = BytesIO()
+    write_esdl(esh, stream)
+    return stream.getvalue()
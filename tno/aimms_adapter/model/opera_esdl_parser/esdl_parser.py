@@ -1,12 +1,16 @@
 from dataclasses import dataclass
-from typing import Tuple, Union, Optional, List
-from datetime import timedelta
+from datetime import datetime
+from typing import Dict, Tuple, Union, Optional, List
 
 from esdl.esdl_handler import EnergySystemHandler
+from .esdl_index import EnergySystemIndex
+from .esdl_io import EsdlSource, esdl_bytes, load_esdl
+from .profile_stream import strip_time_series
 from .unit import convert_to_unit, POWER_IN_GW, ENERGY_IN_PJ, COST_IN_MEur, POWER_IN_W, COST_IN_Eur_per_MWh, \
     ENERGY_IN_J, UnitException, COST_IN_MEur_per_GW, COST_IN_MEur_per_GW_per_year, COST_IN_MEur_per_PJ, \
     COST_IN_Eur_per_GJ
 import esdl
+import numpy as np
 import pandas as pd
 
 pd.set_option('display.max_columns', None)
@@ -15,18 +19,85 @@ pd.set_option('display.width', 200)
 # current asset types that are not supported by this parser or Opera import
 IGNORED_ASSETS_TUPLE = (esdl.Transport, esdl.Export)
 
+# columns of the assets dataframe and their dtypes
+ASSET_COLUMNS = {
+    'category': 'str',
+    'id': 'str',
+    'esdlType': 'str',
+    'name': 'str',
+    'power_min': 'float',
+    'power_max': 'float',
+    'power': 'float',
+    'efficiency': 'float',
+    'investment_cost': 'float',
+    'o_m_cost': 'float',
+    'variable_o_m_cost': 'float',
+    'marginal_cost': 'float',
+    'carrier_in': 'str',
+    'carrier_out': 'str',
+    'profiles_in': 'str',
+    'profiles_out': 'str',
+    'storage_capacity': 'float',
+    'storage_charge_efficiency': 'float',
+    'storage_discharge_efficiency': 'float',
+    'storage_slow_loadtime': 'float',
+    'storage_fast_loadtime': 'float',
+    'storage_slow_unloadtime': 'float',
+    'storage_fast_unloadtime': 'float',
+    'storage_losses_perhour': 'float',
+    'opera_equivalent': 'str',
+}
+
+# columns of the carriers dataframe and their dtypes
+CARRIER_COLUMNS = {
+    'name': 'str',
+    'id': 'str',
+    'cost': 'float',
+    'unit': 'str',
+}
+
+# columns of the hourly electricity prices dataframe and their dtypes, with a block of rows per profile
+ELECTRICITY_PRICE_COLUMNS = {
+    'profile_id': 'str',
+    'date': 'object',
+    'time': 'object',
+    'hour': 'int64',
+    'price': 'float',
+    'unit': 'str',
+    'electricity_cost': 'bool',
+}
+
+
+def build_frame(rows: List[tuple], columns: Dict[str, str]) -> pd.DataFrame:
+    """
+    Builds a dataframe in one go from rows that were collected in a list, with the dtype of every column given
+    explicitly. Adding rows one by one with df.loc or pd.concat copies the frame for every row.
+    """
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    return pd.DataFrame({name: pd.Series(list(column), dtype=dtype)
+                         for (name, dtype), column in zip(columns.items(), values)})
+
 
 class OperaESDLParser:
     def __init__(self):
-        self.esh = EnergySystemHandler()
+        self.esh = EnergySystemHandler()  # the ESDL with the assets, see parse()
+        self.esh_kpi = EnergySystemHandler()  # the ESDL with the KPIs and electricity prices, see parse_2()
 
     def get_energy_system_Handler(self) -> EnergySystemHandler:
+        """The handler of the ESDL that was parsed by parse(), the output ESDL is based on it"""
+        return self.esh
+
+    def load(self, esdl_string: EsdlSource) -> EnergySystemHandler:
+        """Only loads the ESDL with the assets, e.g. to write the output ESDL when the frames come from parse_assets()"""
+        load_esdl(self.esh, esdl_string)
         return self.esh
 
-    def parse(self, esdl_string: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    def parse(self, esdl_string: EsdlSource, skip_time_series: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """
         Extracts Cost, ranges of production and values of demand
-        :param esdl_string:
+        :param esdl_string: the ESDL as str, bytes or binary stream
+        :param skip_time_series: leave out the values of TimeSeriesProfiles, which are not used for the frames. Only
+                                 when the handler is not used afterwards, as the ESDL it holds misses these values
         :return: Tuple of 2 dataframes: assets and carriers
         """
         print(f"Power unit : {POWER_IN_GW.description}")
@@ -36,34 +107,12 @@ class OperaESDLParser:
         print(f"Variable OPEX Cost unit: {COST_IN_MEur_per_PJ.description}")
         print(f"Marginal Cost unit: {COST_IN_Eur_per_MWh.description}")
 
-        self.esh.load_from_string(esdl_string)
-        energy_assets = self.esh.get_all_instances_of_type(esdl.EnergyAsset)
-        df = pd.DataFrame({'category': pd.Series(dtype='str'),
-                           'id': pd.Series(dtype='str'),
-                           'esdlType': pd.Series(dtype='str'),
-                           'name': pd.Series(dtype='str'),
-                           'power_min': pd.Series(dtype='float'),
-                           'power_max': pd.Series(dtype='float'),
-                           'power': pd.Series(dtype='float'),
-                           'efficiency': pd.Series(dtype='float'),
-                           'investment_cost': pd.Series(dtype='float'),
-                           'o_m_cost': pd.Series(dtype='float'),
-                           'variable_o_m_cost': pd.Series(dtype='float'),
-                           'marginal_cost': pd.Series(dtype='float'),
-                           'carrier_in': pd.Series(dtype='str'),
-                           'carrier_out': pd.Series(dtype='str'),
-                           'profiles_in': pd.Series(dtype='str'),
-                           'profiles_out': pd.Series(dtype='str'),
-                           'storage_capacity': pd.Series(dtype='float'),
-                           'storage_charge_efficiency': pd.Series(dtype='float'),
-                           'storage_discharge_efficiency': pd.Series(dtype='float'),
-                           'storage_slow_loadtime': pd.Series(dtype='float'),
-                           'storage_fast_loadtime': pd.Series(dtype='float'),
-                           'storage_slow_unloadtime': pd.Series(dtype='float'),
-                           'storage_fast_unloadtime': pd.Series(dtype='float'),
-                           'storage_losses_perhour': pd.Series(dtype='str'),
-                           'opera_equivalent': pd.Series(dtype='str')
-                           })
+        if skip_time_series:
+            esdl_string, _ = strip_time_series(esdl_string)
+        load_esdl(self.esh, esdl_string)
+        index = EnergySystemIndex(self.esh.energy_system)
+        energy_assets = index.instances_of(esdl.EnergyAsset)
+        rows = []  # one tuple per asset, in the order of ASSET_COLUMNS
         for asset in energy_assets:
             max_power = None
             try:
@@ -72,7 +121,7 @@ class OperaESDLParser:
                     print(f'Converting {asset.name}:')
                     category = esdl_category(asset)
 
-                    power_range, unit = extract_range(asset, 'power')
+                    power_range, unit = extract_range(asset, 'power', index)
                     if power_range:
                         print("\t- Power range: ", power_range)
                         power_range = tuple([convert_to_unit(v, unit, POWER_IN_GW) for v in power_range])
@@ -82,7 +131,7 @@ class OperaESDLParser:
                     #     # use max power as range
                     #     power_range = (max_power, max_power)
 
-                    capacity_range, unit = extract_range(asset, 'capacity')
+                    capacity_range, unit = extract_range(asset, 'capacity', index)
                     if capacity_range:
                         print("\t- Capacity range: ", capacity_range)
                         # a bit of a hack to use power range instead of capacity range (with diferent Unit)
@@ -90,69 +139,68 @@ class OperaESDLParser:
 
                     efficiency = extract_efficiency(asset)
                     costs = extract_costs(asset)
-                    carrier_in_list, carrier_out_list = extract_carriers(asset)
+                    carrier_in_list, carrier_out_list = extract_carriers(asset, index)
                     carrier_in = ", ".join(carrier_in_list)
                     carrier_out = ", ".join(carrier_out_list)
-                    singlevalue_profiles_in, singlevalue_profiles_out = extract_port_singlevalue_profiles(asset, ENERGY_IN_PJ)
+                    singlevalue_profiles_in, singlevalue_profiles_out = extract_port_singlevalue_profiles(asset, ENERGY_IN_PJ, index)
                     profiles_in = ", ".join([str(p) for p in singlevalue_profiles_in])
                     profiles_out = ", ".join([str(p) for p in singlevalue_profiles_out])
                     #print(f"profiles: {singlevalue_profiles_in} and out {singlevalue_profiles_out}")
                     sa = StorageAttributes()
                     if isinstance(asset, esdl.Storage):
                         sa = extract_storage_attributes(asset)
-                    opera_equivalent = find_opera_equivalent(asset)
+                    opera_equivalent = find_opera_equivalent(asset, index)
                     print(f'\t- {asset.eClass.name}, {asset.name}, power_range={power_range}, power={max_power}, costs={costs}' )
-                    s = [category, asset.id, asset.eClass.name, asset.name,
-                         power_range[0] if power_range else None, power_range[1] if power_range else None,
-                         max_power, efficiency, costs[0], costs[1], costs[2], costs[3],
-                         carrier_in, carrier_out, profiles_in, profiles_out,
-                         sa.capacity, sa.chargeEfficiency, sa.disChargeEfficiency, sa.slowLoadTime, sa.fastLoadTime,
-                         sa.slowUnloadTime, sa.fastUnloadTime, sa.lossesPerHour,
-                         opera_equivalent]
-                    df.loc[len(df)] = s
+                    rows.append((category, asset.id, asset.eClass.name, asset.name,
+                                 power_range[0] if power_range else None, power_range[1] if power_range else None,
+                                 max_power, efficiency, costs[0], costs[1], costs[2], costs[3],
+                                 carrier_in, carrier_out, profiles_in, profiles_out,
+                                 sa.capacity, sa.chargeEfficiency, sa.disChargeEfficiency, sa.slowLoadTime,
+                                 sa.fastLoadTime, sa.slowUnloadTime, sa.fastUnloadTime, sa.lossesPerHour,
+                                 opera_equivalent))
             except UnitException as ue:
                 print(f"Error parsing input: asset {asset.name} not configured correctly: {ue}")
                 raise ue
 
+        df = build_frame(rows, ASSET_COLUMNS)
         #print(df)
-        df.to_csv('output.csv')
 
         # carrier prices
-        df_carriers = pd.DataFrame({'name': pd.Series(dtype='str'),
-                                    'id': pd.Series(dtype='str'),
-                                    'cost': pd.Series(dtype='float'),
-                                    'unit': pd.Series(dtype='str'),
-                                    })
-        carrier_list: List[esdl.Carrier] = self.esh.get_all_instances_of_type(esdl.Carrier)
+        carrier_rows = []
+        carrier_list: List[esdl.Carrier] = index.instances_of(esdl.Carrier)
         for carrier in carrier_list:
+            price = None
+            target_unit = COST_IN_Eur_per_MWh if isinstance(carrier, esdl.ElectricityCommodity) else COST_IN_Eur_per_GJ
             if carrier.cost:
                 price = extract_singlevalue(carrier.cost)
                 if carrier.cost.profileQuantityAndUnit:
                     qau = carrier.cost.profileQuantityAndUnit
-                    target_unit = COST_IN_Eur_per_GJ
-                    if isinstance(carrier, esdl.ElectricityCommodity):
-                        target_unit = COST_IN_Eur_per_MWh
                     price = convert_to_unit(price, qau, target_unit)
-            carrier_df = pd.DataFrame([{'name': carrier.name, 'id': carrier.id, 'cost': price, 'unit': target_unit.description}])
-            #df_carriers = df_carriers.append({'name': carrier.name, 'id': carrier.id, 'cost': price, 'unit': target_unit.description}, ignore_index=True)
-            df_carriers = pd.concat([df_carriers, carrier_df], ignore_index=True)
+            carrier_rows.append((carrier.name, carrier.id, price, target_unit.description))
             print(f'Carrier {carrier.name} has cost {price} {target_unit.description}')
 
+        df_carriers = build_frame(carrier_rows, CARRIER_COLUMNS)
         print(df_carriers)
         return df, df_carriers
 
-    def parse_2(self, esdl_string) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    def parse_2(self, esdl_string: EsdlSource) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """
         Extracts kpis information and hourly electricity prices
+        :return: Tuple of 2 dataframes: kpis and hourly prices, with the rows of every TimeSeriesProfile under its
+                 profile_id and hours numbered from 1 per profile. The profile that is the cost of an
+                 ElectricityCommodity is marked in the electricity_cost column
         """
-        self.esh.load_from_string(esdl_string)
+        # the values of the time series are read into numpy arrays, pyecore only loads the rest of the model
+        esdl_string, time_series = strip_time_series(esdl_string)
+        load_esdl(self.esh_kpi, esdl_string)
+        index = EnergySystemIndex(self.esh_kpi.energy_system)
         df_kpis = pd.DataFrame({'name': pd.Series(dtype='str'),
                             'id': pd.Series(dtype='str'),
                             'demand': pd.Series(dtype='float'),
                             'unit': pd.Series(dtype='str'),
                             'carrier': pd.Series(dtype='str'),
                             })
-        kpi_list: List[esdl.DoubleKPI] = self.esh.get_all_instances_of_type(esdl.DoubleKPI)
+        kpi_list: List[esdl.DoubleKPI] = index.instances_of(esdl.DoubleKPI)
         
         kpi_data = []
 
@@ -169,46 +217,13 @@ class OperaESDLParser:
         df_kpis = pd.concat([df_kpis, pd.DataFrame(kpi_data)], ignore_index=True)
         print(df_kpis)
         
-        # Extract Electricity hourly prices
-        df_electricity = pd.DataFrame({'date': pd.Series(dtype='str'),
-                                       'time': pd.Series(dtype='str'),
-                                       'hour': pd.Series(dtype='int'),
-                                       'price': pd.Series(dtype='float'),
-                                       'unit': pd.Series(dtype='str'),
-                                       })
-        electricity_prices: List[esdl.TimeSeriesProfile] = self.esh.get_all_instances_of_type(esdl.TimeSeriesProfile)
-        
-        electricity_import_price = []
-        
-        for electricity_price in electricity_prices:
-            date_time = electricity_price.startDateTime
-            print(date_time)
-            date = date_time.date()
-            time = date_time.time()
-            print(f"Date: {date}, Time: {time}")
-
-            hour = 0
-            for time_series in electricity_price.values:
-                date_time += timedelta(hours=1)
-                date = date_time.date()
-                time = date_time.time()
-                hour += 1
-                price = time_series
-                # date = time_series.start
-                # time = time_series.duration
-                # price = time_series.value
-                if electricity_price.profileQuantityAndUnit is not None:
-                    qau = electricity_price.profileQuantityAndUnit
-                    target_unit = COST_IN_Eur_per_GJ
-                    # price = convert_to_unit(price, qau, target_unit) # commented out as the conversion does not seem
-                    # to be working properly
-                    price = price / 3.6 # conversion from €/MWh to €/GJ
-                    unit = target_unit.description
-                electricity_import_price.append({'date': date, 'time': time, 'hour': hour,'price': price, 'unit': unit})
-
-        df_electricity = pd.concat([df_electricity, pd.DataFrame(electricity_import_price)], ignore_index=True)
-        print(df_electricity)
-        # print(df_kpis)
+        # Extract Electricity hourly prices, every profile is kept apart by its profile_id
+        profiles: List[esdl.TimeSeriesProfile] = index.instances_of(esdl.TimeSeriesProfile)
+        electricity_costs = {carrier.cost.id for carrier in index.instances_of(esdl.ElectricityCommodity)
+                             if isinstance(carrier.cost, esdl.TimeSeriesProfile)}
+        df_electricity = pd.concat([extract_hourly_prices(profile, time_series.get(profile.id),
+                                                          profile.id in electricity_costs) for profile in profiles]
+                                   or [build_frame([], ELECTRICITY_PRICE_COLUMNS)], ignore_index=True)
         return df_kpis, df_electricity
 
 
@@ -216,28 +231,87 @@ class ParseException(Exception):
     pass
 
 
-def extract_range(asset: esdl.EnergyAsset, attribute_name: str) -> Tuple[
+def extract_hourly_prices(profile: esdl.TimeSeriesProfile, values: Optional[np.ndarray] = None,
+                          electricity_cost: bool = False) -> pd.DataFrame:
+    """
+    The hourly electricity prices of a TimeSeriesProfile, see hourly_price_frame()
+    :param values: the values of the profile when they were read by strip_time_series(), else profile.values is used
+    """
+    if values is None:
+        values = np.fromiter(profile.values, dtype=float, count=len(profile.values))
+    return hourly_price_frame(profile.id, profile.startDateTime, profile.timestep, values,
+                              profile.profileQuantityAndUnit is not None, electricity_cost)
+
+
+def hourly_price_frame(profile_id: str, start: Optional[datetime], timestep: Optional[int], values: np.ndarray,
+                       has_unit: bool, electricity_cost: bool = False) -> pd.DataFrame:
+    """
+    Rows with the date, time, hour number and price of every value of a profile. Hour 1 is the first timestep after
+    start, timestep is in seconds and an hour when it is not set.
+    :param has_unit: whether the profile has a unit, the prices are then converted from €/MWh to €/GJ
+    :param electricity_cost: whether the profile is the cost of an ElectricityCommodity
+    """
+    step = pd.Timedelta(seconds=timestep or 3600)
+    if start is not None:
+        times = pd.date_range(start=pd.Timestamp(start) + step, periods=len(values), freq=step)
+        dates, day_times = times.date, times.time
+    else:
+        dates = day_times = np.full(len(values), None, dtype=object)
+    unit = None
+    if has_unit:
+        # convert_to_unit does not seem to convert these profiles properly, so €/MWh is converted to €/GJ here
+        values = values / 3.6
+        unit = COST_IN_Eur_per_GJ.description
+    return pd.DataFrame({
+        'profile_id': pd.Series(np.full(len(values), profile_id, dtype=object), dtype='str'),
+        'date': dates,
+        'time': day_times,
+        'hour': np.arange(1, len(values) + 1, dtype='int64'),
+        'price': values.astype('float64', copy=False),
+        'unit': pd.Series(np.full(len(values), unit, dtype=object), dtype='str'),
+        'electricity_cost': np.full(len(values), electricity_cost, dtype=bool),
+    })
+
+
+def parse_assets(esdl_string: EsdlSource) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    OperaESDLParser.parse() with a parser of its own. Meant to run in a worker process, the ESDL goes in as bytes and
+    only the frames, which pickle as a few numpy arrays, come back.
+    """
+    return OperaESDLParser().parse(esdl_string, skip_time_series=True)
+
+
+def parse_kpis(esdl_string: EsdlSource) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """OperaESDLParser.parse_2() with a parser of its own, see parse_assets()"""
+    return OperaESDLParser().parse_2(esdl_string)
+
+
+def output_esdl(esdl_string: EsdlSource) -> bytes:
+    """
+    The output ESDL of a model run, serialized from its first input ESDL. Runs in a worker process like
+    parse_assets(), so the input is not parsed again in the process of the adapter
+    """
+    return esdl_bytes(OperaESDLParser().load(esdl_string))
+
+
+def extract_range(asset: esdl.EnergyAsset, attribute_name: str, index: EnergySystemIndex) -> Tuple[
     Tuple[float, float] | None, esdl.QuantityAndUnitType | None]:
     """
     Returns the Range constraint of this energy asset as a tuple, plus the unit of the range, e.g. (0,20), PowerInGW
     Returns None, None if nothing is found
     :param attribute_name: the name of the attribute, e.g. 'power' or 'capacity'
     :param asset:
+    :param index: index of the energy system of the asset
     :return:
     """
-    constraints = asset.constraint
-    for c in constraints:
-        if isinstance(c, esdl.RangedConstraint):
-            rc: esdl.RangedConstraint = c
-            if rc.attributeReference.lower() == attribute_name.lower():
-                constraint_range: esdl.Range = rc.range
-                if constraint_range.profileQuantityAndUnit is None:
-                    print(f"No unit specified for constraint of asset {asset.name}, assuming WATT")
-                    constraint_range.profileQuantityAndUnit = POWER_IN_W
-                return (constraint_range.minValue, constraint_range.maxValue), constraint_range.profileQuantityAndUnit
-            #else:
-            #    raise ParseException(f'Can\'t find an Ranged constrained for asset {asset.name} with attribute name {attribute_name}')
-    return None, None # make sure unpacking works
+    rc = index.asset(asset).ranged_constraints.get(attribute_name.lower())
+    if rc is None:
+        return None, None  # make sure unpacking works
+    constraint_range: esdl.Range = rc.range
+    if constraint_range.profileQuantityAndUnit is None:
+        print(f"No unit specified for constraint of asset {asset.name}, assuming WATT")
+        constraint_range.profileQuantityAndUnit = POWER_IN_W
+    return (constraint_range.minValue, constraint_range.maxValue), constraint_range.profileQuantityAndUnit
 
 
 @dataclass(init=False)
@@ -322,43 +396,36 @@ def extract_costs(asset: esdl.EnergyAsset):
     return investment_costs_normalized, o_m_cost_normalized, variable_om_costs_normalized, marginal_cost_normalized
 
 
-def extract_carriers(asset: esdl.EnergyAsset) -> Tuple[List[str], List[str]]:
-    ports = asset.port
-    carrier_in_list = []
-    carrier_out_list = []
-    for p in ports:
-        p: esdl.Port = p
-        if p.carrier:
-            if isinstance(p, esdl.InPort):
-                carrier_in_list.append(p.carrier.name)
-            else:
-                carrier_out_list.append(p.carrier.name)
-
+def extract_carriers(asset: esdl.EnergyAsset, index: EnergySystemIndex) -> Tuple[List[str], List[str]]:
+    lookup = index.asset(asset)
+    carrier_in_list = [p.carrier.name for p in lookup.in_ports if p.carrier]
+    carrier_out_list = [p.carrier.name for p in lookup.out_ports if p.carrier]
     return carrier_in_list, carrier_out_list
 
 
-def extract_port_singlevalue_profiles(asset: esdl.EnergyAsset, target_unit:esdl.QuantityAndUnitType) -> Tuple[List[str], List[str]]:
-    ports = asset.port
-    singlevalue_in_list = []
-    singlevalue_out_list = []
+def extract_port_singlevalue_profiles(asset: esdl.EnergyAsset, target_unit:esdl.QuantityAndUnitType,
+                                      index: EnergySystemIndex) -> Tuple[List[str], List[str]]:
+    lookup = index.asset(asset)
+    return (port_singlevalues(lookup.in_ports, target_unit),
+            port_singlevalues(lookup.out_ports, target_unit))
+
+
+def port_singlevalues(ports: List[esdl.Port], target_unit: esdl.QuantityAndUnitType) -> List[float]:
+    singlevalue_list = []
     for p in ports:
         p: esdl.Port = p
         if p.profile and len(p.profile) > 0:
             profile: esdl.GenericProfile = p.profile[0]  # TODO: only uses first profile!
             if isinstance(profile, esdl.SingleValue):
-                if isinstance(p, esdl.InPort):
-                    singlevalue_in_list.append(convert_to_unit(extract_singlevalue(profile), profile.profileQuantityAndUnit, target_unit))
-                else:
-                    singlevalue_out_list.append(convert_to_unit(extract_singlevalue(profile), profile.profileQuantityAndUnit, target_unit))
+                singlevalue_list.append(convert_to_unit(extract_singlevalue(profile), profile.profileQuantityAndUnit, target_unit))
             else:
                 print(f"Unsupported profile type for Opera parser {profile.eClass.name}: {profile}, ignoring")
             if len(p.profile) > 1:
                 print(f"Multiple profiles per port are currently not supported")
-
-    return singlevalue_in_list, singlevalue_out_list
+    return singlevalue_list
 
 
-def find_opera_equivalent(asset: esdl.EnergyAsset) -> str | None:
+def find_opera_equivalent(asset: esdl.EnergyAsset, index: EnergySystemIndex) -> str | None:
     if isinstance(asset, esdl.Electrolyzer):
         return "H2 Large-scale electrolyser"
     elif isinstance(asset, esdl.MobilityDemand):
@@ -398,9 +465,8 @@ def find_opera_equivalent(asset: esdl.EnergyAsset) -> str | None:
         return "Solar-PV Residential" # or "Solar -PV industry" # mind the space!
     elif isinstance(asset, esdl.Import):
         carrier: str = None
-        for port in asset.port:
-            if isinstance(port, esdl.OutPort):
-                carrier = port.carrier.name if port.carrier else None
+        for port in index.asset(asset).out_ports:
+            carrier = port.carrier.name if port.carrier else None
         if carrier:
             if carrier.lower().startswith("elec"):
                 # electricity import
@@ -0,0 +1,85 @@
+import re
+from typing import Dict, Iterator, List, Tuple
+from xml.parsers import expat
+
+import numpy as np
+
+from .esdl_io import EsdlSource
+
+CHUNK_SIZE = 1024 * 1024
+VALUES_ATTRIBUTE = re.compile(rb'\svalues="[^"]*"')
+
+
+def _chunks(source: EsdlSource) -> Iterator[bytes]:
+    """The ESDL in chunks of CHUNK_SIZE bytes, a stream is read one chunk at a time"""
+    if isinstance(source, str):
+        source = source.encode('utf-8')
+    if hasattr(source, 'read'):
+        return iter(lambda: source.read(CHUNK_SIZE), b'')
+    view = memoryview(source)
+    return (view[offset:offset + CHUNK_SIZE] for offset in range(0, len(view), CHUNK_SIZE))
+
+
+def time_series_values(profile_id: str, text: str) -> np.ndarray:
+    """
+    The values attribute of a TimeSeriesProfile as an array
+    :raises ValueError: when one of the values is not a number
+    """
+    try:
+        return np.array(text.split(), dtype=float)
+    except ValueError as e:
+        raise ValueError(f"TimeSeriesProfile {profile_id} has a value that is not a number: {e}") from e
+
+
+def strip_time_series(source: EsdlSource) -> Tuple[bytes, Dict[str, np.ndarray]]:
+    """
+    Reads the values of all TimeSeriesProfiles of an ESDL straight into numpy arrays, with an incremental XML parser
+    that is fed the ESDL in chunks as they are read from the source. Returns the ESDL without these values, so
+    loading the rest of the model with pyecore doesn't create a Python float for every value, and the arrays by
+    profile id. Only the stripped ESDL is built up in memory, the read chunks are dropped once they are parsed.
+    Profiles without an id keep their values in the ESDL.
+    :raises ValueError: when a value of a profile is not a number
+    """
+    values: Dict[str, np.ndarray] = {}
+    stripped: List[bytes] = []
+    pending = bytearray()  # read bytes that are not copied to stripped yet, they start at byte `copied` of the ESDL
+    copied = 0
+    cuts: List[Tuple[int, int]] = []  # byte ranges of the values attributes in pending that are removed
+    parser = expat.ParserCreate()
+
+    def start_element(name: str, attributes: Dict[str, str]):
+        if 'values' not in attributes or 'id' not in attributes:
+            return
+        if attributes.get('xsi:type', '').rpartition(':')[2] != 'TimeSeriesProfile':
+            return
+        start = parser.CurrentByteIndex - copied
+        end = pending.find(b'<', start + 1)  # the start tag ends before the next '<', which can't occur in attributes
+        match = VALUES_ATTRIBUTE.search(pending, start, end if end >= 0 else len(pending))
+        if match is None:
+            return
+        values[attributes['id']] = time_series_values(attributes['id'], attributes['values'])
+        cuts.append((copied + match.start(), copied + match.end()))
+
+    def copy(until: int):
+        """Copies pending up to byte `until` of the ESDL to stripped, without the values attributes in it"""
+        nonlocal copied
+        position = copied
+        while cuts and cuts[0][1] <= until:
+            start, end = cuts.pop(0)
+            stripped.append(bytes(pending[position - copied:start - copied]))
+            position = end
+        stripped.append(bytes(pending[position - copied:until - copied]))
+        del pending[:until - copied]
+        copied = until
+
+    parser.StartElementHandler = start_element
+    for chunk in _chunks(source):
+        pending += chunk
+        parser.Parse(bytes(chunk), False)
+        # a start tag that is not parsed yet begins at the last '<', as attributes can't contain a '<'
+        last_tag = pending.rfind(b'<')
+        if last_tag > 0:
+            copy(copied + last_tag)
+    parser.Parse(b'', True)
+    copy(copied + len(pending))
+    return b''.join(stripped), values
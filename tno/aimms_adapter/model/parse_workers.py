@@ -0,0 +1,105 @@
+import multiprocessing
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+from tno.aimms_adapter.model.run_control import POLL_INTERVAL, RunControl
+from tno.shared.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class ParseLease:
+    """The parse workers that a model run has checked out, its parses are spread over them"""
+
+    def __init__(self, executors: List[Executor]):
+        self.executors = executors
+        self.killed = False
+        self._next = 0
+
+    def submit(self, fn: Callable, *args) -> Future:
+        executor = self.executors[self._next % len(self.executors)]
+        self._next += 1
+        return executor.submit(fn, *args)
+
+    def stop(self, futures: List[Future]):
+        """
+        Stops the parses of a run that was cancelled or exceeded a deadline. Parses that didn't start are cancelled,
+        a parse that hangs in a worker process is stopped by killing that process, which only runs parses of this run
+        """
+        running = [future for future in futures if not future.cancel() and not future.done()]
+        if running and any(isinstance(executor, ProcessPoolExecutor) for executor in self.executors):
+            logger.warning("Killing the ESDL parser processes of a stopped model run")
+            self.kill()
+
+    def kill(self):
+        """Kills the worker processes of the lease, they are not handed out again"""
+        self.killed = True
+        for executor in self.executors:
+            # the pool forgets its processes on shutdown
+            processes = list((getattr(executor, "_processes", None) or {}).values())
+            executor.shutdown(wait=False, cancel_futures=True)
+            for process in processes:
+                process.kill()
+
+
+class ParseWorkers:
+    """
+    Worker processes that parse ESDLs, started with the first parse and reused by later runs. A model run checks
+    out workers of its own for its parses, so stopping a run or losing a worker process never fails the parses of
+    other runs. With 0 processes the ESDLs are parsed in a shared pool of threads of the adapter process instead.
+    """
+
+    def __init__(self, processes: int, threads: int):
+        self.processes = processes
+        self.threads = threads
+        self._condition = threading.Condition()
+        self._free = processes  # workers that are not checked out, idle or not started yet
+        self._idle: List[ProcessPoolExecutor] = []
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+
+    @contextmanager
+    def checkout(self, count: int, control: RunControl) -> Iterator[ParseLease]:
+        """
+        Checks out up to count workers until the block ends, waiting for free workers as long as the run goes on
+        :raises RunCancelled: when the run is cancelled or a deadline passes while waiting
+        """
+        if self.processes <= 0:
+            yield ParseLease([self.thread_pool()])
+            return
+        count = min(count, self.processes)
+        with self._condition:
+            while self._free < count:
+                control.check()
+                self._condition.wait(POLL_INTERVAL)
+            self._free -= count
+            executors = [self._idle.pop() if self._idle else self._new_worker() for _ in range(count)]
+        lease = ParseLease(executors)
+        try:
+            yield lease
+        finally:
+            with self._condition:
+                if not lease.killed:
+                    self._idle.extend(executor for executor in executors if not self._broken(executor))
+                self._free += count
+                self._condition.notify_all()
+
+    def thread_pool(self) -> ThreadPoolExecutor:
+        with self._condition:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="esdl-parse")
+            return self._thread_pool
+
+    @staticmethod
+    def _new_worker() -> ProcessPoolExecutor:
+        # the adapter runs threads, forking it could leave locks held by them locked in the worker
+        return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+    @staticmethod
+    def _broken(executor: ProcessPoolExecutor) -> bool:
+        """A worker process that died breaks its executor, a new one is started in its place"""
+        if getattr(executor, "_broken", False):
+            executor.shutdown(wait=False)
+            return True
+        return False
@@ -0,0 +1,158 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import BinaryIO, Dict, Optional, Tuple, Union
+
+from tno.shared.log import get_logger
+
+logger = get_logger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+_checksums: Dict[str, Tuple[float, int, str]] = {}
+
+
+def file_checksum(path: str) -> str:
+    """SHA-256 of a file, only recalculated when the modification time or size of the file changes"""
+    stat = os.stat(path)
+    cached = _checksums.get(path)
+    if cached and cached[:2] == (stat.st_mtime, stat.st_size):
+        return cached[2]
+    sha = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+            sha.update(chunk)
+    checksum = sha.hexdigest()
+    _checksums[path] = (stat.st_mtime, stat.st_size, checksum)
+    return checksum
+
+
+class DiskCache:
+    """
+    Content-addressed cache of files on local disk. When the cache grows beyond max_bytes, the least recently used
+    entries are removed. A max_bytes of 0 disables the cache.
+    """
+    suffix = '.bin'
+
+    def __init__(self, folder: str, max_bytes: int):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0  # size of all entries that were served from the cache
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, int] = OrderedDict()  # key -> size in bytes, least recently used first
+        self._size = 0
+        if self.enabled:
+            os.makedirs(folder, exist_ok=True)
+            files = [entry for entry in os.scandir(folder) if entry.name.endswith(self.suffix)]
+            for entry in sorted(files, key=lambda e: e.stat().st_mtime):
+                self._entries[entry.name[:-len(self.suffix)]] = entry.stat().st_size
+                self._size += entry.stat().st_size
+            self._evict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(*parts: Union[str, bytes]) -> str:
+        sha = hashlib.sha256()
+        for part in parts:
+            data = part.encode('utf-8') if isinstance(part, str) else part
+            sha.update(len(data).to_bytes(8, 'big'))
+            sha.update(data)
+        return sha.hexdigest()
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        """Opens an entry for reading without loading it into memory, None when it is not in the cache"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        path = self._path(key)
+        try:
+            os.utime(path)  # keeps the LRU order after a restart
+            file = open(path, 'rb')
+        except OSError as e:
+            logger.warning(f"Cache entry {key} could not be read: {e}")
+            with self._lock:
+                self._size -= self._entries.pop(key, 0)
+            return None
+        with self._lock:
+            self.bytes_saved += os.fstat(file.fileno()).st_size
+        return file
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        file = self.open(key)
+        if file is None:
+            return None
+        with file:
+            return file.read()
+
+    def put_stream(self, key: str, stream: BinaryIO) -> Optional[BinaryIO]:
+        """
+        Writes a stream to the cache in chunks and returns the new entry opened for reading. An entry larger than
+        max_bytes is not kept, then None is returned
+        """
+        if not self.enabled:
+            return None
+        tmp_path = self._path(key) + f'.{threading.get_ident()}.tmp'
+        size = 0
+        with open(tmp_path, 'wb') as file:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                file.write(chunk)
+                size += len(chunk)
+        if size > self.max_bytes:
+            os.remove(tmp_path)
+            return None
+        os.replace(tmp_path, self._path(key))
+        file = open(self._path(key), 'rb')
+        with self._lock:
+            self._size += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._evict()
+        return file
+
+    def put_bytes(self, key: str, data: bytes):
+        if not self.enabled or len(data) > self.max_bytes:
+            return
+        file = self.put_stream(key, BytesIO(data))
+        if file is not None:
+            file.close()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes_saved": self.bytes_saved,
+            "entries": len(self._entries),
+            "size_bytes": self._size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, key + self.suffix)
+
+
+class ResultCache(DiskCache):
+    """
+    Cache of output ESDLs. The key is a hash of everything that determines the outcome of a model run.
+    """
+    suffix = '.esdl'
@@ -0,0 +1,149 @@
+import concurrent.futures
+import os
+import signal
+import subprocess
+import threading
+from concurrent.futures import Future
+from time import monotonic
+from typing import Optional
+
+from tno.shared.log import get_logger
+
+logger = get_logger(__name__)
+
+POLL_INTERVAL = 1.0  # seconds between checks for cancellation and deadlines while a subprocess or future runs
+
+
+class RunCancelled(Exception):
+    """Raised inside a model run when it is cancelled or exceeds one of its deadlines"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class RunControl:
+    """
+    Cancellation and deadlines of a single model run. The run calls begin_stage() at every stage, which raises
+    RunCancelled when the run was cancelled, the wall-clock deadline passed or the previous stage took too long.
+    Subprocesses started with run_process() are killed together with all their children as soon as that happens.
+    The wall-clock timeout counts from start(), so a run that is prepared early doesn't use it up while it waits.
+    """
+
+    def __init__(self, model_run_id: str, timeout: Optional[float] = None):
+        self.model_run_id = model_run_id
+        self.timeout = timeout
+        self.deadline: Optional[float] = None
+        self.reason: Optional[str] = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._process: Optional[subprocess.Popen] = None
+        self._stage: Optional[str] = None
+        self._stage_timeout: Optional[float] = None
+        self._stage_deadline: Optional[float] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self, reason: str):
+        with self._lock:
+            if self.reason is None:
+                self.reason = reason
+            self._cancelled.set()
+            if self._process is not None:
+                kill_process_group(self._process)
+
+    def start(self):
+        """Starts the wall-clock timeout of the run"""
+        if self.timeout and self.deadline is None:
+            self.deadline = monotonic() + self.timeout
+
+    def begin_stage(self, stage: str, timeout: Optional[float] = None):
+        self.check()
+        self._stage = stage
+        self._stage_timeout = timeout
+        self._stage_deadline = monotonic() + timeout if timeout else None
+
+    def end_stage(self):
+        """Checks the deadlines of the current stage and stops its timeout, e.g. before the run waits in a queue"""
+        self.check()
+        self._stage = None
+        self._stage_timeout = None
+        self._stage_deadline = None
+
+    def check(self):
+        """Raises RunCancelled if the run was cancelled or one of its deadlines has passed"""
+        now = monotonic()
+        if self.deadline is not None and now > self.deadline and not self.cancelled:
+            self.cancel(f"TIMEOUT: model run exceeded its time limit of {self.timeout:g} s")
+        if self._stage_deadline is not None and now > self._stage_deadline and not self.cancelled:
+            self.cancel(f"TIMEOUT: stage '{self._stage}' exceeded its time limit of {self._stage_timeout:g} s")
+        if self.cancelled:
+            raise RunCancelled(self.reason)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the nearest deadline of the run or its current stage, None if there is no deadline"""
+        deadlines = [deadline for deadline in (self.deadline, self._stage_deadline) if deadline is not None]
+        return max(0.0, min(deadlines) - monotonic()) if deadlines else None
+
+    def result(self, future: Future):
+        """
+        Like future.result(), but raises RunCancelled as soon as the run is cancelled or one of its deadlines passes.
+        The work of the future is not stopped, that is up to the caller
+        """
+        while True:
+            self.check()
+            remaining = self.remaining()
+            try:
+                return future.result(timeout=POLL_INTERVAL if remaining is None else min(POLL_INTERVAL, remaining))
+            except concurrent.futures.TimeoutError:
+                pass
+
+    def run_process(self, params, **kwargs) -> subprocess.CompletedProcess:
+        """Like subprocess.run(), but the process group is killed when the run is cancelled or times out"""
+        with self._lock:
+            if self.cancelled:
+                raise RunCancelled(self.reason)
+            self._process = subprocess.Popen(params, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                                             **new_process_group_kwargs(), **kwargs)
+        process = self._process
+        try:
+            while True:
+                try:
+                    output, _ = process.communicate(timeout=POLL_INTERVAL)
+                    break
+                except subprocess.TimeoutExpired:
+                    try:
+                        self.check()
+                    except RunCancelled:
+                        logger.warning(f"Killing process {process.pid} of model run {self.model_run_id}: {self.reason}")
+                        kill_process_group(process)
+                        process.communicate()
+                        raise
+            self.check()
+            return subprocess.CompletedProcess(params, process.returncode, output)
+        finally:
+            with self._lock:
+                self._process = None
+
+
+def new_process_group_kwargs() -> dict:
+    if os.name == 'nt':
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def kill_process_group(process: subprocess.Popen):
+    """Kills a process started with new_process_group_kwargs() and all processes it started"""
+    if process.poll() is not None:
+        return
+    try:
+        if os.name == 'nt':
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning(f"Could not kill process group of {process.pid}: {e}")
+        process.kill()
@@ -0,0 +1,190 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from tno.aimms_adapter.data_types import ModelRun, ModelState, OperaAdapterConfig
+from tno.shared.log import get_logger
+
+logger = get_logger(__name__)
+
+FINISHED_STATES = (ModelState.SUCCEEDED, ModelState.ERROR)
+IDLE_STATES = (ModelState.ACCEPTED, ModelState.READY)
+IN_PROGRESS_STATES = (ModelState.QUEUED, ModelState.RUNNING)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS model_run (
+    model_run_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    config TEXT,
+    result TEXT,
+    reason TEXT,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS model_run_state ON model_run (state);
+CREATE INDEX IF NOT EXISTS model_run_finished ON model_run (finished);
+"""
+
+
+class RunRegistry:
+    """
+    Registry of model runs, stored in a SQLite database so runs survive a restart of the adapter.
+    Only the state, config and reason of each run are kept in memory, results are read from the database when
+    they are requested. Finished runs are evicted after ttl seconds, or earlier when there are more than
+    max_finished_runs of them. Runs that were never started are evicted ttl seconds after they were created. The optional on_change callback is called with the id of every run that is added,
+    updated or removed.
+    """
+
+    def __init__(self, database: str, ttl: Optional[float] = None, max_finished_runs: Optional[int] = None,
+                 on_change: Optional[Callable[[str], None]] = None):
+        self.ttl = ttl
+        self.max_finished_runs = max_finished_runs
+        self.on_change = on_change
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(database, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        if database != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._runs: Dict[str, ModelRun] = {}
+        self._load()
+
+    def _load(self):
+        """Loads the metadata of all runs, runs that were in progress when the adapter stopped can't be resumed"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE model_run SET state = ?, reason = ?, finished = ? WHERE state IN (?, ?)",
+                (ModelState.ERROR.value, "Adapter restarted while the model run was in progress", time.time(),
+                 *[s.value for s in IN_PROGRESS_STATES]))
+            for model_run_id, state, config, reason, created, started, finished in self._conn.execute(
+                    "SELECT model_run_id, state, config, reason, created, started, finished FROM model_run"):
+                self._runs[model_run_id] = ModelRun(
+                    state=ModelState(state),
+                    config=OperaAdapterConfig.Schema().loads(config) if config else None,
+                    result=None,
+                    reason=reason,
+                    created=created,
+                    started=started,
+                    finished=finished,
+                )
+        if self._runs:
+            logger.info(f"Loaded {len(self._runs)} model runs from the run registry")
+
+    def __contains__(self, model_run_id: str) -> bool:
+        return model_run_id in self._runs
+
+    def __len__(self) -> int:
+        return len(self._runs)
+
+    def get(self, model_run_id: str) -> Optional[ModelRun]:
+        """Returns the run without its result, see result()"""
+        return self._runs.get(model_run_id)
+
+    def state(self, model_run_id: str) -> Optional[ModelState]:
+        run = self._runs.get(model_run_id)
+        return run.state if run else None
+
+    def add(self, model_run_id: str, run: ModelRun):
+        created = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO model_run (model_run_id, state, config, result, reason, created) VALUES (?, ?, ?, ?, ?, ?)",
+                (model_run_id, run.state.value, self._dump_config(run.config), self._dump_result(run.result),
+                 run.reason, created))
+            self._runs[model_run_id] = ModelRun(state=run.state, config=run.config, result=None, reason=run.reason,
+                                                created=created)
+        self._changed(model_run_id)
+
+    def update(self, model_run_id: str, state: ModelState = None, config: OperaAdapterConfig = None,
+               result: dict = None, reason: str = None, progress: float = None, stage: str = None,
+               started: bool = False):
+        """
+        Updates the given fields of a run, fields that are None are left untouched.
+        Progress and stage change often and are only kept in memory.
+        started stamps the start of the run, when it got a solve slot. Only the first start is stamped.
+        """
+        with self._lock:
+            run = self._runs.get(model_run_id)
+            if run is None:
+                return
+            if progress is not None:
+                run.progress = progress
+            if stage is not None:
+                run.stage = stage
+            columns = {}
+            if state is not None:
+                run.state = state
+                columns["state"] = state.value
+                if state in FINISHED_STATES:
+                    run.finished = columns["finished"] = time.time()
+            if started and run.started is None:
+                run.started = columns["started"] = time.time()
+            if config is not None:
+                run.config = config
+                columns["config"] = self._dump_config(config)
+            if result is not None:
+                columns["result"] = self._dump_result(result)
+            if reason is not None:
+                run.reason = reason
+                columns["reason"] = reason
+            if columns:
+                assignments = ", ".join(f"{column} = ?" for column in columns)
+                with self._conn:
+                    self._conn.execute(f"UPDATE model_run SET {assignments} WHERE model_run_id = ?",
+                                       (*columns.values(), model_run_id))
+        self._changed(model_run_id)
+
+    def result(self, model_run_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM model_run WHERE model_run_id = ?",
+                                     (model_run_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def ids_in_state(self, state: ModelState) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT model_run_id FROM model_run WHERE state = ? ORDER BY created", (state.value,))]
+
+    def remove(self, model_run_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM model_run WHERE model_run_id = ?", (model_run_id,))
+            self._runs.pop(model_run_id, None)
+        self._changed(model_run_id)
+
+    def evict(self) -> List[str]:
+        """
+        Removes finished runs that are older than the ttl or exceed max_finished_runs, and runs that were accepted or
+        initialized longer than the ttl ago but never started, returns their ids
+        """
+        finished = [s.value for s in FINISHED_STATES]
+        evicted = []
+        with self._lock:
+            if self.ttl is not None:
+                expired = time.time() - self.ttl
+                evicted += [row[0] for row in self._conn.execute(
+                    "SELECT model_run_id FROM model_run WHERE finished < ? OR (state IN (?, ?) AND created < ?)",
+                    (expired, *[s.value for s in IDLE_STATES], expired))]
+            if self.max_finished_runs is not None:
+                evicted += [row[0] for row in self._conn.execute(
+                    "SELECT model_run_id FROM model_run WHERE state IN (?, ?) ORDER BY finished DESC LIMIT -1 OFFSET ?",
+                    (*finished, self.max_finished_runs))]
+            evicted = list(dict.fromkeys(evicted))
+            for model_run_id in evicted:
+                self.remove(model_run_id)
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} expired model runs from the run registry")
+        return evicted
+
+    def _changed(self, model_run_id: str):
+        if self.on_change:
+            self.on_change(model_run_id)
+
+    @staticmethod
+    def _dump_config(config: Optional[OperaAdapterConfig]) -> Optional[str]:
+        return OperaAdapterConfig.Schema().dumps(config) if config else None
+
+    @staticmethod
+    def _dump_result(result: Optional[dict]) -> Optional[str]:
+        return json.dumps(result) if result is not None else None
@@ -0,0 +1,129 @@
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from time import monotonic
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from tno.shared.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class RunScheduler:
+    """
+    FIFO scheduler for model runs. At most max_concurrent_runs runs execute at the same time, the others wait in
+    the queue and are promoted automatically as soon as a running model run finishes.
+    """
+
+    def __init__(self, max_concurrent_runs: int = 1, duration_window: int = 20):
+        self.max_concurrent_runs = max(1, max_concurrent_runs)
+        self._lock = threading.RLock()
+        self._queue: Deque[str] = deque()
+        self._jobs: Dict[str, Tuple[Callable, tuple]] = {}
+        self._running: Set[str] = set()
+        self._futures: Dict[str, Future] = {}
+        self._durations: Deque[float] = deque(maxlen=duration_window)  # of the last runs that finished in a slot
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrent_runs, thread_name_prefix="model-run")
+
+    def submit(self, model_run_id: str, fn: Callable, *args) -> Optional[int]:
+        """
+        Queues fn(*args) as the job of this model run
+        :return: the (1-based) position in the queue, or None if the run was started right away
+        """
+        return self.submit_many([(model_run_id, fn, args)])[0]
+
+    def submit_many(self, jobs: List[Tuple[str, Callable, tuple]]) -> List[Optional[int]]:
+        """
+        Queues a list of (model_run_id, fn, args) jobs in one go, so no other run can end up in between them
+        :return: the queue position of each run, see submit()
+        """
+        with self._lock:
+            for model_run_id, fn, args in jobs:
+                self._jobs[model_run_id] = (fn, args)
+                self._futures[model_run_id] = Future()
+                self._queue.append(model_run_id)
+            self._promote()
+            return [self.queue_position(model_run_id) for model_run_id, _, _ in jobs]
+
+    def attach(self, model_run_id: str, future: Future):
+        """Registers the future of a model run that gets its result elsewhere and doesn't need a slot"""
+        with self._lock:
+            self._futures[model_run_id] = future
+
+    def queue_position(self, model_run_id: str) -> Optional[int]:
+        with self._lock:
+            try:
+                return self._queue.index(model_run_id) + 1
+            except ValueError:
+                return None
+
+    def queued(self) -> List[str]:
+        """Ids of the queued model runs, the next one to start first"""
+        with self._lock:
+            return list(self._queue)
+
+    def future(self, model_run_id: str) -> Optional[Future]:
+        """Returns the future of a queued or started model run, or None if the model run is unknown"""
+        return self._futures.get(model_run_id)
+
+    def cancel(self, model_run_id: str) -> bool:
+        """Cancels a model run that is still queued, returns False if it is not in the queue"""
+        with self._lock:
+            if model_run_id not in self._queue:
+                return False
+            self._queue.remove(model_run_id)
+            self._jobs.pop(model_run_id, None)
+            future = self._futures.get(model_run_id)
+        if future is not None:
+            future.cancel()
+        return True
+
+    def discard(self, model_run_id: str):
+        """
+        Removes a model run from the queue, cancels its future and forgets it.
+        A run that is executing is not interrupted.
+        """
+        with self._lock:
+            if model_run_id in self._queue:
+                self._queue.remove(model_run_id)
+                self._jobs.pop(model_run_id, None)
+            future = self._futures.pop(model_run_id, None)
+        if future is not None:
+            future.cancel()
+
+    @property
+    def running_count(self) -> int:
+        return len(self._running)
+
+    @property
+    def queue_length(self) -> int:
+        return len(self._queue)
+
+    @property
+    def average_run_duration(self) -> Optional[float]:
+        """Rolling average of the time the last runs occupied a slot in seconds, None before the first run finished"""
+        durations = list(self._durations)
+        return sum(durations) / len(durations) if durations else None
+
+    def _promote(self):
+        while self._queue and len(self._running) < self.max_concurrent_runs:
+            model_run_id = self._queue.popleft()
+            fn, args = self._jobs.pop(model_run_id)
+            future = self._futures.get(model_run_id)
+            if future is None or not future.set_running_or_notify_cancel():
+                continue
+            self._running.add(model_run_id)
+            logger.info(f"Starting model run {model_run_id} ({len(self._running)}/{self.max_concurrent_runs} slots used)")
+            self._pool.submit(self._execute, model_run_id, future, fn, args)
+
+    def _execute(self, model_run_id: str, future: Future, fn: Callable, args: tuple):
+        start = monotonic()
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._durations.append(monotonic() - start)
+                self._running.discard(model_run_id)
+                self._promote()
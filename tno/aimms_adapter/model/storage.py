@@ -0,0 +1,268 @@
+import hashlib
+import mmap
+import os
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import timedelta
+from io import BytesIO
+from typing import TYPE_CHECKING, BinaryIO, Dict, Iterator, Optional, Set, Tuple
+
+from tno.aimms_adapter.model.compression import compressing, content_encoding, decompressing
+from tno.aimms_adapter.model.object_cache import ObjectCache
+from tno.aimms_adapter.model.result_cache import file_checksum
+from tno.shared.log import get_logger
+
+if TYPE_CHECKING:
+    from minio import Minio
+
+logger = get_logger(__name__)
+
+PART_SIZE = 10 * 1024 * 1024  # part size of multipart uploads of unknown length, Minio requires at least 5 MiB
+
+
+def split_path(path: str) -> Tuple[str, str]:
+    """Splits 'bucket/folder/file.esdl' into the bucket and the object name"""
+    bucket, _, name = path.partition("/")
+    return bucket, name
+
+
+class StorageError(IOError):
+    """Raised when a storage backend can't read or write a path, e.g. because a Minio object doesn't exist"""
+
+
+@contextmanager
+def minio_errors(path: str):
+    """Raises errors of the Minio client as StorageError, so callers don't need to import minio"""
+    from minio import S3Error  # only imported when Minio is used
+    try:
+        yield
+    except S3Error as e:
+        raise StorageError(f"Error accessing {path} in Minio: {e}") from e
+
+
+class StorageBackend(ABC):
+    """Reads and writes the ESDL files of model runs at one kind of location"""
+
+    @abstractmethod
+    def open(self, path: str) -> Iterator[BinaryIO]:
+        """Context manager that streams the content of path, the stream is closed on exit"""
+
+    def read(self, path: str) -> bytes:
+        with self.open(path) as stream:
+            return stream.read()
+
+    @abstractmethod
+    def write(self, path: str, stream: BinaryIO, length: int = -1):
+        """Writes a stream to path without holding all of it in memory, length is -1 when unknown"""
+
+    def write_bytes(self, path: str, data: bytes):
+        self.write(path, BytesIO(data), len(data))
+
+    def copy(self, source: str, destination: str):
+        with self.open(source) as stream:
+            self.write(destination, stream)
+
+    def version(self, path: str) -> str:
+        """Identifies the current content of path, it changes whenever the content changes. A hash of the content"""
+        sha = hashlib.sha256()
+        with self.open(path) as stream:
+            for chunk in iter(lambda: stream.read(1024 * 1024), b''):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    def presigned_url(self, path: str, expires: int) -> Optional[str]:
+        """Time-limited URL to download path without credentials, None if the backend has no such URLs"""
+        return None
+
+
+class FileStorage(StorageBackend):
+    """Local files, paths are given as file:///absolute/path or file://relative/path"""
+
+    @staticmethod
+    def filename(path: str) -> str:
+        return path[7:] if path[:7] == 'file://' else path
+
+    @contextmanager
+    def open(self, path: str) -> Iterator[BinaryIO]:
+        filename = self.filename(path)
+        logger.info(f"Loading from local disk at {filename}")
+        with open(filename, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                yield BytesIO()  # an empty file can't be memory-mapped
+                return
+            # pages are only read from disk when they are used, and shared with the OS file cache
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+
+    def write(self, path: str, stream: BinaryIO, length: int = -1):
+        filename = self.filename(path)
+        logger.info(f"Writing to local disk: {filename}")
+        tmp_filename = filename + f'.{threading.get_ident()}.tmp'
+        with open(tmp_filename, 'wb') as file:
+            for chunk in iter(lambda: stream.read(1024 * 1024), b''):
+                file.write(chunk)
+        os.replace(tmp_filename, filename)
+
+    def version(self, path: str) -> str:
+        # only hashed again when the modification time or size of the file changes
+        return file_checksum(self.filename(path))
+
+
+class MinioStorage(StorageBackend):
+    """
+    Objects in Minio or another S3 compatible object store, paths are given as bucket/object/name. Reads are served
+    from the object cache as long as the ETag of the object doesn't change.
+    """
+
+    def __init__(self, client: "Minio", object_cache: Optional[ObjectCache] = None):
+        self.client = client
+        self.object_cache = object_cache
+        self._buckets: Set[str] = set()  # buckets that are known to exist
+
+    @contextmanager
+    def open(self, path: str) -> Iterator[BinaryIO]:
+        bucket, name = split_path(path)
+        logger.info(f"Loading from Inter Model Storage (Minio) at {path}")
+        cache = self.object_cache if self.object_cache is not None and self.object_cache.enabled else None
+        if cache is not None:
+            # revalidates the cached copy with a stat request, an unchanged object is not downloaded again
+            with minio_errors(path):
+                stat = self.client.stat_object(bucket, name)
+            if stat.size is not None and stat.size > cache.max_bytes:
+                cache = None  # too large to cache, streamed from Minio
+            else:
+                cached = cache.open(cache.object_key(bucket, name, stat.etag))
+                if cached is not None:
+                    logger.info(f"Using cached copy of {path} (ETag {stat.etag})")
+                    with cached:
+                        yield cached
+                    return
+
+        with self.stream(bucket, name, path) as response:
+            etag = response.headers.get('ETag', '').strip('"')
+            if cache is None or not etag:
+                yield response
+                return
+            # written to the cache file in chunks, the object is then read from that file
+            cached = cache.put_stream(cache.object_key(bucket, name, etag), response)
+        if cached is None:
+            # grew beyond the size of the cache since the stat request
+            with self.stream(bucket, name, path) as response:
+                yield response
+            return
+        with cached:
+            yield cached
+
+    @contextmanager
+    def stream(self, bucket: str, name: str, path: str) -> Iterator[BinaryIO]:
+        """Streams an object straight from Minio"""
+        with minio_errors(path):
+            response = self.client.get_object(bucket, name)
+        try:
+            yield response
+        finally:
+            # returns the connection to the pool, also when reading fails halfway
+            response.close()
+            response.release_conn()
+
+    def write(self, path: str, stream: BinaryIO, length: int = -1):
+        bucket, name = split_path(path)
+        self.ensure_bucket(bucket)
+        logger.info(f"Writing to Inter Model Storage (Minio) at {path}")
+        # objects of unknown length are uploaded in parts of PART_SIZE
+        with minio_errors(path):
+            self.client.put_object(bucket, name, stream, length, part_size=PART_SIZE if length < 0 else 0)
+
+    def copy(self, source: str, destination: str):
+        # copied by Minio itself, the object doesn't pass through the adapter
+        from minio.commonconfig import CopySource
+        bucket, name = split_path(destination)
+        self.ensure_bucket(bucket)
+        with minio_errors(source):
+            self.client.copy_object(bucket, name, CopySource(*split_path(source)))
+
+    def version(self, path: str) -> str:
+        with minio_errors(path):
+            return self.client.stat_object(*split_path(path)).etag
+
+    def presigned_url(self, path: str, expires: int) -> Optional[str]:
+        return self.client.presigned_get_object(*split_path(path), expires=timedelta(seconds=expires))
+
+    def ensure_bucket(self, bucket: str):
+        if bucket in self._buckets:
+            return
+        with minio_errors(bucket):
+            if not self.client.bucket_exists(bucket):
+                self.client.make_bucket(bucket)
+        self._buckets.add(bucket)
+
+
+class MemoryStorage(StorageBackend):
+    """Keeps files in memory, paths are given as memory://name. Meant for tests"""
+
+    def __init__(self):
+        self.files: Dict[str, bytes] = {}
+
+    @contextmanager
+    def open(self, path: str) -> Iterator[BinaryIO]:
+        if path not in self.files:
+            raise FileNotFoundError(path)
+        yield BytesIO(self.files[path])
+
+    def write(self, path: str, stream: BinaryIO, length: int = -1):
+        self.files[path] = stream.read()
+
+
+class Storage(StorageBackend):
+    """
+    Picks the backend of a path by its scheme: file:// for local files, memory:// for the in-memory backend and
+    Minio for everything else. Paths ending in .gz or .zst are decompressed while reading and compressed on write.
+    """
+
+    def __init__(self, minio: Optional[MinioStorage] = None):
+        self.file = FileStorage()
+        self.memory = MemoryStorage()
+        self.minio = minio
+
+    def backend(self, path: str) -> StorageBackend:
+        if path[:7] == 'file://':
+            return self.file
+        if path[:9] == 'memory://':
+            return self.memory
+        if self.minio is not None:
+            return self.minio
+        raise IOError("Don't know how to access file " + path + ", no Minio Object Store configured")
+
+    @contextmanager
+    def open(self, path: str) -> Iterator[BinaryIO]:
+        encoding = content_encoding(path)
+        with self.backend(path).open(path) as stream:
+            if encoding is None:
+                yield stream
+            else:
+                with decompressing(stream, encoding) as decompressed:
+                    yield decompressed
+
+    def write(self, path: str, stream: BinaryIO, length: int = -1):
+        encoding = content_encoding(path)
+        if encoding is None:
+            self.backend(path).write(path, stream, length)
+        else:
+            # compressed while the backend writes it, so the length is unknown
+            with compressing(stream, encoding) as compressed:
+                self.backend(path).write(path, compressed)
+
+    def copy(self, source: str, destination: str):
+        backend = self.backend(source)
+        if backend is self.backend(destination) and content_encoding(source) == content_encoding(destination):
+            backend.copy(source, destination)
+        else:
+            super().copy(source, destination)
+
+    def version(self, path: str) -> str:
+        # of the stored object, compressed or not
+        return self.backend(path).version(path)
+
+    def presigned_url(self, path: str, expires: int) -> Optional[str]:
+        return self.backend(path).presigned_url(path, expires)
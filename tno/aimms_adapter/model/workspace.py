@@ -0,0 +1,49 @@
+import os
+import shutil
+from typing import List
+
+from tno.aimms_adapter.settings import EnvSettings
+from tno.shared.log import get_logger
+
+logger = get_logger(__name__)
+
+
+def workspace_disk_usage(root: str = None) -> dict:
+    """Free and total space of the disk that holds the workspaces"""
+    path = os.path.abspath(root or EnvSettings.workspace_root())
+    while not os.path.isdir(path):  # the root is only created with the first workspace
+        path = os.path.dirname(path)
+    usage = shutil.disk_usage(path)
+    return {"path": path, "free_bytes": usage.free, "total_bytes": usage.total}
+
+
+class OperaWorkspace:
+    """
+    Private working directory of a single model run. It contains a copy of the clean Opera database and the folder
+    in which AIMMS writes its output, so several runs can import and solve at the same time.
+    """
+
+    def __init__(self, model_run_id: str, root: str = None):
+        self.model_run_id = model_run_id
+        self.path = os.path.abspath(os.path.join(root or EnvSettings.workspace_root(), model_run_id))
+        self.access_database = os.path.join(self.path, os.path.basename(EnvSettings.access_database()))
+        self.output_folder = os.path.join(self.path, "output")
+
+    def create(self):
+        logger.info(f"Creating workspace for model run {self.model_run_id} at {self.path}")
+        os.makedirs(self.output_folder, exist_ok=True)
+        # imported here, the Access importer pulls in pandas, sqlalchemy and pyodbc
+        from tno.aimms_adapter.model.opera_accessdb.opera_access_importer import copy_clean_access_database
+        copy_clean_access_database(EnvSettings.clean_access_database(), self.access_database)
+
+    def aimms_arguments(self) -> List[str]:
+        """
+        Arguments of the AIMMS start procedure, passed after the project file: the Opera database and the output
+        folder of this workspace
+        """
+        return [self.access_database, self.output_folder]
+
+    def remove(self):
+        if os.path.isdir(self.path):
+            logger.info(f"Removing workspace of model run {self.model_run_id}")
+            shutil.rmtree(self.path, ignore_errors=True)
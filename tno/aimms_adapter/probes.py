@@ -0,0 +1,93 @@
+import os
+import threading
+from time import monotonic, sleep, time
+from typing import Callable, Dict, Optional
+
+from tno.aimms_adapter.settings import EnvSettings
+from tno.shared.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class Probe:
+    """
+    Checks a backend periodically in a daemon thread. Requests only read the cached outcome, so reporting the health
+    of the adapter never waits for a backend.
+    """
+
+    def __init__(self, name: str, fn: Callable[[], None], interval: float, required: bool = True):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.required = required  # the adapter is not ready while a required probe fails
+        self.ok: Optional[bool] = None  # None until the first check has finished
+        self.latency: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked: Optional[float] = None
+
+    def start(self):
+        threading.Thread(target=self._run, name=f"probe-{self.name}", daemon=True).start()
+
+    def check(self):
+        start = monotonic()
+        try:
+            self.fn()
+        except Exception as e:
+            if self.ok is not False:
+                logger.warning(f"Probe {self.name} failed: {e}")
+            self.ok, self.error = False, str(e)
+        else:
+            if self.ok is False:
+                logger.info(f"Probe {self.name} is ok again")
+            self.ok, self.error = True, None
+        self.latency = monotonic() - start
+        self.checked = time()
+
+    def _run(self):
+        while True:
+            self.check()
+            sleep(self.interval)
+
+    def info(self) -> dict:
+        return {
+            "ok": self.ok,
+            "required": self.required,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "error": self.error,
+            "checked": self.checked,
+        }
+
+
+class Probes:
+    def __init__(self):
+        self.probes: Dict[str, Probe] = {}
+
+    def add(self, name: str, fn: Callable[[], None], interval: float = None, required: bool = True) -> Probe:
+        probe = Probe(name, fn, interval or EnvSettings.probe_interval(), required=required)
+        self.probes[name] = probe
+        probe.start()
+        return probe
+
+    @property
+    def failing(self) -> bool:
+        """True when a required probe failed its last check, probes that haven't finished a check yet don't count"""
+        return any(probe.ok is False for probe in self.probes.values() if probe.required)
+
+    def info(self) -> dict:
+        return {name: probe.info() for name, probe in self.probes.items()}
+
+
+def probe_clean_database():
+    with open(EnvSettings.clean_access_database(), 'rb') as file:
+        file.read(1)
+
+
+def probe_aimms_binary():
+    path = EnvSettings.aimms_exe_path()
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"AIMMS binary not found at {path}")
+    if not os.access(path, os.X_OK):
+        raise PermissionError(f"AIMMS binary at {path} is not executable")
+
+
+probes = Probes()
@@ -0,0 +1,79 @@
+from typing import Callable, Optional
+
+import requests
+
+from tno.aimms_adapter.settings import EnvSettings
+from tno.shared.log import get_logger
+
+logger = get_logger(__name__)
+
+
+def registry_data(capacity: Optional[dict] = None) -> dict:
+    """The registration of this adapter, with the load figures of capacity (see Model.capacity) when given"""
+    data = {"uri": EnvSettings.external_url(), "used_workers": 0, "name": "OPERA",
+            "owner": "TNO", "version": "1.0",
+            "max_workers": EnvSettings.max_concurrent_runs()}
+    if capacity is not None:
+        data.update(used_workers=capacity["running_runs"],
+                    max_workers=capacity["max_concurrent_runs"],
+                    queue_length=capacity["queue_length"],
+                    average_run_duration=capacity["average_run_duration"])
+    return data
+
+
+class RegistryClient:
+    """
+    Registers this adapter once with the MM Registry and keeps its load figures there up to date, so the orchestrator
+    can spread model runs over several adapters. The figures are sent to the update URL of the registry
+    (REGISTRY_UPDATE_URL, with {id} replaced by the id the registry returned on registration). Without an update URL,
+    or when the registry didn't return an id, the figures are only sent with the registration. The adapter registers
+    again only when registering failed, or when the registry doesn't know the id anymore, e.g. after a restart.
+    """
+
+    def __init__(self, endpoint: str, capacity: Optional[Callable[[], dict]] = None,
+                 update_url: Optional[str] = None):
+        self.endpoint = endpoint
+        self.capacity = capacity
+        self.update_url = update_url if update_url is not None else EnvSettings.registry_update_url()
+        self.registered = False
+        self.registration_id: Optional[str] = None
+
+    def register(self):
+        """Registers this adapter with the MM Registry, raises an exception when that fails"""
+        logger.info(f"Registering with MM Registry at {self.endpoint}")
+        r = self._send("post", self.endpoint)
+        try:
+            self.registration_id = r.json().get("id")
+        except (ValueError, AttributeError):
+            self.registration_id = None
+        self.registered = True
+        if self.registration_id is None and self.update_url:
+            logger.warning("MM Registry returned no id for this adapter, its load figures are not updated")
+
+    def heartbeat(self):
+        """Sends the current load figures to the MM Registry, registers first if that is needed"""
+        if not self.registered:
+            self.register()
+            return
+        if not self.update_url or self.registration_id is None:
+            return
+        try:
+            self._send("put", self.update_url.format(endpoint=self.endpoint.rstrip('/'), id=self.registration_id))
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code != 404:
+                raise
+            logger.info("MM Registry doesn't know this adapter anymore, registering again")
+            self.registered = False
+            self.registration_id = None
+            self.register()
+
+    def _send(self, method: str, url: str) -> requests.Response:
+        data = registry_data(self.capacity() if self.capacity else None)
+        try:
+            r = requests.request(method, url, json=data, timeout=EnvSettings.registry_timeout())
+            r.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code != 404:
+                logger.error(f"MM Registry request {method.upper()} {url} failed: {e}, {e.response.text}")
+            raise
+        return r
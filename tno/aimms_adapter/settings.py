@@ -1,5 +1,6 @@
 import os
 import secrets
+from typing import Optional
 
 from dotenv import load_dotenv
 
@@ -41,6 +42,44 @@ class EnvSettings:
     def minio_secret_key():
         return os.getenv("MINIO_SECRET_KEY", "")
 
+    @staticmethod
+    def minio_pool_size() -> int:
+        """Maximum number of connections to Minio, requests wait for a free connection"""
+        return int(os.getenv("MINIO_POOL_SIZE", "10"))
+
+    @staticmethod
+    def minio_connect_timeout() -> float:
+        return float(os.getenv("MINIO_CONNECT_TIMEOUT", "10"))
+
+    @staticmethod
+    def minio_read_timeout() -> float:
+        return float(os.getenv("MINIO_READ_TIMEOUT", "300"))
+
+    @staticmethod
+    def minio_retries() -> int:
+        return int(os.getenv("MINIO_RETRIES", "5"))
+
+    @staticmethod
+    def output_compression() -> Optional[str]:
+        """
+        Compression of output ESDLs, 'gzip' or 'zstd'. The suffix (.gz or .zst) is added to the output path, unless
+        the path already ends with one. None when OUTPUT_COMPRESSION is not set.
+        """
+        return os.getenv("OUTPUT_COMPRESSION", "") or None
+
+    @staticmethod
+    def result_handoff() -> str:
+        """
+        The output ESDL is written to the output path as soon as the run has finished. With 'inline' /model/results
+        returns its path, with 'presigned' also a presigned download URL.
+        """
+        return os.getenv("RESULT_HANDOFF", "inline")
+
+    @staticmethod
+    def presigned_url_expiry() -> int:
+        """Seconds a presigned result URL stays valid"""
+        return int(os.getenv("PRESIGNED_URL_EXPIRY", "3600"))
+
     # Registry endpoint config
     @staticmethod
     def registry_endpoint():
@@ -50,6 +89,31 @@ class EnvSettings:
     def external_url():
         return os.getenv("EXTERNAL_URL", "")
 
+    @staticmethod
+    def registry_timeout() -> float:
+        """Seconds to wait for a response of the MM Registry"""
+        return float(os.getenv("REGISTRY_TIMEOUT", "10"))
+
+    @staticmethod
+    def registry_update_url() -> str:
+        """
+        URL to which the load figures of a registered adapter are sent with a PUT, {endpoint} is replaced by
+        REGISTRY_ENDPOINT and {id} by the id the registry returned. Empty when the registry has no update call, the
+        figures are then only sent with the registration.
+        """
+        return os.getenv("REGISTRY_UPDATE_URL", "")
+
+    @staticmethod
+    def registry_heartbeat_interval() -> float:
+        """Seconds between the updates of the load figures of the adapter in the MM Registry, see registry_update_url()"""
+        return float(os.getenv("REGISTRY_HEARTBEAT_INTERVAL", "30"))
+
+    # Startup config
+    @staticmethod
+    def warm_up() -> bool:
+        """Imports the modules for parsing ESDL and importing into Opera in the background right after startup"""
+        return os.getenv("WARM_UP", "True").upper() != "FALSE"
+
     # AIMMS config
     @staticmethod
     def aimms_exe_path():
@@ -61,11 +125,15 @@ class EnvSettings:
 
     @staticmethod
     def aimms_procedure():
+        """Start procedure of the AIMMS model, it gets the Opera database and output folder of the run as arguments"""
         return os.getenv("AIMMS_PROCEDURE", "")
 
     @staticmethod
     def access_database():
-        """Contains the actual database that Opera uses (where the dsn file refers to)"""
+        """
+        Contains the actual database that Opera uses (where the dsn file refers to). Model runs solve a copy in their
+        workspace, with the same file name
+        """
         return os.getenv("ACCESS_DATABASE", "opera/Opties_mmvib.mdb")
     @staticmethod
     def clean_access_database():
@@ -77,6 +145,110 @@ class EnvSettings:
         """Contains an 'empty' database to which the ESDL can be added for each run"""
         return os.getenv("OPERA_OUTPUT_FOLDER", r"test/opera/Opera_20221212/CSV MMvIB 2030/")
 
+    @staticmethod
+    def workspace_root():
+        """Folder in which every model run gets its own copy of the Opera database and output folder"""
+        return os.getenv("WORKSPACE_ROOT", "workspaces")
+
+    # Run registry config
+    @staticmethod
+    def run_registry_database():
+        """SQLite database in which the model runs are stored, so they survive a restart of the adapter"""
+        return os.getenv("RUN_REGISTRY_DATABASE", "run_registry.sqlite")
+
+    @staticmethod
+    def run_ttl() -> float:
+        """Seconds after which finished runs, and runs that never started, are removed from the run registry"""
+        return float(os.getenv("RUN_TTL", str(7 * 24 * 3600)))
+
+    @staticmethod
+    def max_finished_runs() -> int:
+        """Maximum number of finished model runs that are kept, the oldest ones are removed first"""
+        return int(os.getenv("MAX_FINISHED_RUNS", "1000"))
+
+    # Result cache config
+    @staticmethod
+    def result_cache_folder():
+        """Folder with output ESDLs of earlier runs, reused when a run has identical inputs"""
+        return os.getenv("RESULT_CACHE_FOLDER", "result_cache")
+
+    @staticmethod
+    def result_cache_max_bytes() -> int:
+        """Maximum size of the result cache, least recently used results are removed first. 0 disables the cache"""
+        return int(os.getenv("RESULT_CACHE_MAX_BYTES", str(1024 ** 3)))
+
+    @staticmethod
+    def object_cache_folder():
+        """Folder with objects downloaded from Minio, reused as long as their ETag doesn't change"""
+        return os.getenv("OBJECT_CACHE_FOLDER", "object_cache")
+
+    @staticmethod
+    def object_cache_max_bytes() -> int:
+        """Maximum size of the Minio object cache, least recently used objects are removed first. 0 disables it"""
+        return int(os.getenv("OBJECT_CACHE_MAX_BYTES", str(1024 ** 3)))
+
+    # Status config
+    @staticmethod
+    def status_max_wait() -> float:
+        """Maximum number of seconds a long-poll status request waits for a state change"""
+        return float(os.getenv("STATUS_MAX_WAIT", "60"))
+
+    @staticmethod
+    def event_keep_alive() -> float:
+        """Seconds between keep-alive comments on an idle Server-Sent Events stream"""
+        return float(os.getenv("EVENT_KEEP_ALIVE", "15"))
+
+    # Scheduler config
+    @staticmethod
+    def max_concurrent_runs() -> int:
+        """Number of model runs that are allowed to execute at the same time, other runs are queued"""
+        return int(os.getenv("MAX_CONCURRENT_RUNS", "1"))
+
+    @staticmethod
+    def prepare_workers() -> int:
+        """
+        Number of model runs whose inputs are fetched, parsed and imported at the same time. These workers are
+        separate from the solve slots, so the next run is prepared while AIMMS solves the current one.
+        """
+        return int(os.getenv("PREPARE_WORKERS", "2"))
+
+    @staticmethod
+    def parse_processes() -> int:
+        """
+        Number of worker processes that parse input ESDLs, the two inputs of a run are parsed at the same time. A run
+        checks out workers of its own, so runs wait for free workers. With 0 the ESDLs are parsed in threads of the
+        adapter process instead.
+        """
+        return int(os.getenv("PARSE_PROCESSES", "2"))
+
+    # Run control config
+    @staticmethod
+    def run_timeout() -> Optional[float]:
+        """
+        Wall-clock limit of a model run in seconds, counted from the moment it gets a solve slot. None when
+        RUN_TIMEOUT is 0 or not set.
+        """
+        return float(os.getenv("RUN_TIMEOUT", "0")) or None
+
+    @staticmethod
+    def stage_timeout(stage: str) -> Optional[float]:
+        """
+        Time limit in seconds of a stage of a model run (fetch, parse, import, solve or collect), read from e.g.
+        SOLVE_TIMEOUT. None when the variable is 0 or not set.
+        """
+        return float(os.getenv(f"{stage.upper()}_TIMEOUT", "0")) or None
+
+    @staticmethod
+    def cancel_wait() -> float:
+        """Seconds a cancel request waits for a running model run to stop"""
+        return float(os.getenv("CANCEL_WAIT", "5"))
+
+    # Probe config
+    @staticmethod
+    def probe_interval() -> float:
+        """Seconds between the background checks of Minio, the clean database and the AIMMS binary"""
+        return float(os.getenv("PROBE_INTERVAL", "30"))
+
 
 
 
@@ -0,0 +1,84 @@
+import threading
+from time import sleep
+from typing import Callable, Dict, Optional
+
+from tno.shared.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class BackgroundTask:
+    """
+    A startup task, e.g. connecting to a backend, that runs in a daemon thread so the adapter can serve requests
+    right away. A failing task is retried with exponential backoff until it succeeds.
+    """
+
+    def __init__(self, name: str, fn: Callable[[], None], required: bool = True,
+                 retry_interval: float = 1.0, max_retry_interval: float = 60.0):
+        self.name = name
+        self.fn = fn
+        self.required = required  # the adapter is only ready when all required tasks have succeeded
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.attempts = 0
+        self._done = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def start(self):
+        threading.Thread(target=self._run, name=f"startup-{self.name}", daemon=True).start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def _run(self):
+        delay = self.retry_interval
+        while True:
+            self.attempts += 1
+            try:
+                self.fn()
+            except Exception as e:
+                self.state = "retrying"
+                self.error = str(e)
+                logger.warning(f"Startup task {self.name} failed (attempt {self.attempts}), retrying in {delay:g} s: {e}")
+                sleep(delay)
+                delay = min(delay * 2, self.max_retry_interval)
+            else:
+                self.state = "ready"
+                self.error = None
+                logger.info(f"Startup task {self.name} finished")
+                self._done.set()
+                return
+
+    def info(self) -> dict:
+        return {"state": self.state, "required": self.required, "attempts": self.attempts, "error": self.error}
+
+
+class Startup:
+    """The background tasks that are started with the adapter, and whether the adapter is ready for model runs"""
+
+    def __init__(self):
+        self.tasks: Dict[str, BackgroundTask] = {}
+
+    def add(self, name: str, fn: Callable[[], None], required: bool = True) -> BackgroundTask:
+        task = BackgroundTask(name, fn, required=required)
+        self.tasks[name] = task
+        task.start()
+        return task
+
+    @property
+    def ready(self) -> bool:
+        return all(task.ready for task in self.tasks.values() if task.required)
+
+    def info(self) -> dict:
+        return {
+            "ready": self.ready,
+            "tasks": {name: task.info() for name, task in self.tasks.items()},
+        }
+
+
+startup = Startup()